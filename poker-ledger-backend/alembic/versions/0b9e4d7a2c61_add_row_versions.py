@@ -0,0 +1,28 @@
+"""add row versions
+
+Revision ID: 0b9e4d7a2c61
+Revises: f3a1c5d9e8b2
+Create Date: 2026-10-19 11:12:38.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9e4d7a2c61'
+down_revision = 'f3a1c5d9e8b2'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('game_sessions', 'players')
+
+
+def upgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'version')
@@ -0,0 +1,53 @@
+"""per-owner sync counters
+
+Revision ID: 4b8e1f6c2a97
+Revises: 9a4c2e7f1d56
+Create Date: 2026-10-19 15:12:08.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e1f6c2a97'
+down_revision = '9a4c2e7f1d56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('sync_counters',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_counters_id'), 'sync_counters', ['id'], unique=False)
+    op.create_index(op.f('ix_sync_counters_owner_id'), 'sync_counters', ['owner_id'], unique=True)
+    # Cursors that clients hold came from the global counter; every owner
+    # starts at its value so none of them skips a later change
+    op.execute(
+        "INSERT INTO sync_counters (owner_id, value) "
+        "SELECT users.id, sync_counter.value FROM users CROSS JOIN sync_counter WHERE sync_counter.id = 1"
+    )
+    op.drop_index(op.f('ix_sync_counter_id'), table_name='sync_counter')
+    op.drop_table('sync_counter')
+
+
+def downgrade() -> None:
+    sync_counter = op.create_table('sync_counter',
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_counter_id'), 'sync_counter', ['id'], unique=False)
+    op.bulk_insert(sync_counter, [{'id': 1, 'value': 0}])
+    op.execute("UPDATE sync_counter SET value = (SELECT coalesce(max(value), 0) FROM sync_counters)")
+    op.drop_index(op.f('ix_sync_counters_owner_id'), table_name='sync_counters')
+    op.drop_index(op.f('ix_sync_counters_id'), table_name='sync_counters')
+    op.drop_table('sync_counters')
@@ -0,0 +1,34 @@
+"""owner-scoped search index
+
+Revision ID: 5d2a8c4e9f13
+Revises: 4b8e1f6c2a97
+Create Date: 2026-10-19 16:40:31.000000
+
+"""
+from alembic import op
+
+from app.models import search
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a8c4e9f13'
+down_revision = '4b8e1f6c2a97'
+branch_labels = None
+depends_on = None
+
+
+# The index gains owner_id; it is derived data, so rebuild it from the
+# current DDL in app.models.search
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for statement in search.DROP[dialect]:
+        op.execute(statement)
+    for statement in search.CREATE[dialect]:
+        op.execute(statement)
+    op.execute(search.BACKFILL[dialect])
+
+
+def downgrade() -> None:
+    # The earlier search code never reads owner_id, so the rebuilt index
+    # serves it as it is
+    pass
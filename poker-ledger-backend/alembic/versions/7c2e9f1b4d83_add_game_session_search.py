@@ -0,0 +1,31 @@
+"""add game session search
+
+Revision ID: 7c2e9f1b4d83
+Revises: 0b9e4d7a2c61
+Create Date: 2026-10-19 11:58:20.000000
+
+"""
+from alembic import op
+
+from app.models import search
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9f1b4d83'
+down_revision = '0b9e4d7a2c61'
+branch_labels = None
+depends_on = None
+
+
+# The trigger DDL is shared with create_all() in app.models.search, one set
+# per dialect
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for statement in search.CREATE[dialect]:
+        op.execute(statement)
+    op.execute(search.BACKFILL[dialect])
+
+
+def downgrade() -> None:
+    for statement in search.DROP[op.get_bind().dialect.name]:
+        op.execute(statement)
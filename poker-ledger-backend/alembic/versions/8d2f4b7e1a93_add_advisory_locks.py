@@ -0,0 +1,33 @@
+"""add advisory locks
+
+Revision ID: 8d2f4b7e1a93
+Revises: 30ce1e8dbbd1
+Create Date: 2026-10-19 07:20:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4b7e1a93'
+down_revision = '30ce1e8dbbd1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('advisory_locks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_advisory_locks_id'), 'advisory_locks', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_advisory_locks_id'), table_name='advisory_locks')
+    op.drop_table('advisory_locks')
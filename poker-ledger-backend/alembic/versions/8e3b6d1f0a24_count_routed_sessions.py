@@ -0,0 +1,24 @@
+"""count routed sessions
+
+Revision ID: 8e3b6d1f0a24
+Revises: 5d2a8c4e9f13
+Create Date: 2026-10-19 18:05:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3b6d1f0a24'
+down_revision = '5d2a8c4e9f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('shard_placements', sa.Column('routed_sessions', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('shard_placements', 'routed_sessions')
@@ -0,0 +1,41 @@
+"""add shard placements
+
+Revision ID: 9a4c2e7f1d56
+Revises: 7c2e9f1b4d83
+Create Date: 2026-10-19 13:24:51.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c2e7f1d56'
+down_revision = '7c2e9f1b4d83'
+branch_labels = None
+depends_on = None
+
+
+# Only used by the directory database when SHARDS is set. Existing SQLite
+# tables keep reusing deleted ids (no AUTOINCREMENT); SQLite shards are
+# created by `python -m app.tools.shards init` instead.
+def upgrade() -> None:
+    op.create_table('shard_placements',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.String(length=32), nullable=False),
+    sa.Column('moving_to', sa.String(length=32), nullable=True),
+    sa.Column('pinned', sa.Boolean(), server_default=sa.false(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shard_placements_id'), 'shard_placements', ['id'], unique=False)
+    op.create_index(op.f('ix_shard_placements_owner_id'), 'shard_placements', ['owner_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_shard_placements_owner_id'), table_name='shard_placements')
+    op.drop_index(op.f('ix_shard_placements_id'), table_name='shard_placements')
+    op.drop_table('shard_placements')
@@ -0,0 +1,28 @@
+"""add analytics indexes
+
+Revision ID: b41c7e9d2f05
+Revises: 8d2f4b7e1a93
+Create Date: 2026-10-19 08:02:41.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41c7e9d2f05'
+down_revision = '8d2f4b7e1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_game_sessions_owner_id_game_date', 'game_sessions', ['owner_id', 'game_date'], unique=False)
+    op.create_index(op.f('ix_players_game_session_id'), 'players', ['game_session_id'], unique=False)
+    op.create_index(op.f('ix_settlements_game_session_id'), 'settlements', ['game_session_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_settlements_game_session_id'), table_name='settlements')
+    op.drop_index(op.f('ix_players_game_session_id'), table_name='players')
+    op.drop_index('ix_game_sessions_owner_id_game_date', table_name='game_sessions')
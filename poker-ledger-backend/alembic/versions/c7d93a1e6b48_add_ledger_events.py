@@ -0,0 +1,43 @@
+"""add ledger events
+
+Revision ID: c7d93a1e6b48
+Revises: 5e8a0c3f9b27
+Create Date: 2026-10-19 09:26:03.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d93a1e6b48'
+down_revision = '5e8a0c3f9b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing buy_in/cash_out values stay as each player's snapshot
+    op.create_table('ledger_events',
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('game_session_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('compacted', sa.Boolean(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['game_session_id'], ['game_sessions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ledger_events_id'), 'ledger_events', ['id'], unique=False)
+    op.create_index(op.f('ix_ledger_events_player_id'), 'ledger_events', ['player_id'], unique=False)
+    op.create_index('ix_ledger_events_pending', 'ledger_events', ['game_session_id'], unique=False, sqlite_where=sa.text('NOT compacted'), postgresql_where=sa.text('NOT compacted'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ledger_events_pending', table_name='ledger_events', sqlite_where=sa.text('NOT compacted'), postgresql_where=sa.text('NOT compacted'))
+    op.drop_index(op.f('ix_ledger_events_player_id'), table_name='ledger_events')
+    op.drop_index(op.f('ix_ledger_events_id'), table_name='ledger_events')
+    op.drop_table('ledger_events')
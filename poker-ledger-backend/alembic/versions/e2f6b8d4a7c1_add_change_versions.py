@@ -0,0 +1,59 @@
+"""add change versions
+
+Revision ID: e2f6b8d4a7c1
+Revises: c7d93a1e6b48
+Create Date: 2026-10-19 10:04:52.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f6b8d4a7c1'
+down_revision = 'c7d93a1e6b48'
+branch_labels = None
+depends_on = None
+
+SYNCED_TABLES = ('game_sessions', 'players', 'settlements')
+
+
+def upgrade() -> None:
+    sync_counter = op.create_table('sync_counter',
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_counter_id'), 'sync_counter', ['id'], unique=False)
+    op.bulk_insert(sync_counter, [{'id': 1, 'value': 0}])
+
+    op.create_table('tombstones',
+    sa.Column('table_name', sa.String(length=32), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('change_version', sa.BigInteger(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tombstones_id'), 'tombstones', ['id'], unique=False)
+    op.create_index('ix_tombstones_owner_id_change_version', 'tombstones', ['owner_id', 'change_version'], unique=False)
+
+    # Existing rows start at version 0 and are picked up by a full sync
+    for table in SYNCED_TABLES:
+        op.add_column(table, sa.Column('change_version', sa.BigInteger(), server_default='0', nullable=False))
+        op.create_index(op.f(f'ix_{table}_change_version'), table, ['change_version'], unique=False)
+
+
+def downgrade() -> None:
+    for table in reversed(SYNCED_TABLES):
+        op.drop_index(op.f(f'ix_{table}_change_version'), table_name=table)
+        op.drop_column(table, 'change_version')
+    op.drop_index('ix_tombstones_owner_id_change_version', table_name='tombstones')
+    op.drop_index(op.f('ix_tombstones_id'), table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_index(op.f('ix_sync_counter_id'), table_name='sync_counter')
+    op.drop_table('sync_counter')
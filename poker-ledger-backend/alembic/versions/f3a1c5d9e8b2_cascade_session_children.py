@@ -0,0 +1,40 @@
+"""cascade session children
+
+Revision ID: f3a1c5d9e8b2
+Revises: e2f6b8d4a7c1
+Create Date: 2026-10-19 10:41:17.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a1c5d9e8b2'
+down_revision = 'e2f6b8d4a7c1'
+branch_labels = None
+depends_on = None
+
+CHILD_TABLES = ('players', 'settlements')
+
+# Postgres' default constraint names; batch mode needs them to find the
+# unnamed constraints when it recreates the table on SQLite
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _replace_fk(table: str, ondelete: str | None) -> None:
+    name = f'{table}_game_session_id_fkey'
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(name, 'game_sessions', ['game_session_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    # Deleting a session removes its players and settlements in the database
+    # instead of the ORM loading and deleting each one
+    for table in CHILD_TABLES:
+        _replace_fk(table, 'CASCADE')
+
+
+def downgrade() -> None:
+    for table in CHILD_TABLES:
+        _replace_fk(table, None)
@@ -1,8 +1,14 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, game_sessions, players
+from app.api.endpoints import analytics, auth, events, game_sessions, jobs, players, profiles, search, sync
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(game_sessions.router, prefix="/game-sessions", tags=["game-sessions"])
-api_router.include_router(players.router, prefix="/players", tags=["players"]) 
\ No newline at end of file
+api_router.include_router(events.router, prefix="/game-sessions", tags=["events"])
+api_router.include_router(players.router, prefix="/players", tags=["players"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(profiles.router, prefix="/admin/profiles", tags=["admin"])
@@ -1,21 +1,27 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, Generator, Optional
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
-from app.core import security
+from app.core import profiling, security
 from app.core.config import settings
+from app.db import sharding
 from app.db.session import SessionLocal
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
+optional_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False
+)
 
 
 def get_db() -> Generator:
+    # Request code runs in threadpool workers; attach them to an active profile
+    profiling.mark_current_thread()
     try:
         db = SessionLocal()
         yield db
@@ -26,10 +32,14 @@ def get_db() -> Generator:
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
+    return get_user_from_token(db, token)
+
+
+def get_user_from_token(db: Session, token: str) -> models.User:
+    from jose import JWTError
+
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = security.decode_access_token(token)
         token_data = schemas.TokenPayload(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
@@ -39,6 +49,15 @@ def get_current_user(
     user = crud.user.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    # Everything after this reads and writes the user's own data
+    try:
+        sharding.route(db, user.id)
+    except sharding.OwnerMoving:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Your data is being moved; try again shortly",
+            headers={"Retry-After": "5"},
+        )
     return user
 
 
@@ -50,6 +69,24 @@ def get_current_active_user(
     return current_user
 
 
+def get_current_active_stream_user(
+    db: Session = Depends(get_db),
+    header_token: Optional[str] = Depends(optional_oauth2),
+    token: Optional[str] = None,
+) -> models.User:
+    """
+    Like get_current_active_user, but also accepts the token as a ?token=
+    query parameter since browser EventSource cannot set headers.
+    """
+    token = header_token or token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+    return get_current_active_user(get_user_from_token(db, token))
+
+
 def get_current_active_superuser(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -57,4 +94,38 @@ def get_current_active_superuser(
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    return current_user 
\ No newline at end of file
+    return current_user
+
+
+def get_if_match_version(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    """
+    The row version a client expects to update, from an If-Match header
+    holding an ETag as set by version_etag().
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a version ETag")
+
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def version_conflict(current: Any) -> HTTPException:
+    """
+    409 for an update based on a stale version, carrying the current state
+    so the client can merge and retry with its version.
+    """
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "The resource was changed by another request",
+            "current": jsonable_encoder(current),
+        },
+    )
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.services import analytics, response_cache
+
+router = APIRouter()
+
+
+def _cached(db: Session, owner_id: int, variant: str, build) -> Response:
+    # Keyed on the owner's data version too, so a write served by another
+    # worker is not answered from this one's entries
+    body = analytics.cache.get_or_set(
+        owner_id,
+        f"{response_cache.data_version(db, owner_id=owner_id)}|{variant}",
+        lambda: build().model_dump_json().encode(),
+    )
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/head-to-head", response_model=schemas.HeadToHead)
+def read_head_to_head(
+    db: Session = Depends(deps.get_db),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    player: Optional[str] = None,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Total amounts paid between each pair of players across the current
+    user's settled sessions, optionally limited to a date range or a player.
+    """
+    return _cached(
+        db,
+        current_user.id,
+        f"head-to-head|{start}|{end}|{player}",
+        lambda: analytics.head_to_head(
+            db, owner_id=current_user.id, start=start, end=end, player=player
+        ),
+    )
+
+
+@router.get("/pnl", response_model=schemas.PnlSeries)
+def read_pnl(
+    db: Session = Depends(deps.get_db),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    player: Optional[str] = None,
+    window: int = Query(5, ge=1, le=100),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Per-player P&L per settled session with running totals and a rolling
+    sum over the last `window` sessions.
+    """
+    return _cached(
+        db,
+        current_user.id,
+        f"pnl|{start}|{end}|{player}|{window}",
+        lambda: analytics.pnl_series(
+            db, owner_id=current_user.id, window=window, start=start, end=end, player=player
+        ),
+    )
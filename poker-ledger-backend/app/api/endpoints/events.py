@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, models
+from app.api import deps
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.events import Subscription, broker
+
+router = APIRouter()
+
+
+def _check_session_access(db: Session, game_session_id: int, user: models.User) -> None:
+    game_session = crud.game_session.get(db=db, id=game_session_id)
+    if not game_session:
+        raise HTTPException(status_code=404, detail="Game session not found")
+    if game_session.owner_id != user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+
+def _check_stream_access(
+    game_session_id: int,
+    current_user: models.User = Depends(deps.get_current_active_stream_user),
+    db: Session = Depends(deps.get_db),
+) -> None:
+    # A sync dependency, so the queries run in the threadpool rather than
+    # on the event loop
+    _check_session_access(db, game_session_id, current_user)
+    # Return the connection to the pool; the stream may stay open for hours
+    db.close()
+
+
+def _check_websocket_access(game_session_id: int, token: str) -> bool:
+    db = SessionLocal()
+    try:
+        user = deps.get_user_from_token(db, token)
+        deps.get_current_active_user(user)
+        _check_session_access(db, game_session_id, user)
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+    return True
+
+
+async def _sse_stream(game_session_id: int) -> AsyncIterator[str]:
+    # Subscribed only once the response starts; a client gone before then
+    # never iterates the stream, so its finally would never run
+    subscription = broker.subscribe(game_session_id)
+    try:
+        # Flush headers right away so clients know the stream is live
+        yield ": connected\n\n"
+        while True:
+            message = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": ping\n\n"
+            else:
+                yield f"data: {message}\n\n"
+    finally:
+        subscription.close()
+
+
+@router.get("/{game_session_id}/events")
+async def stream_game_session_events(
+    *,
+    game_session_id: int,
+    _: None = Depends(_check_stream_access),
+) -> Any:
+    """
+    Stream change events for a game session as Server-Sent Events.
+    """
+    return StreamingResponse(
+        _sse_stream(game_session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _forward_to_websocket(websocket: WebSocket, subscription: Subscription) -> None:
+    try:
+        while True:
+            message = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            if message is None:
+                await websocket.send_json({"type": "ping"})
+            else:
+                await websocket.send_text(message)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+@router.websocket("/{game_session_id}/ws")
+async def game_session_events_websocket(
+    websocket: WebSocket,
+    game_session_id: int,
+    token: str,
+) -> None:
+    """
+    Push change events for a game session over a WebSocket.
+    """
+    if not await run_in_threadpool(_check_websocket_access, game_session_id, token):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = broker.subscribe(game_session_id)
+    forwarder = asyncio.create_task(_forward_to_websocket(websocket, subscription))
+    try:
+        # Incoming frames are ignored; reading is only how a disconnect is noticed
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    finally:
+        forwarder.cancel()
+        subscription.close()
@@ -1,13 +1,22 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.config import settings
+from app.schemas.game_session import GameSessionInDB
+from app.services import analytics, events, ledger, response_cache, settlement_service
+from app.services.settlement_flow import SettlementInfeasible
 from app.services.settlement_service import calculate_settlements_for_session
+from app.services.singleflight import SingleFlight
 
 router = APIRouter()
 
+# Concurrent recalculations of the same session share one computation
+settlement_flights = SingleFlight()
+
 
 @router.get("/", response_model=List[schemas.GameSession])
 def read_game_sessions(
@@ -19,9 +28,17 @@ def read_game_sessions(
     """
     Retrieve game sessions for the current user.
     """
-    game_sessions = crud.game_session.get_multi_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit
-    )
+    game_sessions = [
+        schemas.GameSession.model_validate(game_session)
+        for game_session in crud.game_session.get_multi_by_owner(
+            db=db, owner_id=current_user.id, skip=skip, limit=limit
+        )
+    ]
+    # Read after the players, so a compaction in between can only leave
+    # out events until the next read, never count them twice
+    pending = ledger.pending_totals(db, game_session_ids=[s.id for s in game_sessions])
+    for game_session in game_sessions:
+        ledger.include_pending(game_session.players, pending)
     return game_sessions
 
 
@@ -46,17 +63,42 @@ def read_game_session(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
+    response: Response,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get game session by ID.
+    Get game session by ID. The ETag header is the session's version, to
+    send back as If-Match when updating it.
+
+    Settled sessions are served from the response cache as pre-serialized
+    JSON; players and settlements are only loaded on a miss. Player totals
+    include pending ledger events.
     """
     game_session = crud.game_session.get(db=db, id=id)
     if not game_session:
         raise HTTPException(status_code=404, detail="Game session not found")
     if game_session.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return game_session
+    etag = deps.version_etag(game_session.version)
+
+    def serialize() -> schemas.GameSession:
+        game_session_out = schemas.GameSession.model_validate(game_session)
+        # After the players, see read_game_sessions
+        ledger.include_pending(
+            game_session_out.players, ledger.pending_totals(db, game_session_ids=[id])
+        )
+        return game_session_out
+
+    if not (settings.RESPONSE_CACHE_ENABLED and game_session.is_settled):
+        response.headers["ETag"] = etag
+        return serialize()
+
+    body = response_cache.cache.get_or_set(
+        id,
+        response_cache.data_version(db, owner_id=game_session.owner_id, game_session_id=id),
+        lambda: serialize().model_dump_json().encode(),
+    )
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.put("/{id}", response_model=schemas.GameSession)
@@ -65,23 +107,46 @@ def update_game_session(
     db: Session = Depends(deps.get_db),
     id: int,
     game_session_in: schemas.GameSessionUpdate,
+    response: Response,
+    if_match: Optional[int] = Depends(deps.get_if_match_version),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Update a game session.
+
+    With a `version` in the body or an If-Match header, the update is only
+    applied to that version; otherwise to the version read here. Either
+    way a concurrent change gives a 409 with the current session.
     """
     game_session = crud.game_session.get(db=db, id=id)
     if not game_session:
         raise HTTPException(status_code=404, detail="Game session not found")
     if game_session.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    game_session = crud.game_session.update(
-        db=db, db_obj=game_session, obj_in=game_session_in
+    owner_id = current_user.id
+    expected = game_session_in.version if game_session_in.version is not None else if_match
+    if expected is not None and expected != game_session.version:
+        raise deps.version_conflict(schemas.GameSession.model_validate(game_session))
+    try:
+        game_session = crud.game_session.update(
+            db=db,
+            db_obj=game_session,
+            obj_in=game_session_in.dict(exclude_unset=True, exclude={"version"}),
+        )
+    except StaleDataError:
+        current = crud.game_session.get(db=db, id=id)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Game session not found")
+        raise deps.version_conflict(schemas.GameSession.model_validate(current))
+    response.headers["ETag"] = deps.version_etag(game_session.version)
+    analytics.invalidate_owner(owner_id)
+    events.publish(
+        id, events.SESSION_UPDATED, GameSessionInDB.model_validate(game_session)
     )
     return game_session
 
 
-@router.delete("/{id}", response_model=schemas.GameSession)
+@router.delete("/{id}", response_model=GameSessionInDB)
 def delete_game_session(
     *,
     db: Session = Depends(deps.get_db),
@@ -89,26 +154,39 @@ def delete_game_session(
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Delete a game session.
+    Delete a game session. Its players and settlements are deleted with it
+    and are not included in the response.
     """
     game_session = crud.game_session.get(db=db, id=id)
     if not game_session:
         raise HTTPException(status_code=404, detail="Game session not found")
     if game_session.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
+    owner_id = current_user.id
     game_session = crud.game_session.remove(db=db, id=id)
+    analytics.invalidate_owner(owner_id)
+    events.publish(id, events.SESSION_DELETED, {"id": id})
     return game_session
 
 
-@router.post("/{game_session_id}/calculate-settlements", response_model=List[schemas.Settlement])
+@router.post("/{game_session_id}/calculate-settlements", response_model=schemas.GameSession)
 def calculate_settlements(
     *,
     db: Session = Depends(deps.get_db),
     game_session_id: int,
+    options: Optional[schemas.SettlementOptions] = Body(None),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Calculate settlements for a game session.
+
+    Without a body the greedy method is used. A body with method
+    "min-cost-flow" can restrict who pays whom, cap players' transfers,
+    weight pairs and name a bank; constraints that cannot be met give a 422
+    and keep the previous settlements.
+
+    Concurrent requests for the same session and options wait for a single
+    in-flight calculation and all receive its result.
     """
     # Get game session
     game_session = crud.game_session.get(db=db, id=game_session_id)
@@ -117,12 +195,70 @@ def calculate_settlements(
     if game_session.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
+    def recalculate() -> schemas.GameSession:
+        settled = schemas.GameSession.model_validate(
+            calculate_settlements_for_session(db=db, game_session_id=game_session_id, options=options)
+        )
+        events.publish(
+            game_session_id, events.SETTLEMENT_RECOMPUTED, settled.settlements
+        )
+        return settled
+
     # Calculate settlements
-    settlements = calculate_settlements_for_session(
-        db=db, game_session_id=game_session_id
-    )
-    
-    return settlements
+    flight_key = (game_session_id, options.model_dump_json() if options else None)
+    try:
+        return settlement_flights.do(flight_key, recalculate)
+    except SettlementInfeasible as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.post("/{game_session_id}/settlements/preview", response_model=schemas.SettlementPreview)
+def preview_settlements(
+    *,
+    db: Session = Depends(deps.get_db),
+    game_session_id: int,
+    preview_in: Optional[schemas.SettlementPreviewRequest] = Body(None),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    The settlements the session would get, optionally with some players'
+    buy-ins and cash-outs replaced or extra players added. Nothing is
+    written: players are read with their pending ledger events in one
+    query, and results are memoized by net balances.
+    """
+    owner_id = db.query(models.GameSession.owner_id).filter(
+        models.GameSession.id == game_session_id
+    ).scalar()
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Game session not found")
+    if owner_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    preview_in = preview_in or schemas.SettlementPreviewRequest()
+
+    players = {
+        row.id: {"name": row.name, "buy_in": row.buy_in, "cash_out": row.cash_out}
+        for row in ledger.current_totals(db, game_session_id=game_session_id)
+    }
+    extra = []
+    for override in preview_in.players:
+        if override.id is None:
+            player = {"name": override.name, "buy_in": 0.0, "cash_out": 0.0}
+            extra.append(player)
+        elif override.id in players:
+            player = players[override.id]
+        else:
+            raise HTTPException(status_code=404, detail=f"Player {override.id} not found in this session")
+        player.update(override.dict(exclude_unset=True, exclude={"id"}, exclude_none=True))
+
+    players_with_net = [
+        {"name": p["name"], "net_result": round(p["cash_out"] - p["buy_in"], 2)}
+        for p in [*players.values(), *extra]
+    ]
+    try:
+        settlements = settlement_service.preview_settlements(players_with_net, preview_in.options)
+    except SettlementInfeasible as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"players": players_with_net, "settlements": settlements}
 
 
 @router.post("/{game_session_id}/players", response_model=schemas.Player)
@@ -145,12 +281,22 @@ def create_player(
     if game_session.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    # Create player
+    # Create player; the initial totals are recorded as ledger events
+    player_data = player_in.dict()
+    buy_in, cash_out = player_data.pop("buy_in"), player_data.pop("cash_out")
     player = models.Player(
-        **player_in.dict(),
+        **player_data,
+        buy_in=0.0,
+        cash_out=0.0,
         game_session_id=game_session_id
     )
+    ledger.set_totals(db, player=player, buy_in=buy_in, cash_out=cash_out)
+    owner_id = current_user.id
     db.add(player)
     db.commit()
+    response_cache.invalidate(game_session_id)
+    analytics.invalidate_owner(owner_id)
     db.refresh(player)
-    return schemas.Player.from_orm(player) 
\ No newline at end of file
+    player_out = schemas.Player.from_orm(player)
+    events.publish(game_session_id, events.PLAYER_UPSERTED, player_out)
+    return player_out 
\ No newline at end of file
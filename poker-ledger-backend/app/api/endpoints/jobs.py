@@ -0,0 +1,94 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.models.job import JobStatus
+from app.services import jobs
+
+router = APIRouter()
+
+
+def _get_own_job(db: Session, job_id: int, current_user: models.User) -> models.Job:
+    job = crud.job.get(db=db, id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.owner_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return job
+
+
+@router.post("/", response_model=schemas.Job, status_code=202)
+def submit_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_in: schemas.JobCreate,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Queue a background job and return immediately; poll GET /jobs/{id}.
+    """
+    if job_in.kind not in jobs.HANDLERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job kind; expected one of: {', '.join(sorted(jobs.HANDLERS))}",
+        )
+    return jobs.submit(db, kind=job_in.kind, payload=job_in.payload, owner_id=current_user.id)
+
+
+@router.get("/", response_model=List[schemas.Job])
+def read_jobs(
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the current user's jobs, newest first.
+    """
+    return crud.job.get_multi_by_owner(db=db, owner_id=current_user.id, skip=skip, limit=limit)
+
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def read_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a job's status and progress.
+    """
+    return _get_own_job(db, job_id, current_user)
+
+
+@router.get("/{job_id}/result")
+def read_job_result(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the result of a succeeded job.
+    """
+    job = _get_own_job(db, job_id, current_user)
+    if job.status != JobStatus.SUCCEEDED.value:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return Response(content=job.result or "null", media_type="application/json")
+
+
+@router.post("/{job_id}/cancel", response_model=schemas.Job)
+def cancel_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Cancel a job. A queued job is cancelled at once; a running one stops at
+    its next progress report.
+    """
+    job = _get_own_job(db, job_id, current_user)
+    return crud.job.request_cancel(db=db, job=job)
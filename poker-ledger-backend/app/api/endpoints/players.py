@@ -1,9 +1,13 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import timedelta
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app import models, schemas
+from app import crud, models, schemas
 from app.api import deps
+from app.core.config import settings
+from app.services import analytics, events, jobs, ledger, response_cache
 
 router = APIRouter()
 
@@ -14,10 +18,16 @@ def update_player(
     db: Session = Depends(deps.get_db),
     player_id: int,
     player_in: schemas.PlayerUpdate,
+    response: Response,
+    if_match: Optional[int] = Depends(deps.get_if_match_version),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Update a player.
+
+    With a `version` in the body or an If-Match header, the update is only
+    applied to that version; otherwise to the version read here. Either
+    way a concurrent change gives a 409 with the current player.
     """
     # Get player and check permissions
     player = db.query(models.Player).filter(models.Player.id == player_id).first()
@@ -27,15 +37,42 @@ def update_player(
     if player.game_session.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    # Update player
-    update_data = player_in.dict(exclude_unset=True)
+    # Update player; keep ids for after commit, which expires loaded rows
+    game_session_id, owner_id = player.game_session_id, current_user.id
+    ledger.compact(db, game_session_ids=[game_session_id])
+    # Checked after compaction, which may reload the player; the version
+    # read here is the one the flush below requires
+    expected = player_in.version if player_in.version is not None else if_match
+    if expected is not None and expected != player.version:
+        raise deps.version_conflict(schemas.Player.from_orm(player))
+    update_data = player_in.dict(exclude_unset=True, exclude={"version"})
+    # Totals are ledger-derived: record the change as events
+    ledger.set_totals(
+        db,
+        player=player,
+        buy_in=update_data.pop("buy_in", None),
+        cash_out=update_data.pop("cash_out", None),
+    )
     for field, value in update_data.items():
         setattr(player, field, value)
     
     db.add(player)
-    db.commit()
+    try:
+        # The flush checks the version the player was loaded with
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        current = db.query(models.Player).filter(models.Player.id == player_id).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Player not found")
+        raise deps.version_conflict(schemas.Player.from_orm(current))
+    response_cache.invalidate(game_session_id)
+    analytics.invalidate_owner(owner_id)
     db.refresh(player)
-    return schemas.Player.from_orm(player)
+    player_out = schemas.Player.from_orm(player)
+    response.headers["ETag"] = deps.version_etag(player_out.version)
+    events.publish(game_session_id, events.PLAYER_UPSERTED, player_out)
+    return player_out
 
 
 @router.delete("/players/{player_id}")
@@ -56,11 +93,67 @@ def delete_player(
     if player.game_session.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    db.delete(player)
-    db.commit()
+    owner_id = current_user.id
+    # Its ledger events go with it through ON DELETE CASCADE
+    player = crud.player.remove(db, id=player_id)
+    game_session_id = player.game_session_id
+    analytics.invalidate_owner(owner_id)
+    events.publish(game_session_id, events.PLAYER_DELETED, {"id": player_id})
     return {"message": "Player deleted successfully"} 
 
 
+def _get_own_player(db: Session, player_id: int, current_user: models.User) -> models.Player:
+    player = db.query(models.Player).filter(models.Player.id == player_id).first()
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+    if player.game_session.owner_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return player
+
+
+@router.post("/players/{player_id}/events", response_model=schemas.LedgerEvent, status_code=201)
+def append_ledger_event(
+    *,
+    db: Session = Depends(deps.get_db),
+    player_id: int,
+    event_in: schemas.LedgerEventCreate,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Record a buy-in, rebuy, add-on or cash-out for a player. Events are only
+    appended, so concurrent entries for the same player never overwrite
+    each other; the player's totals include them on the next read.
+    """
+    player = _get_own_player(db, player_id, current_user)
+    game_session_id, owner_id = player.game_session_id, current_user.id
+    event = ledger.append(db, player=player, kind=event_in.kind, amount=event_in.amount)
+    jobs.schedule(
+        db,
+        kind="compact-ledger",
+        payload={},
+        owner_id=owner_id,
+        delay=timedelta(seconds=settings.LEDGER_COMPACT_DELAY_SECONDS),
+    )
+    response_cache.invalidate(game_session_id)
+    analytics.invalidate_owner(owner_id)
+    event_out = schemas.LedgerEvent.model_validate(event)
+    events.publish(game_session_id, events.LEDGER_EVENT_APPENDED, event_out)
+    return event_out
+
+
+@router.get("/players/{player_id}/events", response_model=List[schemas.LedgerEvent])
+def read_ledger_events(
+    *,
+    db: Session = Depends(deps.get_db),
+    player_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    A player's ledger history, oldest first.
+    """
+    return _get_own_player(db, player_id, current_user).ledger_events
+
+
 @router.get("/unique-names", response_model=List[str])
 def get_unique_player_names(
     db: Session = Depends(deps.get_db),
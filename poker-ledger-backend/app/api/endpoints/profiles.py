@@ -0,0 +1,48 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app import models
+from app.api import deps
+from app.core import profiling
+
+router = APIRouter()
+
+
+def _get_profile(profile_id: int) -> profiling.Profile:
+    profile = profiling.store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get("/", response_model=List[dict])
+def read_profiles(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    List recent request profiles, newest first.
+    """
+    return [profile.summary() for profile in profiling.store.list()]
+
+
+@router.get("/{profile_id}")
+def read_profile(
+    profile_id: int,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get a profile as JSON: stack samples and the SQL statements it executed.
+    """
+    return _get_profile(profile_id).to_dict()
+
+
+@router.get("/{profile_id}/collapsed", response_class=PlainTextResponse)
+def read_profile_collapsed(
+    profile_id: int,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get a profile as collapsed stacks for flamegraph tools.
+    """
+    return _get_profile(profile_id).to_collapsed()
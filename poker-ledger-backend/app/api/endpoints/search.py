@@ -0,0 +1,31 @@
+from typing import Any
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.services import search
+
+router = APIRouter()
+
+
+@router.get("/game-sessions", response_model=schemas.GameSessionSearchResults)
+def search_game_sessions(
+    db: Session = Depends(deps.get_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Search the current user's game sessions by title, description and
+    player names. Every word must match (as a prefix); results are ranked
+    with title matches first.
+    """
+    total, hits = search.search_game_sessions(
+        db, owner_id=current_user.id, query=q, skip=skip, limit=limit
+    )
+    return {
+        "total": total,
+        "items": [{"game_session": game_session, "score": score} for game_session, score in hits],
+    }
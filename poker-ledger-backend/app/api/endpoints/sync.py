@@ -0,0 +1,79 @@
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.db import sync
+from app.services import ledger
+
+router = APIRouter()
+
+
+@router.get("/", response_model=schemas.SyncChanges)
+def read_changes(
+    db: Session = Depends(deps.get_db),
+    since: Optional[int] = Query(None, ge=0),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Sessions, players and settlements of the current user changed since the
+    `since` cursor, plus the ids of rows deleted since then. Without
+    `since`, returns every row (a full sync). Store the returned `cursor`
+    and send it as `since` next time.
+    """
+    owner_id = current_user.id
+    # Every change to the owner's rows up to their counter value read here
+    # is committed (see app.db.sync), so bounding all queries by it gives a
+    # consistent delta
+    cursor = sync.current_version(db, owner_id)
+    # Pending ledger events change player totals without a new change
+    # version, so players that have any are sent in every delta until the
+    # compact-ledger job folds them in, which gives them a version above
+    # this cursor. Read before the players: events compacted in between
+    # move their player past the cursor instead of being counted twice.
+    pending = ledger.pending_totals(db, owner_id=owner_id)
+
+    def changed(model, query, *also):
+        query = query.filter(model.change_version <= cursor)
+        if since is not None:
+            query = query.filter(or_(model.change_version > since, *also))
+        return query.order_by(model.id).all()
+
+    GameSession = models.GameSession
+    owned = db.query(GameSession.id).filter(GameSession.owner_id == owner_id)
+    players = [
+        schemas.Player.model_validate(player)
+        for player in changed(
+            models.Player,
+            db.query(models.Player).filter(models.Player.game_session_id.in_(owned)),
+            *([models.Player.id.in_(list(pending))] if pending else []),
+        )
+    ]
+    ledger.include_pending(players, pending)
+    changes = schemas.SyncChanges(
+        cursor=cursor,
+        full=since is None,
+        game_sessions=changed(
+            GameSession, db.query(GameSession).filter(GameSession.owner_id == owner_id)
+        ),
+        players=players,
+        settlements=changed(
+            models.Settlement,
+            db.query(models.Settlement).filter(models.Settlement.game_session_id.in_(owned)),
+        ),
+    )
+    if since is not None:
+        tombstones = (
+            db.query(models.Tombstone.table_name, models.Tombstone.row_id)
+            .filter(
+                models.Tombstone.owner_id == owner_id,
+                models.Tombstone.change_version > since,
+                models.Tombstone.change_version <= cursor,
+            )
+            .order_by(models.Tombstone.id)
+        )
+        for table_name, row_id in tombstones:
+            getattr(changes.deleted, table_name).append(row_id)
+    return changes
@@ -13,6 +13,15 @@ class Settings(BaseSettings):
     SUPABASE_URL: Optional[str] = None
     SUPABASE_KEY: Optional[str] = None
     
+    # Owner-partitioned storage, see app.db.sharding. Comma-separated
+    # "number=url" pairs, e.g. "1=sqlite:///./shard1.db,2=sqlite:///./shard2.db";
+    # empty keeps everything in DATABASE_URL
+    SHARDS: str = ""
+    SHARD_VNODES: int = 64
+    # Shard n hands out ids from n * SHARD_ID_SPAN up; 20 shards fit in a
+    # Postgres INTEGER
+    SHARD_ID_SPAN: int = 100_000_000
+    
     # Use Supabase connection string if available
     @property
     def get_database_url(self) -> str:
@@ -40,7 +49,61 @@ class Settings(BaseSettings):
     
     # Environment
     ENVIRONMENT: str = "development"
-    
+
+    # Live session updates
+    EVENTS_BACKEND: str = "memory"
+    EVENTS_MAX_QUEUE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # Idempotency-Key replay
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 60
+    # How often job worker pools delete expired keys (and requeue stale jobs)
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 5 * 60
+
+    # Metrics
+    METRICS_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+
+    # Per-request profiling (superusers only, see ProfilingMiddleware)
+    PROFILING_ENABLED: bool = False
+    PROFILING_BUFFER_SIZE: int = 50
+    PROFILING_SAMPLE_INTERVAL_MS: float = 1.0
+
+    # Cache of settled game session responses
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Background jobs. No threads by default, since they cannot outlive a
+    # request on serverless hosts: run `python -m app.tools.jobworker`, or
+    # opt in with JOBS_WORKERS > 0 where the API process is long-lived
+    JOBS_WORKERS: int = 0
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 3
+    JOBS_RETRY_BACKOFF_SECONDS: float = 5.0
+    # A running job whose worker has not reported for this long is requeued
+    JOBS_STALE_AFTER_SECONDS: int = 10 * 60
+    # Pending ledger events are folded into player totals by a
+    # compact-ledger job this long after an append, so bursts share a run
+    LEDGER_COMPACT_DELAY_SECONDS: float = 30.0
+
+    # Self-hosted server (python -m app.tools.server); 0 workers means one
+    # per CPU core the process may run on
+    SERVER_WORKERS: int = 0
+    # A worker exits after serving this many requests, plus a random 0 to
+    # jitter so workers do not all restart at once; 0 disables recycling
+    SERVER_MAX_REQUESTS: int = 10_000
+    SERVER_MAX_REQUESTS_JITTER: int = 1_000
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_BOOT_TIMEOUT_SECONDS: float = 60.0
+    SERVER_PREWARM_CONNECTIONS: int = 2
+    # Where the server's processes write their stats for /health; the
+    # server sets it for its workers, empty elsewhere
+    SERVER_STATS_DIR: str = ""
+    SERVER_STATS_INTERVAL_SECONDS: float = 2.0
+
     class Config:
         env_file = ".env"
         case_sensitive = True
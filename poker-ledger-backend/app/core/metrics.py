@@ -0,0 +1,207 @@
+"""
+A small in-process metrics registry rendered in the Prometheus text format.
+
+Metrics are updated on the request hot path, so each update is a dict lookup
+and a few integer/float operations under a lock. Label values are passed as
+a tuple in the order of the metric's label names.
+"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; roughly log-spaced from 1 ms to 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in values]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in values]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """
+        Register a callback run before each scrape, for gauges that are
+        cheaper to read on demand than to keep up to date (e.g. pool stats).
+        """
+        self._collectors.append(collector)
+
+    def clear(self) -> None:
+        """
+        Drop every recorded sample, as if the process had just started.
+        """
+        for metric in self._metrics:
+            metric.clear()
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route and status code.",
+    ("method", "route", "status"),
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route.",
+    ("method", "route"),
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.",
+))
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "SQL statements executed, by route.", ("route",),
+))
+db_query_duration_seconds = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time.",
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request, by route.",
+    ("route",), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+))
+db_slow_queries_total = registry.register(Counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_THRESHOLD_MS.",
+))
+db_pool_size = registry.register(Gauge(
+    "db_pool_size", "Configured size of the connection pool, by engine (directory or shard).", ("engine",),
+))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool, by engine (directory or shard).", ("engine",),
+))
+db_pool_overflow = registry.register(Gauge(
+    "db_pool_overflow", "Connections open beyond the pool size, by engine (directory or shard).", ("engine",),
+))
+response_cache_requests_total = registry.register(Counter(
+    "response_cache_requests_total", "Response cache lookups, by cache and result.",
+    ("cache", "result"),
+))
+response_cache_evictions_total = registry.register(Counter(
+    "response_cache_evictions_total", "Entries evicted from the response cache to stay in bounds.",
+))
+response_cache_bytes = registry.register(Gauge(
+    "response_cache_bytes", "Total size of cached response bodies.",
+))
@@ -0,0 +1,175 @@
+"""
+On-demand profiling of single requests.
+
+A profile is a statistical CPU sample of the threads working on one request
+plus every SQL statement it executed. Threads join a profile when they run
+request code with the profile in their context (see mark_current_thread),
+so a sync endpoint's threadpool worker is sampled alongside the event loop.
+The event loop thread is shared by all in-flight requests, so profiles are
+clearest on a quiet instance.
+"""
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+Stack = Tuple[str, ...]
+
+_ids = itertools.count(1)
+
+
+class Profile:
+    def __init__(self, method: str, path: str) -> None:
+        self.id = next(_ids)
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.samples: Counter = Counter()
+        self.queries: List[Tuple[str, float]] = []
+        self.thread_ids: Set[int] = set()
+        self._start = time.perf_counter()
+
+    def record_query(self, statement: str, elapsed: float) -> None:
+        self.queries.append((statement, elapsed * 1000))
+
+    def finish(self, status_code: int) -> None:
+        self.status_code = status_code
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "status_code": self.status_code,
+            "sample_count": sum(self.samples.values()),
+            "query_count": len(self.queries),
+            "query_time_ms": sum(ms for _, ms in self.queries),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.summary()
+        data["sample_interval_ms"] = settings.PROFILING_SAMPLE_INTERVAL_MS
+        data["stacks"] = [
+            {"frames": list(stack), "count": count}
+            for stack, count in self.samples.most_common()
+        ]
+        data["queries"] = [
+            {"statement": statement, "duration_ms": ms} for statement, ms in self.queries
+        ]
+        return data
+
+    def to_collapsed(self) -> str:
+        """
+        Render samples as collapsed stacks ("a;b;c 12" per line), the input
+        format of flamegraph.pl, speedscope and similar tools.
+        """
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+current_profile: ContextVar[Optional[Profile]] = ContextVar("current_profile", default=None)
+
+
+def mark_current_thread() -> None:
+    """
+    Add the calling thread to the active profile, if there is one.
+    """
+    profile = current_profile.get()
+    if profile is not None:
+        profile.thread_ids.add(threading.get_ident())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_name}"
+
+
+class Sampler:
+    """
+    One background thread that samples the stacks of every thread attached to
+    an active profile. It runs only while at least one profile is active.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._active: Set[Profile] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self) -> None:
+        interval = settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active)
+            frames = sys._current_frames()
+            for profile in active:
+                for thread_id in list(profile.thread_ids):
+                    frame = frames.get(thread_id)
+                    if frame is None or thread_id == own_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.reverse()
+                    profile.samples[tuple(stack)] += 1
+            time.sleep(interval)
+
+
+sampler = Sampler()
+
+
+class ProfileStore:
+    """
+    Bounded ring buffer of finished profiles; the oldest are dropped first.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._lock = threading.Lock()
+        self._profiles: Deque[Profile] = deque(maxlen=size)
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile.id == profile_id:
+                    return profile
+        return None
+
+
+store = ProfileStore(settings.PROFILING_BUFFER_SIZE)
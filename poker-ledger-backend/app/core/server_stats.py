@@ -0,0 +1,65 @@
+"""
+Stats of the self-hosted server's processes (app.tools.server), kept as one
+small JSON file per process in SERVER_STATS_DIR so whichever worker answers
+/health can report on all of them.
+"""
+import glob
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+SERVER_FILE = "server.json"
+WORKER_FILES = "worker-*.json"
+
+
+def worker_file(pid: int) -> str:
+    return f"worker-{pid}.json"
+
+
+def write(directory: str, name: str, stats: Dict[str, Any]) -> None:
+    # Readers never see a half-written file
+    path = os.path.join(directory, name)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(stats, f)
+    os.replace(temporary, path)
+
+
+def remove(directory: str, name: str) -> None:
+    try:
+        os.remove(os.path.join(directory, name))
+    except FileNotFoundError:
+        pass
+
+
+def load(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        # The master removes a worker's file when the worker exits
+        return None
+
+
+def read(directory: str) -> Dict[str, Any]:
+    """
+    The master's stats with a "workers" list of each live worker's, oldest
+    first. "requests" counts those of workers that have since exited too,
+    as of their last report.
+    """
+    now = time.time()
+    summary = load(os.path.join(directory, SERVER_FILE)) or {}
+    workers = []
+    for path in glob.glob(os.path.join(directory, WORKER_FILES)):
+        stats = load(path)
+        if stats is not None:
+            stats["uptime_seconds"] = round(now - stats["started_at"], 1)
+            workers.append(stats)
+    workers.sort(key=lambda stats: stats["started_at"])
+    if "started_at" in summary:
+        summary["uptime_seconds"] = round(now - summary["started_at"], 1)
+    summary["ready_workers"] = sum(1 for stats in workers if stats["ready"] and not stats["draining"])
+    summary["requests"] = summary.pop("exited_requests", 0) + sum(stats["requests"] for stats in workers)
+    summary["workers"] = workers
+    return summary
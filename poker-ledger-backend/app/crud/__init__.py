@@ -1,5 +1,8 @@
 from .crud_user import user
 from .crud_game_session import game_session
+from .crud_idempotency_key import idempotency_key
+from .crud_job import job
+from .crud_player import player
 
 # For easy import
-__all__ = ["user", "game_session"] 
\ No newline at end of file
+__all__ = ["user", "game_session", "idempotency_key", "job", "player"]
\ No newline at end of file
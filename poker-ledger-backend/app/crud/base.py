@@ -1,9 +1,14 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.db.base_class import Base
+from app.db import sync
+from app.db.base_class import Base, ChangeVersioned
+from app.services import response_cache
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -40,21 +45,62 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        """
+        Apply the update with a single UPDATE ... RETURNING and load the
+        returned row back into db_obj, so no refresh SELECT is needed.
+        Unknown fields are ignored.
+
+        For models with a version_id_col the update only applies if the row
+        still has db_obj's version, and bumps it; otherwise it raises
+        StaleDataError, as an ORM flush of a versioned object would.
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        table = self.model.__table__
+        values = {field: value for field, value in update_data.items() if field in table.c}
+        if not values:
+            return db_obj
+        # Resolve before commit, which expires db_obj's attributes
+        id, game_session_id = db_obj.id, response_cache.session_id_of(db_obj)
+        statement = update(table).where(table.c.id == id)
+        version_col = self.model.__mapper__.version_id_col
+        if version_col is not None:
+            statement = statement.where(version_col == getattr(db_obj, version_col.key))
+            values[version_col.key] = version_col + 1
+        if issubclass(self.model, ChangeVersioned):
+            values["change_version"] = sync.next_version(db, sync.owner_of(db, db_obj))
+        row = db.execute(statement.values(**values).returning(*table.c)).one_or_none()
+        if row is None:
+            db.rollback()
+            raise StaleDataError(f"{table.name} row {id} was changed or deleted concurrently")
         db.commit()
-        db.refresh(db_obj)
+        response_cache.invalidate(game_session_id)
+        for key, value in row._mapping.items():
+            set_committed_value(db_obj, key, value)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
+    def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
+        """
+        Delete the row with a single DELETE ... RETURNING and return it as a
+        detached object, or None if it did not exist. Child rows go with it
+        through ON DELETE CASCADE, without being loaded.
+        """
+        table = self.model.__table__
+        if issubclass(self.model, ChangeVersioned):
+            owner_id = sync.owner_of_rows(db, table=table, whereclause=table.c.id == id)
+            if owner_id is not None:
+                sync.record_deletes_where(
+                    db, table=table, whereclause=table.c.id == id, version=sync.next_version(db, owner_id)
+                )
+        # ORM-enabled so an already loaded instance is removed from the session
+        row = db.execute(
+            delete(self.model).where(self.model.id == id).returning(*table.c)
+        ).one_or_none()
         db.commit()
-        return obj 
\ No newline at end of file
+        if row is None:
+            return None
+        obj = self.model(**row._mapping)
+        response_cache.invalidate_object(obj)
+        return obj
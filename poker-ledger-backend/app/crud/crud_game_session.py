@@ -1,5 +1,5 @@
 from typing import List
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.crud.base import CRUDBase
 from app.models.game_session import GameSession
@@ -20,8 +20,14 @@ class CRUDGameSession(CRUDBase[GameSession, GameSessionCreate, GameSessionUpdate
     def get_multi_by_owner(
         self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
     ) -> List[GameSession]:
+        # Sessions are returned with their players and settlements; load them
+        # in two batched queries instead of two lazy loads per session
         return (
             db.query(self.model)
+            .options(
+                selectinload(GameSession.players),
+                selectinload(GameSession.settlements),
+            )
             .filter(GameSession.owner_id == owner_id)
             .offset(skip)
             .limit(limit)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.idempotency_key import IdempotencyKey
+
+
+class CRUDIdempotencyKey(CRUDBase[IdempotencyKey, BaseModel, BaseModel]):
+    def get_live(self, db: Session, *, scope: str, key: str) -> Optional[IdempotencyKey]:
+        """
+        Get the record for a key, ignoring (and evicting) an expired one.
+        """
+        record = (
+            db.query(self.model)
+            .filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+            .first()
+        )
+        if record and record.expires_at <= datetime.utcnow():
+            db.delete(record)
+            db.commit()
+            return None
+        return record
+
+    def claim(
+        self,
+        db: Session,
+        *,
+        scope: str,
+        key: str,
+        method: str,
+        path: str,
+        request_hash: str,
+        lock_timeout: timedelta,
+    ) -> Optional[IdempotencyKey]:
+        """
+        Insert an in-flight record for a key. Returns None if another worker
+        claimed the same key first.
+        """
+        record = IdempotencyKey(
+            scope=scope,
+            key=key,
+            method=method,
+            path=path,
+            request_hash=request_hash,
+            expires_at=datetime.utcnow() + lock_timeout,
+        )
+        db.add(record)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return None
+        db.refresh(record)
+        return record
+
+    def complete(
+        self,
+        db: Session,
+        *,
+        record: IdempotencyKey,
+        status_code: int,
+        content_type: Optional[str],
+        response_body: bytes,
+        ttl: timedelta,
+    ) -> IdempotencyKey:
+        record.status_code = status_code
+        record.content_type = content_type
+        record.response_body = response_body
+        record.expires_at = datetime.utcnow() + ttl
+        db.add(record)
+        db.commit()
+        return record
+
+    def release(self, db: Session, *, record: IdempotencyKey) -> None:
+        """
+        Drop an in-flight claim so the client can retry with the same key.
+        """
+        db.delete(record)
+        db.commit()
+
+    def purge_expired(self, db: Session) -> int:
+        count = (
+            db.query(self.model)
+            .filter(IdempotencyKey.expires_at <= datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return count
+
+
+idempotency_key = CRUDIdempotencyKey(IdempotencyKey)
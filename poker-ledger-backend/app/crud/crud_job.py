@@ -0,0 +1,177 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.job import Job, JobStatus
+
+
+class CRUDJob(CRUDBase[Job, BaseModel, BaseModel]):
+    def create_for_owner(
+        self,
+        db: Session,
+        *,
+        kind: str,
+        payload: dict,
+        owner_id: int,
+        max_attempts: int,
+        delay: timedelta = timedelta(),
+    ) -> Job:
+        db_obj = Job(
+            kind=kind,
+            owner_id=owner_id,
+            payload=json.dumps(payload),
+            max_attempts=max_attempts,
+            run_after=datetime.utcnow() + delay,
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_queued(self, db: Session, *, kind: str, payload: dict, owner_id: int) -> Optional[Job]:
+        """
+        A queued job of the owner's with this kind and payload, if any.
+        """
+        return (
+            db.query(self.model)
+            .filter(
+                Job.owner_id == owner_id,
+                Job.kind == kind,
+                Job.status == JobStatus.QUEUED.value,
+                Job.payload == json.dumps(payload),
+            )
+            .first()
+        )
+
+    def get_multi_by_owner(
+        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Job]:
+        return (
+            db.query(self.model)
+            .filter(Job.owner_id == owner_id)
+            .order_by(Job.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def claim_next(self, db: Session, *, worker_id: str) -> Optional[Job]:
+        """
+        Move the oldest due queued job to running and return it, or None if
+        there is none. The claim is a conditional UPDATE, so two workers
+        racing for the same row cannot both win, on SQLite or Postgres.
+        """
+        while True:
+            now = datetime.utcnow()
+            candidate = (
+                db.query(Job.id)
+                .filter(Job.status == JobStatus.QUEUED.value, Job.run_after <= now)
+                .order_by(Job.run_after, Job.id)
+                .first()
+            )
+            if candidate is None:
+                db.rollback()
+                return None
+            claimed = db.execute(
+                update(Job)
+                .where(Job.id == candidate.id, Job.status == JobStatus.QUEUED.value)
+                .values(
+                    status=JobStatus.RUNNING.value,
+                    locked_by=worker_id,
+                    locked_at=now,
+                    started_at=now,
+                    attempts=Job.attempts + 1,
+                )
+            ).rowcount
+            db.commit()
+            if claimed:
+                return self.get(db, id=candidate.id)
+
+    def heartbeat(
+        self, db: Session, *, job_id: int, progress: float, message: Optional[str]
+    ) -> bool:
+        """
+        Record progress for a running job and return whether cancellation
+        was requested.
+        """
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(progress=progress, progress_message=message, locked_at=datetime.utcnow())
+        )
+        db.commit()
+        return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+
+    def finish(
+        self,
+        db: Session,
+        *,
+        job: Job,
+        status: JobStatus,
+        result: Any = None,
+        error: Optional[str] = None,
+    ) -> Job:
+        job.status = status.value
+        job.result = json.dumps(result) if result is not None else None
+        job.error = error
+        if status == JobStatus.SUCCEEDED:
+            job.progress = 1.0
+        job.locked_by = None
+        job.finished_at = datetime.utcnow()
+        db.add(job)
+        db.commit()
+        return job
+
+    def retry_later(self, db: Session, *, job: Job, error: str, delay: timedelta) -> Job:
+        job.status = JobStatus.QUEUED.value
+        job.error = error
+        job.locked_by = None
+        job.run_after = datetime.utcnow() + delay
+        db.add(job)
+        db.commit()
+        return job
+
+    def request_cancel(self, db: Session, *, job: Job) -> Job:
+        """
+        Cancel a queued job immediately; ask a running one to stop at its
+        next progress report. Finished jobs are left as they are.
+        """
+        # Conditional updates, so a worker claiming the job concurrently
+        # either sees it cancelled or gets the cancel request
+        cancelled = db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == JobStatus.QUEUED.value)
+            .values(status=JobStatus.CANCELLED.value, finished_at=datetime.utcnow())
+        ).rowcount
+        if not cancelled:
+            db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == JobStatus.RUNNING.value)
+                .values(cancel_requested=True)
+            )
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def requeue_stale(self, db: Session, *, stale_after: timedelta) -> int:
+        """
+        Put running jobs whose worker stopped reporting back in the queue,
+        e.g. after a crash or restart mid-job.
+        """
+        count = db.execute(
+            update(Job)
+            .where(
+                Job.status == JobStatus.RUNNING.value,
+                Job.locked_at < datetime.utcnow() - stale_after,
+            )
+            .values(status=JobStatus.QUEUED.value, locked_by=None)
+        ).rowcount
+        db.commit()
+        return count
+
+
+job = CRUDJob(Job)
@@ -0,0 +1,10 @@
+from app.crud.base import CRUDBase
+from app.models.player import Player
+from app.schemas.player import PlayerCreate, PlayerUpdate
+
+
+class CRUDPlayer(CRUDBase[Player, PlayerCreate, PlayerUpdate]):
+    pass
+
+
+player = CRUDPlayer(Player)
@@ -1,6 +1,6 @@
 from typing import Any
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
-from sqlalchemy import Column, Integer, DateTime, func
+from sqlalchemy import BigInteger, Column, Integer, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 
@@ -18,4 +18,15 @@ class Base:
     # Common columns using SQLAlchemy 2.0 style
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now()) 
+
+
+class ChangeVersioned:
+    """
+    Mixin for tables served by the delta-sync endpoint. change_version is
+    set from the owner's sync counter on every insert and update; see
+    app.db.sync.
+    """
+    change_version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0", index=True
+    )
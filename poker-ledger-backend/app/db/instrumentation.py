@@ -0,0 +1,79 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import metrics, profiling
+from app.core.config import settings
+
+logger = logging.getLogger("app.db.slow_query")
+
+
+class RequestStats:
+    """
+    Per-request SQL counters. The metrics middleware puts one in a context
+    variable; the engine hooks below find it from whichever thread runs the
+    query, since Starlette copies the context into its threadpool.
+    """
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    metrics.db_query_duration_seconds.observe(elapsed)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+    profile = profiling.current_profile.get()
+    if profile is not None:
+        profiling.mark_current_thread()
+        profile.record_query(statement, elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        metrics.db_slow_queries_total.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so the connection's next statement is not timed against it
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Time the engine's statements and export its pool gauges labelled with
+    name, so the directory and each shard get their own series.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    def collect_pool_stats() -> None:
+        pool = engine.pool
+        # Only QueuePool reports sizes; SQLite memory/singleton pools do not
+        if hasattr(pool, "checkedout"):
+            labels = (name,)
+            metrics.db_pool_size.set(pool.size(), labels)
+            metrics.db_pool_checked_out.set(pool.checkedout(), labels)
+            metrics.db_pool_overflow.set(max(pool.overflow(), 0), labels)
+
+    metrics.registry.add_collector(collect_pool_stats)
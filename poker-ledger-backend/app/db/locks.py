@@ -0,0 +1,38 @@
+import hashlib
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.advisory_lock import AdvisoryLock
+
+
+def _advisory_key(name: str) -> int:
+    # pg_advisory_xact_lock takes a signed 64-bit key
+    digest = hashlib.sha256(name.encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def acquire_transaction_lock(db: Session, name: str) -> None:
+    """
+    Block until this transaction holds the lock called name. The lock is
+    released when the transaction commits or rolls back, and it is visible to
+    every worker sharing the database.
+
+    Postgres uses a transaction-scoped advisory lock. SQLite upserts a row in
+    advisory_locks, which takes the database write lock; other writers then
+    wait (up to the driver's busy timeout) until this transaction ends.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(_advisory_key(name))))
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(AdvisoryLock).values(name=name)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[AdvisoryLock.name],
+                set_={"updated_at": func.now()},
+            )
+        )
+    else:
+        raise ValueError(f"Transaction locks are not supported on {dialect}")
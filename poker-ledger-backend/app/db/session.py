@@ -1,14 +1,85 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+from typing import Any, Optional
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
-# Support SQLite for development
-if settings.get_database_url.startswith("sqlite"):
-    engine = create_engine(
-        settings.get_database_url, 
-        connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(settings.get_database_url, pool_pre_ping=True)
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+# Guards the lazy setup below: concurrent first requests would otherwise
+# each build an engine (and pool), or register before_flush twice
+_init_lock = threading.RLock()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) 
\ No newline at end of file
+
+def _enable_sqlite_foreign_keys(dbapi_connection: Any, connection_record: Any) -> None:
+    # SQLite ignores foreign keys, including ON DELETE CASCADE, unless this
+    # is set on every connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_database_engine(url: str, name: str = "directory") -> Engine:
+    """
+    An engine for url set up the way the app needs it; shards use this too,
+    with their own name for metrics.
+    """
+    from sqlalchemy import create_engine, event
+
+    # Support SQLite for development
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    else:
+        engine = create_engine(url, pool_pre_ping=True)
+    if settings.METRICS_ENABLED or settings.PROFILING_ENABLED:
+        from app.db.instrumentation import instrument_engine
+
+        instrument_engine(engine, name)
+    return engine
+
+
+def get_engine() -> Engine:
+    """
+    Create the engine on first use rather than at import time, so a cold
+    start does not pay for the DBAPI import and pool setup until a request
+    actually needs the database.
+    """
+    global _engine
+    if _engine is None:
+        with _init_lock:
+            if _engine is None:
+                _engine = create_database_engine(settings.get_database_url)
+    return _engine
+
+
+def SessionLocal(**kwargs: Any) -> Session:
+    global _session_factory
+    if _session_factory is None:
+        with _init_lock:
+            if _session_factory is None:
+                _session_factory = _create_session_factory()
+    return _session_factory(**kwargs)
+
+
+def _create_session_factory() -> sessionmaker:
+    from sqlalchemy import event
+    from app.db import sync
+
+    options: dict = {}
+    if settings.SHARDS:
+        from app.db.sharding import RoutingSession
+
+        # Game tables live on the owner's shard, see app.db.sharding
+        options["class_"] = RoutingSession
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine(), **options)
+    # Stamp synced rows with change versions for the delta-sync endpoint
+    event.listen(session_factory, "before_flush", sync.before_flush)
+    return session_factory
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from app.db.session import engine` working
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,298 @@
+"""
+Owner-partitioned storage.
+
+Every game table hangs off users.id through game_sessions.owner_id and no
+query crosses owners, so an owner's sessions, players, ledger events,
+settlements and sync rows can live in any one of several databases
+(shards). With SHARDS unset there is a single database and none of this is
+used.
+
+- The directory (DATABASE_URL) holds users, jobs, idempotency keys and
+  shard_placements, the shard each owner's data is on.
+- A new owner is placed with a consistent-hash ring over the shards, so
+  adding a shard changes the ring's choice for about 1/N of owners. The
+  placement is recorded, and nobody moves until
+  `python -m app.tools.shards rebalance` copies them over.
+- RoutingSession sends statements on directory tables to the directory and
+  everything else to the shard picked by route(), which the API does as
+  soon as it knows the current user. Game queries before that fail loudly
+  rather than run against the wrong database.
+- route() counts the session in the owner's placement until it is closed,
+  and refuses owners that are being moved, so a move can wait for every
+  session already routed to the source before copying it.
+- Shard n hands out ids from [n * SHARD_ID_SPAN, (n + 1) * SHARD_ID_SPAN),
+  so owners keep their ids when they move between shards.
+
+A session that writes to both the directory and a shard commits them one
+after the other, not atomically. Nothing in the API depends on the two
+agreeing: jobs and idempotency keys only refer to game rows by id.
+"""
+import bisect
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import ColumnElement, Table, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from app.core.config import settings
+
+# Everything else is per owner and lives on the owner's shard
+DIRECTORY_TABLES = frozenset({"users", "jobs", "idempotency_keys", "shard_placements"})
+
+# Rows that move with their owner, parents first; their ids come from the
+# shard's range
+OWNER_TABLES = ["game_sessions", "players", "ledger_events", "settlements", "tombstones"]
+
+
+class OwnerMoving(Exception):
+    """
+    The owner's data is being copied to another shard; retry shortly.
+    """
+
+
+class UnroutedQuery(RuntimeError):
+    """
+    A statement on a per-owner table ran before route() picked a shard.
+    """
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of owner ids onto shards, with vnodes points per
+    shard to even out the share each one gets.
+    """
+
+    def __init__(self, shards: Iterable[str], vnodes: int = 64) -> None:
+        points = sorted((_hash(f"{shard}#{i}"), shard) for shard in shards for i in range(vnodes))
+        if not points:
+            raise ValueError("A hash ring needs at least one shard")
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, owner_id: int) -> str:
+        index = bisect.bisect(self._hashes, _hash(str(owner_id))) % len(self._hashes)
+        return self._shards[index]
+
+
+def parse_shards(spec: str) -> Dict[str, str]:
+    """
+    {"1": url, ...} from "1=url,2=url". Shard names are numbers because
+    they pick the shard's id range.
+    """
+    shards: Dict[str, str] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, separator, url = entry.partition("=")
+        if not separator or not name.strip().isdigit():
+            raise ValueError(f"Shard {entry!r} is not of the form number=url")
+        shards[str(int(name))] = url.strip()
+    return shards
+
+
+class ShardSet:
+    """
+    The configured shards, with an engine per shard created on first use.
+    """
+
+    def __init__(self, urls: Dict[str, str], vnodes: int) -> None:
+        self.urls = urls
+        self.ring = HashRing(urls, vnodes)
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    def engine(self, shard: str) -> Engine:
+        engine = self._engines.get(shard)
+        if engine is None:
+            from app.db.session import create_database_engine
+
+            if shard not in self.urls:
+                raise KeyError(f"Unknown shard {shard!r}; is it still in SHARDS?")
+            with self._lock:
+                engine = self._engines.get(shard) or create_database_engine(
+                    self.urls[shard], name=f"shard-{shard}"
+                )
+                self._engines[shard] = engine
+        return engine
+
+    def id_range(self, shard: str) -> range:
+        start = int(shard) * settings.SHARD_ID_SPAN
+        return range(start, start + settings.SHARD_ID_SPAN)
+
+
+_shards: Optional[ShardSet] = None
+
+
+def get_shards() -> ShardSet:
+    global _shards
+    if _shards is None:
+        _shards = ShardSet(parse_shards(settings.SHARDS), settings.SHARD_VNODES)
+    return _shards
+
+
+def _tables(mapper: Any, clause: Any) -> List[str]:
+    if mapper is not None:
+        return [table.name for table in mapper.tables]
+    if clause is not None:
+        return [table.name for table in find_tables(clause, include_crud=True) if hasattr(table, "name")]
+    return []
+
+
+def owner_rows(table: Table, owner_id: int) -> ColumnElement:
+    """
+    WHERE clause for owner_id's rows in one of OWNER_TABLES.
+    """
+    if "owner_id" in table.c:
+        return table.c.owner_id == owner_id
+    from app.models.game_session import GameSession
+
+    return table.c.game_session_id.in_(select(GameSession.id).where(GameSession.owner_id == owner_id))
+
+
+class RoutingSession(Session):
+    """
+    Session over the directory and one shard: statements that only touch
+    directory tables go to the directory, the rest to the shard set by
+    route(). Statements with no tables (text(), SELECT 1) go to the shard
+    once there is one.
+    """
+
+    shard: Optional[str] = None
+    # The owner whose placement counts this session, until close()
+    owner_id: Optional[int] = None
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            owner_id, self.owner_id, self.shard = self.owner_id, None, None
+            if owner_id is not None:
+                _leave(owner_id)
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        tables = _tables(mapper, clause)
+        if tables and all(name in DIRECTORY_TABLES for name in tables):
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self.shard is not None:
+            return get_shards().engine(self.shard)
+        if not tables:
+            return super().get_bind(mapper, clause=clause, **kw)
+        raise UnroutedQuery(f"Query on {', '.join(tables)} before the session was routed to a shard")
+
+
+def _insert_ignoring_conflicts(engine_or_connection: Any, table: Any, row: dict) -> None:
+    if engine_or_connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    engine_or_connection.execute(insert(table).values(**row).on_conflict_do_nothing())
+
+
+def place_owner(owner_id: int) -> str:
+    """
+    Record the ring's shard for an owner that has no placement yet and
+    return the shard the owner ends up on (another request may have placed
+    it first).
+    """
+    from app import models
+    from app.db.session import get_engine
+
+    shards = get_shards()
+    shard = shards.ring.shard_for(owner_id)
+    directory = get_engine()
+    with directory.connect() as connection:
+        user = connection.execute(
+            select(models.User.__table__).where(models.User.id == owner_id)
+        ).mappings().one()
+    # The shard keeps a stub of the user for game_sessions.owner_id to
+    # reference; logins and profile changes only use the directory's row
+    with shards.engine(shard).begin() as connection:
+        add_user_stub(connection, user)
+    with directory.begin() as connection:
+        _insert_ignoring_conflicts(
+            connection, models.ShardPlacement.__table__, {"owner_id": owner_id, "shard": shard}
+        )
+        return connection.execute(
+            select(models.ShardPlacement.shard).where(models.ShardPlacement.owner_id == owner_id)
+        ).scalar_one()
+
+
+def add_user_stub(connection: Any, user: Any) -> None:
+    from app import models
+
+    _insert_ignoring_conflicts(
+        connection,
+        models.User.__table__,
+        {
+            "id": user["id"],
+            "email": user["email"],
+            "username": user["username"],
+            "hashed_password": "",
+            "is_active": user["is_active"],
+            "is_superuser": user["is_superuser"],
+        },
+    )
+
+
+def _enter(owner_id: int) -> Optional[str]:
+    """
+    Count one more routed session for owner_id and return their shard, or
+    None if they have no placement. Raises OwnerMoving during a move.
+
+    Committed on its own so that a move sees it straight away; the
+    condition on moving_to makes it atomic with a move starting.
+    """
+    from app.db.session import get_engine
+    from app.models.shard_placement import ShardPlacement
+
+    placements = ShardPlacement.__table__
+    with get_engine().begin() as connection:
+        counted = connection.execute(
+            update(placements)
+            .where(placements.c.owner_id == owner_id, placements.c.moving_to.is_(None))
+            .values(routed_sessions=placements.c.routed_sessions + 1)
+        ).rowcount
+        placement = connection.execute(
+            select(placements.c.shard, placements.c.moving_to).where(placements.c.owner_id == owner_id)
+        ).first()
+    if placement is None:
+        return None
+    if not counted:
+        raise OwnerMoving(f"Owner {owner_id} is moving to shard {placement.moving_to}")
+    return placement.shard
+
+
+def _leave(owner_id: int) -> None:
+    from app.db.session import get_engine
+    from app.models.shard_placement import ShardPlacement
+
+    placements = ShardPlacement.__table__
+    with get_engine().begin() as connection:
+        connection.execute(
+            update(placements)
+            .where(placements.c.owner_id == owner_id, placements.c.routed_sessions > 0)
+            .values(routed_sessions=placements.c.routed_sessions - 1)
+        )
+
+
+def route(db: Session, owner_id: int) -> None:
+    """
+    Point db at the shard holding owner_id's data, placing a new owner on
+    the ring's shard, and count db as in flight for the owner until it is
+    closed. No-op without sharding. Raises OwnerMoving while the owner is
+    being moved between shards.
+    """
+    if not isinstance(db, RoutingSession) or db.owner_id == owner_id:
+        return
+    if db.owner_id is not None:
+        raise RuntimeError(f"Session is already routed for owner {db.owner_id}")
+    shard = _enter(owner_id)
+    if shard is None:
+        place_owner(owner_id)
+        shard = _enter(owner_id)
+    db.shard, db.owner_id = shard, owner_id
@@ -0,0 +1,196 @@
+"""
+Change versions for the delta-sync endpoint.
+
+Every write to a synced table (game_sessions, players, settlements) stamps
+the rows it touches with a value from their owner's counter, and deletes
+leave a tombstone with that value. Sync is per owner, so each owner has a
+counter row of their own, bumped with an upsert whose row lock is held
+until the writing transaction ends: an owner's versions become visible in
+commit order, so once a reader sees counter value C, every change to that
+owner's rows with a version <= C is committed and visible. That makes
+"version > cursor and <= C" a gap-free delta. Only writers for the same
+owner wait for each other; a transaction touching several owners bumps
+their counters in owner id order, so two of them cannot deadlock.
+
+ORM flushes are stamped by before_flush; bulk Core statements on synced
+tables must call next_version() and record_deletes() or
+record_deletes_where() themselves.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from sqlalchemy import ColumnElement, Table, case, func, insert, literal, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from app.models.game_session import GameSession
+from app.models.player import Player
+from app.models.settlement import Settlement
+from app.models.sync import SyncCounter, Tombstone
+
+SYNCED_MODELS = (GameSession, Player, Settlement)
+
+
+def _dialect_insert(db: Union[Session, Connection]) -> Any:
+    bind = db.get_bind(SyncCounter.__mapper__) if isinstance(db, Session) else db
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert
+
+
+def next_version(db: Union[Session, Connection], owner_id: int, *, at_least: int = 0) -> int:
+    """
+    Bump owner_id's counter and return the new value, which is above
+    at_least too. The counter row stays locked until the transaction ends.
+    """
+    counters = SyncCounter.__table__
+    statement = _dialect_insert(db)(counters).values(owner_id=owner_id, value=at_least + 1)
+    bumped = counters.c.value + 1
+    return db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[counters.c.owner_id],
+            set_={
+                "value": case(
+                    (bumped < statement.excluded.value, statement.excluded.value), else_=bumped
+                )
+            },
+        ).returning(counters.c.value)
+    ).scalar_one()
+
+
+def current_version(db: Session, owner_id: int) -> int:
+    return db.query(SyncCounter.value).filter(SyncCounter.owner_id == owner_id).scalar() or 0
+
+
+def highest_version(db: Session) -> int:
+    """
+    The highest value any owner's counter has reached.
+    """
+    return db.query(func.max(SyncCounter.value)).scalar() or 0
+
+
+def record_deletes(
+    db: Session, *, table_name: str, row_ids: Iterable[int], owner_id: int, version: int
+) -> None:
+    rows = [
+        {"table_name": table_name, "row_id": row_id, "owner_id": owner_id, "change_version": version}
+        for row_id in row_ids
+    ]
+    if rows:
+        db.execute(insert(Tombstone), rows)
+
+
+def _owner_column(table: Table) -> ColumnElement:
+    if "owner_id" in table.c:
+        return table.c.owner_id
+    sessions = GameSession.__table__
+    return (
+        select(sessions.c.owner_id)
+        .where(sessions.c.id == table.c.game_session_id)
+        .scalar_subquery()
+    )
+
+
+def record_deletes_where(db: Session, *, table: Table, whereclause: ColumnElement, version: int) -> None:
+    """
+    Tombstone the rows of table matching whereclause, and the synced rows
+    that ON DELETE CASCADE will remove with them, with one INSERT ... SELECT
+    per table. Call it before the DELETE, while the rows still exist.
+    """
+    columns = ["table_name", "row_id", "owner_id", "change_version"]
+    pending = [(table, whereclause)]
+    while pending:
+        table, whereclause = pending.pop()
+        db.execute(
+            insert(Tombstone).from_select(
+                columns,
+                select(
+                    literal(table.name), table.c.id, _owner_column(table), literal(version)
+                ).where(whereclause),
+            )
+        )
+        for model in SYNCED_MODELS:
+            for fk in model.__table__.foreign_keys:
+                if fk.column.table is table and fk.ondelete == "CASCADE":
+                    pending.append((model.__table__, fk.parent.in_(select(table.c.id).where(whereclause))))
+
+
+def owner_of_rows(db: Session, *, table: Table, whereclause: ColumnElement) -> Optional[int]:
+    """
+    The owner of the synced rows of table matching whereclause, or None if
+    there are none; for Core writes that need a version before they run.
+    """
+    return db.execute(select(_owner_column(table)).where(whereclause).limit(1)).scalar()
+
+
+def owner_of(db: Session, obj: Any) -> int:
+    """
+    The owner of one synced ORM object.
+    """
+    return next(iter(group_by_owner(db, [obj])))
+
+
+def group_by_owner(session: Session, objs: Iterable[Any]) -> Dict[int, List[Any]]:
+    """
+    Synced ORM objects by owner id. Players and settlements are resolved
+    through their loaded game session where there is one, and with a
+    single query otherwise.
+    """
+    owners: Dict[int, List[Any]] = defaultdict(list)
+    unresolved: Dict[Any, List[Any]] = defaultdict(list)
+    for obj in objs:
+        if isinstance(obj, GameSession):
+            owners[obj.owner_id].append(obj)
+            continue
+        parent = obj.__dict__.get("game_session") or session.identity_map.get(
+            identity_key(GameSession, obj.game_session_id)
+        )
+        if parent is not None:
+            owners[parent.owner_id].append(obj)
+        else:
+            unresolved[obj.game_session_id].append(obj)
+    if unresolved:
+        sessions = GameSession.__table__
+        for game_session_id, owner_id in session.execute(
+            select(sessions.c.id, sessions.c.owner_id).where(sessions.c.id.in_(list(unresolved)))
+        ):
+            owners[owner_id].extend(unresolved.pop(game_session_id))
+    if unresolved:
+        raise ValueError(f"Synced rows refer to missing game sessions {sorted(unresolved, key=str)}")
+    return owners
+
+
+def before_flush(session: Session, flush_context: Any, instances: Any) -> None:
+    changed = [
+        obj
+        for obj in session.new
+        if isinstance(obj, SYNCED_MODELS)
+    ] + [
+        obj
+        for obj in session.dirty
+        if isinstance(obj, SYNCED_MODELS) and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, SYNCED_MODELS)]
+    if not changed and not deleted:
+        return
+
+    changed_by_owner = group_by_owner(session, changed)
+    deleted_by_owner = group_by_owner(session, deleted)
+    # Owner id order, see the module docstring
+    for owner_id in sorted(changed_by_owner.keys() | deleted_by_owner.keys()):
+        version = next_version(session, owner_id)
+        for obj in changed_by_owner.get(owner_id, []):
+            obj.change_version = version
+
+        # Children whose session is deleted too are covered by its cascade
+        owner_deleted = deleted_by_owner.get(owner_id, [])
+        deleted_ids: Dict[Table, List[int]] = defaultdict(list)
+        session_ids = {obj.id for obj in owner_deleted if isinstance(obj, GameSession)}
+        for obj in owner_deleted:
+            if getattr(obj, "game_session_id", None) not in session_ids:
+                deleted_ids[obj.__table__].append(obj.id)
+        for table, row_ids in deleted_ids.items():
+            record_deletes_where(session, table=table, whereclause=table.c.id.in_(row_ids), version=version)
@@ -1,8 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.core import metrics
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -15,6 +20,12 @@ origins = [
     "http://localhost:3000",  # for local dev
 ]
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Added before CORS so replayed responses still get CORS headers
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,  # no wildcards
@@ -23,9 +34,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the latency it records covers every other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.on_event("startup")
+def start_job_workers():
+    if settings.JOBS_WORKERS > 0:
+        from app.services import jobs
+
+        jobs.pool.start()
+
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    if settings.JOBS_WORKERS > 0:
+        from app.services import jobs
+
+        jobs.pool.stop()
+
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Poker Ledger API"}
@@ -33,4 +64,19 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "environment": settings.ENVIRONMENT}
+    health = {"status": "healthy", "environment": settings.ENVIRONMENT}
+    if settings.SERVER_STATS_DIR:
+        # Running under app.tools.server: report all of its workers
+        from app.core import server_stats
+
+        health["server"] = server_stats.read(settings.SERVER_STATS_DIR)
+    return health
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
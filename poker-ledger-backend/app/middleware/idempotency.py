@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import crud
+from app.core import security
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+HEADER_NAME = b"idempotency-key"
+# Login answers with a bearer token, which must neither sit in
+# idempotency_keys nor be replayed after it expires
+UNSTORED_PATH_PREFIX = f"{settings.API_V1_STR}/auth/"
+
+
+class _KeyLocks:
+    """
+    Per-key asyncio locks so concurrent duplicates within this worker wait for
+    the first request instead of running the endpoint again.
+    """
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    def acquire(self, name: str) -> asyncio.Lock:
+        lock, waiters = self._locks.get(name, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[name] = (lock, waiters + 1)
+        return lock
+
+    def release(self, name: str) -> None:
+        lock, waiters = self._locks[name]
+        if waiters <= 1:
+            del self._locks[name]
+        else:
+            self._locks[name] = (lock, waiters - 1)
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response when a mutating request is retried with the
+    same Idempotency-Key header.
+
+    The first request for a key claims a row in idempotency_keys, runs the
+    endpoint and stores the status and body. Retries with the same key and
+    payload get that response back without touching the endpoint; a retry
+    with a different payload is rejected with 422. A duplicate that arrives
+    while the original is still running on another worker gets a 409.
+    Server errors are not stored so the client can retry them.
+
+    Keys belong to the user the bearer token names, so a retry with a
+    refreshed token still replays; requests without a valid token share
+    keys per method and path. /auth/ requests are passed through untouched.
+    Expired keys are purged by the job workers
+    (see app.services.jobs), not here.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._locks = _KeyLocks()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in MUTATING_METHODS
+            or scope["path"].startswith(UNSTORED_PATH_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(HEADER_NAME)
+        if not key:
+            await self.app(scope, receive, send)
+            return
+
+        key = key.decode("latin-1")
+        if len(key) > 255:
+            await _send_json(send, 400, {"detail": "Idempotency-Key is too long"})
+            return
+
+        body = await _read_body(receive)
+        key_scope = _key_scope(headers, scope["method"], scope["path"])
+        request_hash = hashlib.sha256(
+            b"\n".join(
+                [
+                    scope["method"].encode(),
+                    scope["path"].encode(),
+                    scope.get("query_string", b""),
+                    body,
+                ]
+            )
+        ).hexdigest()
+
+        lock_name = f"{key_scope}:{key}"
+        lock = self._locks.acquire(lock_name)
+        try:
+            async with lock:
+                await self._handle(
+                    scope, receive, send, body, key_scope, key, request_hash
+                )
+        finally:
+            self._locks.release(lock_name)
+
+    async def _handle(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        body: bytes,
+        key_scope: str,
+        key: str,
+        request_hash: str,
+    ) -> None:
+        record = await run_in_threadpool(
+            _get_or_claim, key_scope, key, scope["method"], scope["path"], request_hash
+        )
+        if record is None:
+            await _send_json(
+                send, 409, {"detail": "A request with this Idempotency-Key is in progress"}
+            )
+            return
+        if record.request_hash != request_hash:
+            await _send_json(
+                send, 422, {"detail": "Idempotency-Key was reused with a different request"}
+            )
+            return
+        if record.status_code is not None:
+            await _replay(send, record)
+            return
+
+        try:
+            status_code, content_type, chunks = await self._run(scope, body, receive, send)
+        except BaseException:
+            await run_in_threadpool(_release, record)
+            raise
+        if status_code is not None and status_code < 500:
+            await run_in_threadpool(
+                _complete, record, status_code, content_type, b"".join(chunks)
+            )
+        else:
+            await run_in_threadpool(_release, record)
+
+    async def _run(
+        self, scope: Scope, body: bytes, receive: Receive, send: Send
+    ) -> Tuple[Optional[int], Optional[str], List[bytes]]:
+        """
+        Run the downstream app with the buffered body, capturing the response
+        while forwarding it to the client.
+        """
+        status_code: Optional[int] = None
+        content_type: Optional[str] = None
+        chunks: List[bytes] = []
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                # Only a disconnect can follow the body we already drained
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+        return status_code, content_type, chunks
+
+
+
+def _key_scope(headers: Dict[bytes, bytes], method: str, path: str) -> str:
+    """
+    "user:<id>" from a valid bearer token, else "anon:" and a hash of the
+    method and path.
+    """
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        from jose import JWTError
+
+        try:
+            subject = security.decode_access_token(token).get("sub")
+        except JWTError:
+            subject = None
+        if subject is not None:
+            return f"user:{subject}"
+    return "anon:" + hashlib.sha256(f"{method} {path}".encode()).hexdigest()[:32]
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send_json(send: Send, status_code: int, content: dict) -> None:
+    body = json.dumps(content).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send: Send, record: IdempotencyKey) -> None:
+    body = record.response_body or b""
+    headers = [
+        (b"content-length", str(len(body)).encode()),
+        (b"idempotent-replayed", b"true"),
+    ]
+    if record.content_type:
+        headers.append((b"content-type", record.content_type.encode("latin-1")))
+    await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _get_or_claim(
+    key_scope: str, key: str, method: str, path: str, request_hash: str
+) -> Optional[IdempotencyKey]:
+    db = SessionLocal()
+    try:
+        record = crud.idempotency_key.get_live(db, scope=key_scope, key=key)
+        if record is None:
+            record = crud.idempotency_key.claim(
+                db,
+                scope=key_scope,
+                key=key,
+                method=method,
+                path=path,
+                request_hash=request_hash,
+                lock_timeout=timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS),
+            )
+            if record is None:
+                return None
+        elif record.status_code is None and record.request_hash == request_hash:
+            # Still running on another worker
+            return None
+        db.expunge(record)
+        return record
+    finally:
+        db.close()
+
+
+def _complete(record: IdempotencyKey, status_code: int, content_type: Optional[str], body: bytes) -> None:
+    db = SessionLocal()
+    try:
+        record = db.merge(record)
+        crud.idempotency_key.complete(
+            db,
+            record=record,
+            status_code=status_code,
+            content_type=content_type,
+            response_body=body,
+            ttl=timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        )
+    finally:
+        db.close()
+
+
+def _release(record: IdempotencyKey) -> None:
+    db = SessionLocal()
+    try:
+        crud.idempotency_key.release(db, record=db.merge(record))
+    finally:
+        db.close()
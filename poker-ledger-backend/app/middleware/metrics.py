@@ -0,0 +1,50 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.db.instrumentation import RequestStats, current_request_stats
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and SQL statement counts for every HTTP request,
+    labelled by the matched route template (e.g. /api/v1/game-sessions/{id})
+    so path parameters do not blow up label cardinality.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.http_requests_in_flight.dec()
+            current_request_stats.reset(token)
+            # The router stores the matched route in the scope it was given
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            metrics.http_requests_total.inc((method, route_path, str(status_code)))
+            metrics.http_request_duration_seconds.observe(elapsed, (method, route_path))
+            metrics.db_queries_per_request.observe(stats.queries, (route_path,))
+            if stats.queries:
+                metrics.db_queries_total.inc((route_path,), stats.queries)
@@ -0,0 +1,79 @@
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api import deps
+from app.core import profiling
+from app.db.session import SessionLocal
+
+HEADER_NAME = b"x-profile"
+
+
+def _wants_profile(scope: Scope) -> bool:
+    headers = dict(scope["headers"])
+    if headers.get(HEADER_NAME, b"").lower() in (b"1", b"true"):
+        return True
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [""])[0].lower() in ("1", "true")
+
+
+def _is_superuser(scope: Scope) -> bool:
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    db = SessionLocal()
+    try:
+        deps.get_current_active_superuser(deps.get_user_from_token(db, token))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when it carries an X-Profile: 1 header or ?profile=1
+    and the bearer token belongs to a superuser. Other requests pass through
+    untouched. The profile id is returned in an X-Profile-Id header and the
+    result can be downloaded from /api/v1/admin/profiles/{id}.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not _wants_profile(scope)
+            or not await run_in_threadpool(_is_superuser, scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiling.Profile(scope["method"], scope["path"])
+        token = profiling.current_profile.set(profile)
+        profiling.mark_current_thread()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-profile-id", str(profile.id).encode())
+                ]
+            await send(message)
+
+        profiling.sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiling.sampler.stop(profile)
+            profiling.current_profile.reset(token)
+            profile.finish(status_code)
+            profiling.store.add(profile)
@@ -2,6 +2,13 @@ from .user import User
 from .game_session import GameSession
 from .player import Player, EntryMode
 from .settlement import Settlement
+from .idempotency_key import IdempotencyKey
+from .advisory_lock import AdvisoryLock
+from .job import Job, JobStatus
+from .ledger_event import LedgerEvent, LedgerEventKind
+from .sync import SyncCounter, Tombstone
+from .shard_placement import ShardPlacement
+from . import search  # noqa: F401  (full-text index DDL, no model)
 
 # For easy import
-__all__ = ["User", "GameSession", "Player", "Settlement", "EntryMode"] 
\ No newline at end of file
+__all__ = ["User", "GameSession", "Player", "Settlement", "EntryMode", "IdempotencyKey", "AdvisoryLock", "Job", "JobStatus", "LedgerEvent", "LedgerEventKind", "SyncCounter", "Tombstone", "ShardPlacement"] 
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class AdvisoryLock(Base):
+    """
+    One row per named lock. Used on SQLite, which has no advisory locks:
+    writing the row takes the database write lock until the transaction ends.
+    """
+    __tablename__ = "advisory_locks"
+    
+    name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
@@ -1,20 +1,33 @@
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from typing import List
 from datetime import datetime
-from app.db.base_class import Base
+from app.db.base_class import Base, ChangeVersioned
 
 
-class GameSession(Base):
+class GameSession(ChangeVersioned, Base):
     __tablename__ = "game_sessions"
+    # Owner listings and analytics filter by owner and order by date.
+    # AUTOINCREMENT keeps SQLite from reusing a deleted row's id, which
+    # delta sync and shard id ranges (app.db.sharding) rely on
+    __table_args__ = (
+        Index("ix_game_sessions_owner_id_game_date", "owner_id", "game_date"),
+        {"sqlite_autoincrement": True},
+    )
     
     title: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
     game_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     is_settled: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Bumped on every update; an update based on an older version fails
+    # instead of overwriting, see app.crud.base.CRUDBase.update
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     # Relationships
     owner: Mapped["User"] = relationship("User", back_populates="game_sessions")
-    players: Mapped[List["Player"]] = relationship("Player", back_populates="game_session", cascade="all, delete-orphan")
-    settlements: Mapped[List["Settlement"]] = relationship("Settlement", back_populates="game_session", cascade="all, delete-orphan") 
\ No newline at end of file
+    # Children are removed by the foreign keys' ON DELETE CASCADE rather
+    # than loaded and deleted one by one
+    players: Mapped[List["Player"]] = relationship("Player", back_populates="game_session", cascade="all, delete-orphan", passive_deletes=True)
+    settlements: Mapped[List["Settlement"]] = relationship("Settlement", back_populates="game_session", cascade="all, delete-orphan", passive_deletes=True) 
\ No newline at end of file
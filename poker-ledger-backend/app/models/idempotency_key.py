@@ -0,0 +1,22 @@
+from sqlalchemy import String, Integer, DateTime, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.db.base_class import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),)
+    
+    # "user:<id>" so keys never collide across users, or "anon:<hash>" of
+    # the method and path for requests without a token
+    scope: Mapped[str] = mapped_column(String(64), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    method: Mapped[str] = mapped_column(String(10), nullable=False)
+    path: Mapped[str] = mapped_column(String, nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Null while the original request is still in flight
+    status_code: Mapped[int | None] = mapped_column(Integer)
+    content_type: Mapped[str | None] = mapped_column(String)
+    response_body: Mapped[bytes | None] = mapped_column(LargeBinary)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
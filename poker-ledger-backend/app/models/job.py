@@ -0,0 +1,39 @@
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Text, Float, Boolean, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.db.base_class import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    # Workers poll for the oldest due job in a status
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+    
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default=JobStatus.QUEUED.value)
+    # JSON-encoded handler arguments and return value
+    payload: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    result: Mapped[str | None] = mapped_column(Text)
+    error: Mapped[str | None] = mapped_column(Text)
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    progress_message: Mapped[str | None] = mapped_column(String)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Not picked up before this time; pushed back by retry backoff
+    run_after: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Worker that holds the job while running, and when it claimed it
+    locked_by: Mapped[str | None] = mapped_column(String(64))
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -0,0 +1,46 @@
+from sqlalchemy import String, Integer, ForeignKey, Float, Boolean, Index, text
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from app.db.base_class import Base
+import enum
+
+
+class LedgerEventKind(str, enum.Enum):
+    BUY_IN = "buy-in"
+    REBUY = "rebuy"
+    ADD_ON = "add-on"
+    CASH_OUT = "cash-out"
+
+
+# Kinds that add to a player's buy_in; everything else adds to cash_out
+BUY_IN_KINDS = {LedgerEventKind.BUY_IN.value, LedgerEventKind.REBUY.value, LedgerEventKind.ADD_ON.value}
+
+
+class LedgerEvent(Base):
+    """
+    One chip movement for a player. Rows are only ever inserted; compaction
+    folds them into the player's buy_in/cash_out snapshot and flips
+    `compacted`, nothing else is updated.
+    """
+    __tablename__ = "ledger_events"
+    # Compaction looks up uncompacted events by session; a partial index
+    # stays as small as the backlog
+    __table_args__ = (
+        Index(
+            "ix_ledger_events_pending",
+            "game_session_id",
+            sqlite_where=text("NOT compacted"),
+            postgresql_where=text("NOT compacted"),
+        ),
+        # Ids are never reused, see GameSession
+        {"sqlite_autoincrement": True},
+    )
+    
+    player_id: Mapped[int] = mapped_column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Denormalized from the player so compaction can work per session
+    game_session_id: Mapped[int] = mapped_column(Integer, ForeignKey("game_sessions.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    amount: Mapped[float] = mapped_column(Float, nullable=False)
+    compacted: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    
+    # Relationships
+    player: Mapped["Player"] = relationship("Player", back_populates="ledger_events")
@@ -1,6 +1,7 @@
 from sqlalchemy import String, Integer, ForeignKey, Float, Enum
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from app.db.base_class import Base
+from typing import List
+from app.db.base_class import Base, ChangeVersioned
 import enum
 
 
@@ -9,17 +10,32 @@ class EntryMode(str, enum.Enum):
     PNL = "pnl"
 
 
-class Player(Base):
+class Player(ChangeVersioned, Base):
     __tablename__ = "players"
+    # Ids are never reused, see GameSession
+    __table_args__ = {"sqlite_autoincrement": True}
     
     name: Mapped[str] = mapped_column(String, nullable=False)
+    # Snapshot of the player's ledger events; see app.services.ledger
     buy_in: Mapped[float] = mapped_column(Float, default=0.0)
     cash_out: Mapped[float] = mapped_column(Float, default=0.0)
     entry_mode: Mapped[EntryMode] = mapped_column(Enum(EntryMode), default=EntryMode.BUYIN_CASHOUT)
-    game_session_id: Mapped[int] = mapped_column(Integer, ForeignKey("game_sessions.id"), nullable=False)
+    game_session_id: Mapped[int] = mapped_column(Integer, ForeignKey("game_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Bumped on every ORM update, which fails if the row's version changed
+    # since it was loaded. Ledger compaction does not bump it.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     # Relationships
     game_session: Mapped["GameSession"] = relationship("GameSession", back_populates="players")
+    ledger_events: Mapped[List["LedgerEvent"]] = relationship(
+        "LedgerEvent",
+        back_populates="player",
+        cascade="all, delete-orphan",
+        order_by="LedgerEvent.id",
+        # Deleted in bulk with their player or session, not loaded row by row
+        passive_deletes=True,
+    )
     
     @property
     def net_result(self) -> float:
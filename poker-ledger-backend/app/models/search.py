@@ -0,0 +1,198 @@
+"""
+Full-text index over game sessions: title, description and player names.
+
+There is no ORM model; the index is a table maintained by triggers, so
+every write path (ORM, bulk Core statements, cascades) keeps it current.
+On SQLite it is an FTS5 virtual table keyed by the session's rowid; on
+Postgres a tsvector per session with a GIN index, titles weighted over
+descriptions over player names. Both carry the session's owner_id so a
+search is limited to one owner inside the index lookup rather than after
+it. app.services.search queries both.
+"""
+from typing import Dict, List
+
+from sqlalchemy import DDL, event
+
+from app.models.player import Player
+
+SEARCH_TABLE = "game_session_search"
+
+_SQLITE_PLAYER_NAMES = (
+    "coalesce((SELECT group_concat(name, ' ') FROM players WHERE game_session_id = {session_id}), '')"
+)
+
+# The index itself, and functions the triggers call
+SCHEMA: Dict[str, List[str]] = {
+    "sqlite": [
+        f"""
+        CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+            title, description, players, owner_id UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        """,
+    ],
+    "postgresql": [
+        # GIN operator classes for integers, for the composite index below
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        f"""
+        CREATE TABLE {SEARCH_TABLE} (
+            game_session_id INTEGER PRIMARY KEY REFERENCES game_sessions (id) ON DELETE CASCADE,
+            owner_id INTEGER NOT NULL,
+            document TSVECTOR NOT NULL
+        )
+        """,
+        f"CREATE INDEX ix_{SEARCH_TABLE}_owner_document ON {SEARCH_TABLE} USING GIN (owner_id, document)",
+        # Titles and descriptions are stemmed; names are matched as written
+        f"""
+        CREATE FUNCTION refresh_game_session_search(session_id INTEGER) RETURNS void AS $$
+        BEGIN
+            INSERT INTO {SEARCH_TABLE} (game_session_id, owner_id, document)
+            SELECT gs.id,
+                   gs.owner_id,
+                   setweight(to_tsvector('english', gs.title), 'A')
+                   || setweight(to_tsvector('english', coalesce(gs.description, '')), 'B')
+                   || setweight(to_tsvector('simple', coalesce(
+                          (SELECT string_agg(p.name, ' ') FROM players p WHERE p.game_session_id = gs.id), ''
+                      )), 'C')
+            FROM game_sessions gs
+            WHERE gs.id = session_id
+            ON CONFLICT (game_session_id) DO UPDATE
+                SET owner_id = EXCLUDED.owner_id, document = EXCLUDED.document;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE FUNCTION game_sessions_search_trigger() RETURNS trigger AS $$
+        BEGIN
+            PERFORM refresh_game_session_search(NEW.id);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE FUNCTION players_search_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                PERFORM refresh_game_session_search(OLD.game_session_id);
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                PERFORM refresh_game_session_search(NEW.game_session_id);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+    ],
+}
+
+# What keeps the index current; bulk loads may drop and recreate these
+# around their inserts and BACKFILL afterwards
+TRIGGERS: Dict[str, List[str]] = {
+    "sqlite": [
+        f"""
+        CREATE TRIGGER game_sessions_search_insert AFTER INSERT ON game_sessions BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, title, description, players, owner_id)
+            VALUES (
+                NEW.id, NEW.title, coalesce(NEW.description, ''),
+                {_SQLITE_PLAYER_NAMES.format(session_id="NEW.id")}, NEW.owner_id
+            );
+        END
+        """,
+        f"""
+        CREATE TRIGGER game_sessions_search_update AFTER UPDATE OF title, description, owner_id ON game_sessions BEGIN
+            UPDATE {SEARCH_TABLE}
+            SET title = NEW.title, description = coalesce(NEW.description, ''), owner_id = NEW.owner_id
+            WHERE rowid = NEW.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER game_sessions_search_delete AFTER DELETE ON game_sessions BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER players_search_insert AFTER INSERT ON players BEGIN
+            UPDATE {SEARCH_TABLE} SET players = {_SQLITE_PLAYER_NAMES.format(session_id="NEW.game_session_id")}
+            WHERE rowid = NEW.game_session_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER players_search_update AFTER UPDATE OF name, game_session_id ON players BEGIN
+            UPDATE {SEARCH_TABLE} SET players = {_SQLITE_PLAYER_NAMES.format(session_id="OLD.game_session_id")}
+            WHERE rowid = OLD.game_session_id;
+            UPDATE {SEARCH_TABLE} SET players = {_SQLITE_PLAYER_NAMES.format(session_id="NEW.game_session_id")}
+            WHERE rowid = NEW.game_session_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER players_search_delete AFTER DELETE ON players BEGIN
+            UPDATE {SEARCH_TABLE} SET players = {_SQLITE_PLAYER_NAMES.format(session_id="OLD.game_session_id")}
+            WHERE rowid = OLD.game_session_id;
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        CREATE TRIGGER game_sessions_search AFTER INSERT OR UPDATE OF title, description, owner_id ON game_sessions
+        FOR EACH ROW EXECUTE FUNCTION game_sessions_search_trigger()
+        """,
+        # A deleted session's row goes with it through the foreign key
+        """
+        CREATE TRIGGER players_search AFTER INSERT OR UPDATE OF name, game_session_id OR DELETE ON players
+        FOR EACH ROW EXECUTE FUNCTION players_search_trigger()
+        """,
+    ],
+}
+
+CREATE: Dict[str, List[str]] = {dialect: SCHEMA[dialect] + TRIGGERS[dialect] for dialect in SCHEMA}
+
+# Index rows for sessions that have none: every session when the index is
+# new, sessions bulk loaded while the triggers were dropped
+BACKFILL: Dict[str, str] = {
+    "sqlite": f"""
+        INSERT INTO {SEARCH_TABLE} (rowid, title, description, players, owner_id)
+        SELECT id, title, coalesce(description, ''), {_SQLITE_PLAYER_NAMES.format(session_id="game_sessions.id")}, owner_id
+        FROM game_sessions
+        WHERE id NOT IN (SELECT rowid FROM {SEARCH_TABLE})
+    """,
+    "postgresql": f"""
+        SELECT refresh_game_session_search(id) FROM game_sessions
+        WHERE id NOT IN (SELECT game_session_id FROM {SEARCH_TABLE})
+    """,
+}
+
+DROP_TRIGGERS: Dict[str, List[str]] = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS players_search_delete",
+        "DROP TRIGGER IF EXISTS players_search_update",
+        "DROP TRIGGER IF EXISTS players_search_insert",
+        "DROP TRIGGER IF EXISTS game_sessions_search_delete",
+        "DROP TRIGGER IF EXISTS game_sessions_search_update",
+        "DROP TRIGGER IF EXISTS game_sessions_search_insert",
+    ],
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS players_search ON players",
+        "DROP TRIGGER IF EXISTS game_sessions_search ON game_sessions",
+    ],
+}
+
+DROP: Dict[str, List[str]] = {
+    "sqlite": DROP_TRIGGERS["sqlite"] + [f"DROP TABLE IF EXISTS {SEARCH_TABLE}"],
+    "postgresql": DROP_TRIGGERS["postgresql"] + [
+        "DROP FUNCTION IF EXISTS players_search_trigger()",
+        "DROP FUNCTION IF EXISTS game_sessions_search_trigger()",
+        "DROP FUNCTION IF EXISTS refresh_game_session_search(INTEGER)",
+        f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+    ],
+}
+
+
+# create_all() (development, tools) builds the index once both indexed
+# tables exist, and drop_all() removes it with them; the migration does the
+# same for migrated databases
+for _dialect, _statements in CREATE.items():
+    for _statement in _statements:
+        event.listen(Player.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+for _dialect, _statements in DROP.items():
+    for _statement in _statements:
+        event.listen(Player.__table__, "before_drop", DDL(_statement).execute_if(dialect=_dialect))
@@ -1,15 +1,17 @@
 from sqlalchemy import String, Integer, ForeignKey, Float
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from app.db.base_class import Base
+from app.db.base_class import Base, ChangeVersioned
 
 
-class Settlement(Base):
+class Settlement(ChangeVersioned, Base):
     __tablename__ = "settlements"
+    # Ids are never reused, see GameSession
+    __table_args__ = {"sqlite_autoincrement": True}
     
     from_player: Mapped[str] = mapped_column(String, nullable=False)
     to_player: Mapped[str] = mapped_column(String, nullable=False)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
-    game_session_id: Mapped[int] = mapped_column(Integer, ForeignKey("game_sessions.id"), nullable=False)
+    game_session_id: Mapped[int] = mapped_column(Integer, ForeignKey("game_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Relationships
     game_session: Mapped["GameSession"] = relationship("GameSession", back_populates="settlements") 
\ No newline at end of file
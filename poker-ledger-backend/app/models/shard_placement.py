@@ -0,0 +1,22 @@
+from sqlalchemy import String, Integer, ForeignKey, Boolean, false
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class ShardPlacement(Base):
+    """
+    Which shard holds an owner's game data; see app.db.sharding. Lives in
+    the directory database with the users.
+    """
+    __tablename__ = "shard_placements"
+    
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    shard: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Set while app.tools.shards copies the owner to another shard; their
+    # requests get a 503 until the copy is done
+    moving_to: Mapped[str | None] = mapped_column(String(32))
+    # Sessions routed to the owner's shard and not yet closed; a move waits
+    # for them to finish
+    routed_sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Placed by hand with `shards move`; rebalancing leaves it alone
+    pinned: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
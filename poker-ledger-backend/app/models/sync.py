@@ -0,0 +1,34 @@
+from sqlalchemy import String, Integer, BigInteger, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class SyncCounter(Base):
+    """
+    Last change_version handed out for one owner's rows. Bumping it takes a
+    row lock held until commit, so an owner's versions become visible in
+    order; writers for other owners never wait on it.
+    """
+    __tablename__ = "sync_counters"
+    
+    # next_version() upserts on it; the row is created by the owner's first write
+    owner_id: Mapped[int] = mapped_column(Integer, nullable=False, unique=True, index=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class Tombstone(Base):
+    """
+    Record of a deleted synced row, so clients can drop their copy.
+    """
+    __tablename__ = "tombstones"
+    # Ids are never reused, see GameSession
+    __table_args__ = (
+        Index("ix_tombstones_owner_id_change_version", "owner_id", "change_version"),
+        {"sqlite_autoincrement": True},
+    )
+    
+    table_name: Mapped[str] = mapped_column(String(32), nullable=False)
+    row_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Deleted rows cannot be joined back to their owner, so keep it here
+    owner_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    change_version: Mapped[int] = mapped_column(BigInteger, nullable=False)
@@ -1,14 +1,25 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
 from .game_session import GameSession, GameSessionCreate, GameSessionUpdate
 from .player import Player, PlayerCreate, PlayerUpdate
-from .settlement import Settlement, SettlementCreate
+from .settlement import Settlement, SettlementCreate, SettlementMethod, SettlementOptions, PlayerPair, EdgeCost, PlayerOverride, SettlementPreviewRequest, PlayerNet, SettlementPreview
 from .token import Token, TokenPayload
+from .job import Job, JobCreate
+from .ledger_event import LedgerEvent, LedgerEventCreate
+from .sync import SyncChanges, SyncDeleted
+from .analytics import Transfer, HeadToHead, PnlPoint, PlayerPnl, PnlSeries
+from .search import GameSessionSearchHit, GameSessionSearchResults
 
 # For easy import
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserInDB",
     "GameSession", "GameSessionCreate", "GameSessionUpdate",
     "Player", "PlayerCreate", "PlayerUpdate",
-    "Settlement", "SettlementCreate",
-    "Token", "TokenPayload"
+    "Settlement", "SettlementCreate", "SettlementMethod", "SettlementOptions", "PlayerPair", "EdgeCost",
+    "PlayerOverride", "SettlementPreviewRequest", "PlayerNet", "SettlementPreview",
+    "Token", "TokenPayload",
+    "Job", "JobCreate",
+    "LedgerEvent", "LedgerEventCreate",
+    "SyncChanges", "SyncDeleted",
+    "Transfer", "HeadToHead", "PnlPoint", "PlayerPnl", "PnlSeries",
+    "GameSessionSearchHit", "GameSessionSearchResults"
 ] 
\ No newline at end of file
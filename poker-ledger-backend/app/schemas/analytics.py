@@ -0,0 +1,36 @@
+from typing import List
+from datetime import datetime
+from pydantic import BaseModel
+
+
+# Total paid by one player to another across settled sessions
+class Transfer(BaseModel):
+    from_player: str
+    to_player: str
+    amount: float
+    sessions: int
+
+
+class HeadToHead(BaseModel):
+    transfers: List[Transfer] = []
+
+
+# One player's result in one settled session
+class PnlPoint(BaseModel):
+    game_session_id: int
+    game_date: datetime
+    net_result: float
+    cumulative: float
+    rolling: float
+
+
+class PlayerPnl(BaseModel):
+    name: str
+    sessions: int
+    total: float
+    points: List[PnlPoint] = []
+
+
+class PnlSeries(BaseModel):
+    window: int
+    players: List[PlayerPnl] = []
@@ -24,12 +24,15 @@ class GameSessionUpdate(BaseModel):
     description: Optional[str] = None
     game_date: Optional[datetime] = None
     is_settled: Optional[bool] = None
+    # The version being edited; may also be sent as an If-Match header
+    version: Optional[int] = None
 
 
 # Properties shared by models stored in DB
 class GameSessionInDBBase(GameSessionBase):
     id: int
     owner_id: int
+    version: int
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -0,0 +1,36 @@
+import json
+from typing import Any, Optional
+from datetime import datetime
+from pydantic import BaseModel, field_validator
+
+
+# Properties to receive on submission
+class JobCreate(BaseModel):
+    kind: str
+    payload: dict = {}
+
+
+# Job status as polled by the client; the result is served separately
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    payload: Any
+    progress: float
+    progress_message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    error: Optional[str] = None
+    created_at: datetime
+    run_after: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_validator("payload", mode="before")
+    @classmethod
+    def decode_payload(cls, v: Any) -> Any:
+        return json.loads(v) if isinstance(v, str) else v
+
+    class Config:
+        from_attributes = True
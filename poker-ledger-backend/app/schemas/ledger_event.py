@@ -0,0 +1,22 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from app.models.ledger_event import LedgerEventKind
+
+
+# Properties to receive on creation
+class LedgerEventCreate(BaseModel):
+    kind: LedgerEventKind
+    amount: float = Field(gt=0)
+
+
+# Properties to return to client
+class LedgerEvent(BaseModel):
+    id: int
+    player_id: int
+    game_session_id: int
+    kind: LedgerEventKind
+    amount: float
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -22,12 +22,15 @@ class PlayerUpdate(BaseModel):
     buy_in: Optional[float] = None
     cash_out: Optional[float] = None
     entry_mode: Optional[EntryMode] = None
+    # The version being edited; may also be sent as an If-Match header
+    version: Optional[int] = None
 
 
 # Properties shared by models stored in DB
 class PlayerInDBBase(PlayerBase):
     id: int
     game_session_id: int
+    version: int
     
     class Config:
         from_attributes = True
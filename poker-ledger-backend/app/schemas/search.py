@@ -0,0 +1,15 @@
+from typing import List
+from pydantic import BaseModel
+from app.schemas.game_session import GameSessionInDB
+
+
+class GameSessionSearchHit(BaseModel):
+    game_session: GameSessionInDB
+    # Relevance; only meaningful for ordering within one search
+    score: float
+
+
+# One page of matches, best first, and how many there are in total
+class GameSessionSearchResults(BaseModel):
+    total: int
+    items: List[GameSessionSearchHit]
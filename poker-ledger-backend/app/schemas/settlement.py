@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+import enum
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, model_validator
 
 
 # Shared properties
@@ -29,4 +31,80 @@ class Settlement(SettlementInDBBase):
 
 # Properties stored in DB
 class SettlementInDB(SettlementInDBBase):
-    pass 
\ No newline at end of file
+    pass
+
+
+class SettlementMethod(str, enum.Enum):
+    # Biggest losers pay biggest winners; no constraints
+    GREEDY = "greedy"
+    # Min-cost flow honoring the constraints below; see app.services.settlement_flow
+    MIN_COST_FLOW = "min-cost-flow"
+
+
+# A payer and payee by player name
+class PlayerPair(BaseModel):
+    from_player: str
+    to_player: str
+
+
+class EdgeCost(PlayerPair):
+    # Cost per unit transferred between the pair; the default is 1
+    cost: float = Field(ge=0)
+
+
+# Options for calculating settlements; constraints need min-cost-flow
+class SettlementOptions(BaseModel):
+    method: SettlementMethod = SettlementMethod.GREEDY
+    allowed_pairs: Optional[List[PlayerPair]] = None
+    forbidden_pairs: List[PlayerPair] = []
+    max_transfers: Dict[str, int] = {}
+    edge_costs: List[EdgeCost] = []
+    # Player (or a name for a virtual party) who relays payments and
+    # absorbs what does not balance
+    bank: Optional[str] = None
+
+    @model_validator(mode="after")
+    def constraints_need_flow(self) -> "SettlementOptions":
+        constrained = (
+            self.allowed_pairs is not None
+            or self.forbidden_pairs
+            or self.max_transfers
+            or self.edge_costs
+            or self.bank is not None
+        )
+        if constrained and self.method != SettlementMethod.MIN_COST_FLOW:
+            raise ValueError("Settlement constraints require method 'min-cost-flow'")
+        if any(cap < 0 for cap in self.max_transfers.values()):
+            raise ValueError("max_transfers must not be negative")
+        return self
+
+
+# A hypothetical change for a settlement preview: an existing player by id,
+# or an extra player by name
+class PlayerOverride(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    buy_in: Optional[float] = None
+    cash_out: Optional[float] = None
+
+    @model_validator(mode="after")
+    def id_or_name(self) -> "PlayerOverride":
+        if self.id is None and self.name is None:
+            raise ValueError("An override needs the id of a player or the name of a new one")
+        return self
+
+
+class SettlementPreviewRequest(BaseModel):
+    players: List[PlayerOverride] = []
+    options: Optional[SettlementOptions] = None
+
+
+class PlayerNet(BaseModel):
+    name: str
+    net_result: float
+
+
+# Transfers that would settle the session; nothing is stored
+class SettlementPreview(BaseModel):
+    players: List[PlayerNet]
+    settlements: List[SettlementBase]
@@ -0,0 +1,23 @@
+from typing import List
+from pydantic import BaseModel
+from app.schemas.game_session import GameSessionInDB
+from app.schemas.player import Player
+from app.schemas.settlement import Settlement
+
+
+# Ids of rows deleted since the cursor. Ids can be reused, so clients apply
+# these before the changed rows of the same response
+class SyncDeleted(BaseModel):
+    game_sessions: List[int] = []
+    players: List[int] = []
+    settlements: List[int] = []
+
+
+# Rows changed since the cursor; pass `cursor` as `since` on the next call
+class SyncChanges(BaseModel):
+    cursor: int
+    full: bool
+    game_sessions: List[GameSessionInDB] = []
+    players: List[Player] = []
+    settlements: List[Settlement] = []
+    deleted: SyncDeleted = SyncDeleted()
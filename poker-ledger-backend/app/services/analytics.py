@@ -0,0 +1,139 @@
+"""
+Per-owner analytics over settled game sessions.
+
+Aggregation runs in SQL: pairwise transfer totals are a GROUP BY over
+settlements, and P&L series use window functions partitioned by player
+name, so the database returns one row per result instead of every session.
+Serialized results are cached per owner under the owner's data version (see
+response_cache.data_version), which every write that can change a settled
+session's players or settlements moves on.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.core.config import settings
+from app.services import ledger
+from app.services.response_cache import BACKENDS, ResponseCache
+
+cache = ResponseCache(BACKENDS[settings.RESPONSE_CACHE_BACKEND](), namespace="analytics")
+
+
+def invalidate_owner(owner_id: Optional[int]) -> None:
+    if owner_id is not None:
+        cache.invalidate(owner_id)
+
+
+def _settled_sessions(owner_id: int, start: Optional[datetime], end: Optional[datetime]) -> list:
+    conditions = [
+        models.GameSession.owner_id == owner_id,
+        models.GameSession.is_settled.is_(True),
+    ]
+    if start is not None:
+        conditions.append(models.GameSession.game_date >= start)
+    if end is not None:
+        conditions.append(models.GameSession.game_date < end)
+    return conditions
+
+
+def head_to_head(
+    db: Session,
+    *,
+    owner_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    player: Optional[str] = None,
+) -> schemas.HeadToHead:
+    """
+    Total paid from each player to each other player, largest first.
+    """
+    Settlement = models.Settlement
+    amount = func.sum(Settlement.amount).label("amount")
+    stmt = (
+        select(
+            Settlement.from_player,
+            Settlement.to_player,
+            amount,
+            func.count(func.distinct(Settlement.game_session_id)).label("sessions"),
+        )
+        .join(models.GameSession, models.GameSession.id == Settlement.game_session_id)
+        .where(*_settled_sessions(owner_id, start, end))
+        .group_by(Settlement.from_player, Settlement.to_player)
+        .order_by(amount.desc(), Settlement.from_player, Settlement.to_player)
+    )
+    if player is not None:
+        stmt = stmt.where(or_(Settlement.from_player == player, Settlement.to_player == player))
+    return schemas.HeadToHead(
+        transfers=[
+            schemas.Transfer(
+                from_player=row.from_player,
+                to_player=row.to_player,
+                amount=round(row.amount, 2),
+                sessions=row.sessions,
+            )
+            for row in db.execute(stmt)
+        ]
+    )
+
+
+def pnl_series(
+    db: Session,
+    *,
+    owner_id: int,
+    window: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    player: Optional[str] = None,
+) -> schemas.PnlSeries:
+    """
+    Each player's net result per settled session with a running total and a
+    rolling sum over their last `window` sessions. Totals start at `start`.
+    """
+    Player, GameSession = models.Player, models.GameSession
+    # Totals include ledger events not compacted yet
+    pending = ledger.pending_sums(owner_id=owner_id)
+    net = (Player.cash_out + func.coalesce(pending.c.cash_out, 0.0)) - (
+        Player.buy_in + func.coalesce(pending.c.buy_in, 0.0)
+    )
+    ordering = (GameSession.game_date, GameSession.id)
+    stmt = (
+        select(
+            Player.name,
+            GameSession.id.label("game_session_id"),
+            GameSession.game_date,
+            net.label("net_result"),
+            func.sum(net)
+            .over(partition_by=Player.name, order_by=ordering, rows=(None, 0))
+            .label("cumulative"),
+            func.sum(net)
+            .over(partition_by=Player.name, order_by=ordering, rows=(-(window - 1), 0))
+            .label("rolling"),
+        )
+        .join(GameSession, GameSession.id == Player.game_session_id)
+        .outerjoin(pending, pending.c.player_id == Player.id)
+        .where(*_settled_sessions(owner_id, start, end))
+        .order_by(Player.name, *ordering)
+    )
+    if player is not None:
+        stmt = stmt.where(Player.name == player)
+
+    players: List[schemas.PlayerPnl] = []
+    for row in db.execute(stmt):
+        if not players or players[-1].name != row.name:
+            players.append(schemas.PlayerPnl(name=row.name, sessions=0, total=0.0))
+        series = players[-1]
+        series.points.append(
+            schemas.PnlPoint(
+                game_session_id=row.game_session_id,
+                game_date=row.game_date,
+                net_result=round(row.net_result, 2),
+                cumulative=round(row.cumulative, 2),
+                rolling=round(row.rolling, 2),
+            )
+        )
+        series.sessions += 1
+        series.total = round(row.cumulative, 2)
+    return schemas.PnlSeries(window=window, players=players)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+# Event types published on a game session channel
+PLAYER_UPSERTED = "player.upserted"
+PLAYER_DELETED = "player.deleted"
+SESSION_UPDATED = "session.updated"
+SESSION_DELETED = "session.deleted"
+SETTLEMENT_RECOMPUTED = "settlement.recomputed"
+LEDGER_EVENT_APPENDED = "ledger.appended"
+# Sent to a subscriber that fell behind and lost events; it should re-fetch
+RESYNC = "resync"
+
+
+class BrokerBackend:
+    """
+    Transport used by the broker to fan messages out to subscribers.
+
+    A backend only moves opaque strings between channels; serialization and
+    delivery into asyncio queues is handled by EventBroker.
+    """
+
+    def publish(self, channel: str, message: str) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> Callable[[], None]:
+        """
+        Register callback for channel and return a function that unsubscribes it.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBackend(BrokerBackend):
+    """
+    Process-local backend. Only subscribers connected to the same worker
+    receive events, which is what local development and tests need.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._channels: Dict[str, Set[Callable[[str], None]]] = {}
+
+    def publish(self, channel: str, message: str) -> None:
+        with self._lock:
+            callbacks = list(self._channels.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> Callable[[], None]:
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                callbacks = self._channels.get(channel)
+                if callbacks is None:
+                    return
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._channels[channel]
+
+        return unsubscribe
+
+
+BACKENDS: Dict[str, Callable[[], BrokerBackend]] = {
+    "memory": InMemoryBackend,
+}
+
+
+class Subscription:
+    """
+    An asyncio-side view of a channel. Messages published from any thread are
+    handed to the subscriber's event loop and buffered in a bounded queue.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int) -> None:
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    def _offer(self, message: str) -> None:
+        # Runs on the subscriber's loop. A slow client loses its backlog and is
+        # told to re-fetch instead of holding unbounded memory.
+        if self._queue.full():
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            message = json.dumps({"type": RESYNC})
+        self._queue.put_nowait(message)
+
+    def _deliver(self, message: str) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._offer, message)
+        except RuntimeError:
+            # The subscriber's loop is already closed
+            pass
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Wait for the next message, returning None if timeout expires first.
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+
+class EventBroker:
+    def __init__(self, backend: BrokerBackend) -> None:
+        self.backend = backend
+
+    @staticmethod
+    def channel_for_session(game_session_id: int) -> str:
+        return f"game-session:{game_session_id}"
+
+    def publish(self, game_session_id: int, event_type: str, data: Any = None) -> None:
+        message = json.dumps(
+            {
+                "type": event_type,
+                "game_session_id": game_session_id,
+                "data": jsonable_encoder(data),
+            },
+            separators=(",", ":"),
+        )
+        self.backend.publish(self.channel_for_session(game_session_id), message)
+
+    def subscribe(self, game_session_id: int) -> Subscription:
+        """
+        Subscribe to a session channel. Must be called from a running event loop.
+        """
+        subscription = Subscription(
+            asyncio.get_running_loop(), max_queue=settings.EVENTS_MAX_QUEUE
+        )
+        subscription._unsubscribe = self.backend.subscribe(
+            self.channel_for_session(game_session_id), subscription._deliver
+        )
+        return subscription
+
+
+broker = EventBroker(BACKENDS[settings.EVENTS_BACKEND]())
+
+
+def set_backend(backend: BrokerBackend) -> None:
+    """
+    Swap the broker transport, e.g. for a local stand-in in tests.
+    """
+    broker.backend = backend
+
+
+def publish(game_session_id: int, event_type: str, data: Any = None) -> None:
+    broker.publish(game_session_id, event_type, data)
@@ -0,0 +1,117 @@
+"""
+Built-in job kinds. Each handler runs in a worker thread with its own
+session and reports progress between units of work, which is also where a
+cancellation takes effect.
+"""
+from typing import Any, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+
+from app import models, schemas
+from app.services import events, ledger
+from app.services.jobs import JobContext, PermanentJobError, handler
+from app.services.settlement_service import calculate_settlements_for_session, match_settlements
+
+# Sessions serialized per progress report in an export
+EXPORT_BATCH_SIZE = 50
+
+
+def _owned_session_ids(
+    db: Session, owner_id: int, requested: Optional[List[int]], settled_only: bool = False
+) -> List[int]:
+    query = db.query(models.GameSession.id).filter(models.GameSession.owner_id == owner_id)
+    if settled_only:
+        query = query.filter(models.GameSession.is_settled.is_(True))
+    if requested is not None:
+        query = query.filter(models.GameSession.id.in_(requested))
+    ids = [row.id for row in query.order_by(models.GameSession.id)]
+    if requested is not None and len(ids) != len(set(requested)):
+        raise PermanentJobError("Some game sessions were not found")
+    return ids
+
+
+@handler("recalculate-settlements")
+def recalculate_settlements(ctx: JobContext, db: Session, payload: dict) -> Any:
+    """
+    Recalculate settlements for the given game_session_ids, or for every
+    session the owner has.
+    """
+    ids = _owned_session_ids(db, ctx.owner_id, payload.get("game_session_ids"))
+    for done, game_session_id in enumerate(ids):
+        ctx.progress(done / len(ids), f"Settling session {done + 1} of {len(ids)}")
+        game_session = calculate_settlements_for_session(db=db, game_session_id=game_session_id)
+        events.publish(
+            game_session_id,
+            events.SETTLEMENT_RECOMPUTED,
+            [schemas.Settlement.model_validate(s) for s in game_session.settlements],
+        )
+    return {"game_session_ids": ids}
+
+
+@handler("export-sessions")
+def export_sessions(ctx: JobContext, db: Session, payload: dict) -> Any:
+    """
+    Full sessions with players and settlements, in the shape returned by
+    GET /game-sessions/{id}.
+    """
+    ids = _owned_session_ids(db, ctx.owner_id, payload.get("game_session_ids"))
+    ledger.compact(db, game_session_ids=ids)
+    exported = []
+    for start in range(0, len(ids), EXPORT_BATCH_SIZE):
+        ctx.progress(start / len(ids), f"Exported {start} of {len(ids)} sessions")
+        batch = (
+            db.query(models.GameSession)
+            .options(
+                selectinload(models.GameSession.players),
+                selectinload(models.GameSession.settlements),
+            )
+            .filter(models.GameSession.id.in_(ids[start:start + EXPORT_BATCH_SIZE]))
+            .order_by(models.GameSession.id)
+            .all()
+        )
+        exported.extend(jsonable_encoder(schemas.GameSession.model_validate(s)) for s in batch)
+        db.expunge_all()
+    return {"game_sessions": exported}
+
+
+@handler("net-sessions")
+def net_sessions(ctx: JobContext, db: Session, payload: dict) -> Any:
+    """
+    One set of transfers that settles several sessions at once: each
+    player's results are summed across the sessions (given, or all settled
+    ones) and matched as if they were a single session.
+    """
+    ids = _owned_session_ids(
+        db, ctx.owner_id, payload.get("game_session_ids"), settled_only=payload.get("game_session_ids") is None
+    )
+    ledger.compact(db, game_session_ids=ids)
+    ctx.progress(0.0, f"Netting {len(ids)} sessions")
+    net = func.sum(models.Player.cash_out - models.Player.buy_in)
+    rows = (
+        db.query(models.Player.name, net.label("net_result"))
+        .filter(models.Player.game_session_id.in_(ids))
+        .group_by(models.Player.name)
+        .order_by(models.Player.name)
+        .all()
+    )
+    players = [{"name": row.name, "net_result": round(row.net_result, 2)} for row in rows]
+    return {
+        "game_session_ids": ids,
+        "players": players,
+        "settlements": match_settlements(players),
+    }
+
+
+@handler("compact-ledger")
+def compact_ledger(ctx: JobContext, db: Session, payload: dict) -> Any:
+    """
+    Fold pending ledger events into player totals for all of the owner's
+    sessions, or the given game_session_ids.
+    """
+    requested = payload.get("game_session_ids")
+    if requested is None:
+        return {"compacted": ledger.compact(db, owner_id=ctx.owner_id)}
+    ids = _owned_session_ids(db, ctx.owner_id, requested)
+    return {"compacted": ledger.compact(db, game_session_ids=ids)}
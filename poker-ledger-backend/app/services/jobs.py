@@ -0,0 +1,271 @@
+"""
+In-process background jobs backed by the jobs table.
+
+The API inserts a queued row and returns; a pool of worker threads claims
+due rows, runs the registered handler for the job's kind and stores its
+result. The table is the queue, so it works the same on SQLite and
+Postgres, survives restarts (running jobs whose worker went quiet are
+requeued) and can be drained by a separate process (app.tools.jobworker)
+where the web process cannot keep threads alive. Each pool also runs the
+periodic upkeep no request should pay for, such as purging expired
+idempotency keys.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db import sharding
+from app.db.session import SessionLocal
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """
+    Raised from JobContext.progress() when the job was asked to stop.
+    """
+
+
+class PermanentJobError(Exception):
+    """
+    A failure that retrying cannot fix, e.g. invalid payload. The job fails
+    without further attempts.
+    """
+
+
+class JobContext:
+    def __init__(self, job: Job) -> None:
+        self.job_id = job.id
+        self.owner_id = job.owner_id
+        self.attempt = job.attempts
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        """
+        Report progress (0..1) and stop the job if it was cancelled. Uses its
+        own session, so call it between the handler's transactions.
+        """
+        db = SessionLocal()
+        try:
+            cancel_requested = crud.job.heartbeat(
+                db, job_id=self.job_id, progress=min(max(fraction, 0.0), 1.0), message=message
+            )
+        finally:
+            db.close()
+        if cancel_requested:
+            raise JobCancelled()
+
+
+Handler = Callable[[JobContext, Session, dict], Any]
+
+HANDLERS: Dict[str, Handler] = {}
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """
+    Register a function as the handler for a job kind. It receives the job
+    context, a database session and the decoded payload, and returns a
+    JSON-serializable result.
+    """
+
+    def register(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+def retry_delay(attempt: int) -> timedelta:
+    """
+    Exponential backoff: base, 2x base, 4x base, ... after attempts 1, 2, 3.
+    """
+    return timedelta(seconds=settings.JOBS_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+
+def run_job(job: Job, db: Session) -> None:
+    """
+    Run a claimed job to completion and record the outcome.
+    """
+    fn = HANDLERS.get(job.kind)
+    if fn is None:
+        crud.job.finish(db, job=job, status=JobStatus.FAILED, error=f"Unknown job kind {job.kind!r}")
+        return
+    if job.attempts > job.max_attempts:
+        # Requeued after its worker died on the last attempt
+        crud.job.finish(db, job=job, status=JobStatus.FAILED, error=job.error or "Out of attempts")
+        return
+
+    try:
+        sharding.route(db, job.owner_id)
+    except sharding.OwnerMoving as e:
+        # Not the job's failure: give the claimed attempt back
+        job.attempts -= 1
+        crud.job.retry_later(db, job=job, error=str(e), delay=retry_delay(1))
+        return
+
+    context = JobContext(job)
+    try:
+        result = fn(context, db, json.loads(job.payload))
+    except JobCancelled:
+        db.rollback()
+        crud.job.finish(db, job=job, status=JobStatus.CANCELLED)
+    except PermanentJobError as e:
+        db.rollback()
+        crud.job.finish(db, job=job, status=JobStatus.FAILED, error=str(e))
+    except Exception:
+        db.rollback()
+        error = traceback.format_exc(limit=5)
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+        if job.attempts < job.max_attempts:
+            crud.job.retry_later(db, job=job, error=error, delay=retry_delay(job.attempts))
+        else:
+            crud.job.finish(db, job=job, status=JobStatus.FAILED, error=error)
+    else:
+        crud.job.finish(db, job=job, status=JobStatus.SUCCEEDED, result=result)
+
+
+class WorkerPool:
+    def __init__(self, workers: int, poll_interval: float) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{self._prefix}:{index}",), name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._housekeep, name="job-housekeeping", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop polling and wait for running jobs to finish, up to timeout.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self) -> None:
+        """
+        Skip the poll wait, e.g. right after a job was submitted.
+        """
+        self._wakeup.set()
+
+    def requeue_stale(self) -> int:
+        db = SessionLocal()
+        try:
+            return crud.job.requeue_stale(
+                db, stale_after=timedelta(seconds=settings.JOBS_STALE_AFTER_SECONDS)
+            )
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired idempotency keys; lookups already ignore them, this
+        keeps the table small.
+        """
+        db = SessionLocal()
+        try:
+            return crud.idempotency_key.purge_expired(db)
+        finally:
+            db.close()
+
+    def run_once(self, worker_id: str) -> bool:
+        """
+        Claim and run one due job. Returns False if the queue was empty.
+        """
+        db = SessionLocal()
+        try:
+            job = crud.job.claim_next(db, worker_id=worker_id)
+            if job is None:
+                return False
+            run_job(job, db)
+            return True
+        finally:
+            db.close()
+
+    def _housekeep(self) -> None:
+        # Runs for as long as the pool does, so a job whose worker died is
+        # picked up again without waiting for a restart
+        while True:
+            try:
+                self.requeue_stale()
+            except Exception:
+                logger.exception("Requeueing stale jobs failed")
+            try:
+                self.purge_expired()
+            except Exception:
+                logger.exception("Purging expired idempotency keys failed")
+            if self._stop.wait(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS):
+                return
+
+    def _run(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = self.run_once(worker_id)
+            except Exception:
+                logger.exception("Job worker %s failed to poll", worker_id)
+                ran = False
+            if not ran:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+pool = WorkerPool(settings.JOBS_WORKERS, settings.JOBS_POLL_INTERVAL_SECONDS)
+
+
+def submit(db: Session, *, kind: str, payload: dict, owner_id: int) -> Job:
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    job = crud.job.create_for_owner(
+        db, kind=kind, payload=payload, owner_id=owner_id, max_attempts=settings.JOBS_MAX_ATTEMPTS
+    )
+    pool.wake()
+    return job
+
+
+def schedule(db: Session, *, kind: str, payload: dict, owner_id: int, delay: timedelta) -> Job:
+    """
+    Submit a job that runs after delay, unless the same one is already
+    queued: a burst of writes that each need e.g. compaction share one run.
+    Two concurrent calls may both submit, which costs a redundant run.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    queued = crud.job.get_queued(db, kind=kind, payload=payload, owner_id=owner_id)
+    if queued is not None:
+        return queued
+    return crud.job.create_for_owner(
+        db,
+        kind=kind,
+        payload=payload,
+        owner_id=owner_id,
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        delay=delay,
+    )
+
+
+# Register the built-in handlers
+from app.services import job_handlers  # noqa: E402,F401
@@ -0,0 +1,238 @@
+"""
+Append-only chip ledger per player.
+
+Buy-ins, rebuys, add-ons and cash-outs are inserted as LedgerEvent rows;
+appending never touches the player row, so concurrent appends do not
+contend or overwrite each other. Player.buy_in and Player.cash_out are a
+snapshot: compaction adds the amounts of uncompacted events to it and marks
+those events compacted in the same transaction. Reads never compact: they
+add the pending events to the snapshot (pending_totals, pending_sums), and
+each append schedules a compact-ledger job that folds them in the
+background. Writers that replace the totals compact first.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Subquery, bindparam, case, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.db import sync
+from app.models.ledger_event import BUY_IN_KINDS, LedgerEventKind
+
+
+def _pending_filter(game_session_ids: Optional[Iterable[int]], owner_id: Optional[int]) -> list:
+    conditions = [models.LedgerEvent.compacted.is_(False)]
+    if game_session_ids is not None:
+        conditions.append(models.LedgerEvent.game_session_id.in_(list(game_session_ids)))
+    if owner_id is not None:
+        conditions.append(
+            models.LedgerEvent.game_session_id.in_(
+                select(models.GameSession.id).where(models.GameSession.owner_id == owner_id)
+            )
+        )
+    return conditions
+
+
+def pending_sums(
+    game_session_ids: Optional[Iterable[int]] = None, owner_id: Optional[int] = None
+) -> Subquery:
+    """
+    Per-player sums of uncompacted events as (player_id, buy_in, cash_out),
+    to outer-join onto players in a query; players without pending events
+    get NULLs.
+    """
+    events = models.LedgerEvent
+    return (
+        select(
+            events.player_id,
+            func.sum(case((events.kind.in_(list(BUY_IN_KINDS)), events.amount), else_=0.0)).label("buy_in"),
+            func.sum(
+                case((events.kind == LedgerEventKind.CASH_OUT.value, events.amount), else_=0.0)
+            ).label("cash_out"),
+        )
+        .where(*_pending_filter(game_session_ids, owner_id))
+        .group_by(events.player_id)
+        .subquery("pending_events")
+    )
+
+
+def pending_totals(
+    db: Session,
+    *,
+    game_session_ids: Optional[Iterable[int]] = None,
+    owner_id: Optional[int] = None,
+) -> Dict[int, Tuple[float, float]]:
+    """
+    (buy_in, cash_out) of each player's uncompacted events, for players
+    that have any, from one query.
+    """
+    if game_session_ids is not None:
+        game_session_ids = list(game_session_ids)
+        if not game_session_ids:
+            return {}
+    pending = pending_sums(game_session_ids, owner_id)
+    return {
+        player_id: (buy_in, cash_out)
+        for player_id, buy_in, cash_out in db.execute(select(pending))
+    }
+
+
+def include_pending(
+    players: Iterable[schemas.Player], pending: Dict[int, Tuple[float, float]]
+) -> None:
+    """
+    Add pending_totals() to serialized players. Only the response models
+    are changed, so nothing is flushed back to the database.
+    """
+    for player in players:
+        if player.id in pending:
+            buy_in, cash_out = pending[player.id]
+            player.buy_in += buy_in
+            player.cash_out += cash_out
+            player.net_result = player.cash_out - player.buy_in
+
+
+def append(db: Session, *, player: models.Player, kind: LedgerEventKind, amount: float) -> models.LedgerEvent:
+    event = models.LedgerEvent(
+        player_id=player.id,
+        game_session_id=player.game_session_id,
+        kind=kind.value,
+        amount=amount,
+        compacted=False,
+    )
+    db.add(event)
+    db.commit()
+    db.refresh(event)
+    return event
+
+
+def compact(
+    db: Session,
+    *,
+    game_session_ids: Optional[Iterable[int]] = None,
+    owner_id: Optional[int] = None,
+) -> int:
+    """
+    Fold uncompacted events into player snapshots, limited to some sessions
+    or to one owner's sessions, and return how many events were folded.
+
+    Marking events compacted with UPDATE ... RETURNING makes concurrent
+    compactions safe: each event is claimed by exactly one of them, and
+    events whose insert has not committed yet are left for the next run.
+    """
+    if game_session_ids is not None:
+        game_session_ids = list(game_session_ids)
+        if not game_session_ids:
+            return 0
+    conditions = _pending_filter(game_session_ids, owner_id)
+    if not db.query(exists().where(*conditions)).scalar():
+        return 0
+
+    # Core statements on the tables, so the ORM does not try to sync loaded
+    # objects; the commit below expires them anyway
+    events = models.LedgerEvent.__table__
+    folded = db.execute(
+        update(events)
+        .where(*conditions)
+        .values(compacted=True)
+        .returning(events.c.game_session_id, events.c.player_id, events.c.kind, events.c.amount)
+    ).all()
+    deltas: Dict[int, List[float]] = defaultdict(lambda: [0.0, 0.0])
+    player_sessions: Dict[int, int] = {}
+    for game_session_id, player_id, kind, amount in folded:
+        deltas[player_id][0 if kind in BUY_IN_KINDS else 1] += amount
+        player_sessions[player_id] = game_session_id
+    if deltas:
+        # Each owner's players get a version from that owner's counter
+        owners = dict(
+            db.execute(
+                select(models.GameSession.id, models.GameSession.owner_id).where(
+                    models.GameSession.id.in_(set(player_sessions.values()))
+                )
+            ).all()
+        )
+        versions = {
+            owner_id: sync.next_version(db, owner_id) for owner_id in sorted(set(owners.values()))
+        }
+        players = models.Player.__table__
+        db.execute(
+            update(players)
+            .where(players.c.id == bindparam("player_id"))
+            .values(
+                buy_in=players.c.buy_in + bindparam("buy_in_delta"),
+                cash_out=players.c.cash_out + bindparam("cash_out_delta"),
+                change_version=bindparam("change_version_value"),
+            ),
+            [
+                {
+                    "player_id": player_id,
+                    "buy_in_delta": buy_in,
+                    "cash_out_delta": cash_out,
+                    "change_version_value": versions[owners[player_sessions[player_id]]],
+                }
+                for player_id, (buy_in, cash_out) in deltas.items()
+            ],
+        )
+    db.commit()
+    return len(folded)
+
+
+def current_totals(db: Session, *, game_session_id: int) -> list:
+    """
+    (id, name, buy_in, cash_out) rows for a session's players, including
+    events not compacted yet, from one query and without writing; for
+    readers that must not compact.
+    """
+    events = models.LedgerEvent
+
+    def pending(kinds: Iterable[str]):
+        return func.coalesce(
+            func.sum(case((events.kind.in_(list(kinds)), events.amount), else_=0.0)), 0.0
+        )
+
+    return (
+        db.query(
+            models.Player.id,
+            models.Player.name,
+            (models.Player.buy_in + pending(BUY_IN_KINDS)).label("buy_in"),
+            (models.Player.cash_out + pending([LedgerEventKind.CASH_OUT.value])).label("cash_out"),
+        )
+        .outerjoin(events, (events.player_id == models.Player.id) & events.compacted.is_(False))
+        .filter(models.Player.game_session_id == game_session_id)
+        .group_by(models.Player.id, models.Player.name, models.Player.buy_in, models.Player.cash_out)
+        .order_by(models.Player.id)
+        .all()
+    )
+
+
+def set_totals(
+    db: Session,
+    *,
+    player: models.Player,
+    buy_in: Optional[float] = None,
+    cash_out: Optional[float] = None,
+) -> None:
+    """
+    Move a player's totals to absolute values, as PUT /players and player
+    creation do, recording the differences as already-compacted events so
+    the history still adds up to the snapshot. Compact the player's session
+    before calling this so the snapshot is current. Does not commit.
+    """
+    for kind, column, target in (
+        (LedgerEventKind.BUY_IN, "buy_in", buy_in),
+        (LedgerEventKind.CASH_OUT, "cash_out", cash_out),
+    ):
+        current = getattr(player, column) or 0.0
+        if target is None or target == current:
+            continue
+        db.add(
+            models.LedgerEvent(
+                player=player,
+                game_session_id=player.game_session_id,
+                kind=kind.value,
+                amount=target - current,
+                compacted=True,
+            )
+        )
+        setattr(player, column, target)
@@ -0,0 +1,217 @@
+"""
+Cache of serialized GET /game-sessions/{id} responses for settled sessions.
+
+A settled session is effectively immutable, so its JSON body is stored once
+and served as raw bytes on later reads, skipping the player and settlement
+loads and Pydantic serialization. Entries are keyed by session id and
+data_version(), which every write to the session, its players, settlements
+or ledger changes. The version is read from the database, so a write on any
+worker makes the entries of every worker stale. Write paths still call
+invalidate() for the session they touched, which frees the stale entries
+early on the worker that served the write.
+
+ResponseCache is also used, under its own namespace, for per-owner
+analytics (see app.services.analytics).
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.game_session import GameSession
+from app.models.ledger_event import LedgerEvent
+from app.models.sync import SyncCounter
+
+
+class CacheBackend:
+    """
+    Byte store used by ResponseCache. Keys are strings; a backend decides
+    its own eviction policy.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete every key starting with prefix and return how many were removed.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """
+    Process-local LRU bounded by both entry count and total value size. The
+    least recently used entries are evicted until both limits hold; a value
+    larger than max_bytes on its own is not stored.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = value
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                metrics.response_cache_evictions_total.inc()
+        metrics.response_cache_bytes.set(self._size)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._size -= len(self._entries.pop(key))
+        metrics.response_cache_bytes.set(self._size)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        metrics.response_cache_bytes.set(0)
+
+
+BACKENDS: Dict[str, Callable[[], CacheBackend]] = {
+    "memory": lambda: InMemoryLRUBackend(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ),
+}
+
+
+class ResponseCache:
+    """
+    Serialized responses grouped by scope (a session id, an owner id, ...).
+    Each scope holds any number of variants, e.g. versions or query
+    parameters, and invalidate() drops all of them at once.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str = "game-session") -> None:
+        self.backend = backend
+        self.namespace = namespace
+        # Bumped by every invalidation; a fill that overlapped one is not
+        # stored, since it may have read rows from before the write
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    def _prefix(self, scope_id: int) -> str:
+        return f"{self.namespace}:{scope_id}@"
+
+    def _key(self, scope_id: int, variant: str) -> str:
+        return f"{self._prefix(scope_id)}{variant}"
+
+    def get_or_set(self, scope_id: int, variant: str, build: Callable[[], bytes]) -> bytes:
+        """
+        Return the cached body for a scope variant, building and storing it
+        on a miss.
+        """
+        key = self._key(scope_id, variant)
+        body = self.backend.get(key)
+        metrics.response_cache_requests_total.inc(
+            (self.namespace, "hit" if body is not None else "miss")
+        )
+        if body is not None:
+            return body
+        generation = self._generation
+        body = build()
+        if generation == self._generation:
+            self.backend.set(key, body)
+        return body
+
+    def invalidate(self, scope_id: int) -> None:
+        """
+        Drop every cached variant of a scope.
+        """
+        with self._generation_lock:
+            self._generation += 1
+        self.backend.delete_prefix(self._prefix(scope_id))
+
+
+def data_version(db: Session, *, owner_id: int, game_session_id: Optional[int] = None) -> str:
+    """
+    Version of an owner's data, or of one of their sessions, for cache
+    keys: the owner's sync counter, which every write to their sessions,
+    players and settlements bumps (see app.db.sync), and the number of
+    pending ledger events, which appends add to without bumping it.
+    Compaction bumps the counter. Read in one query.
+    """
+    pending = select(func.count()).where(LedgerEvent.compacted.is_(False))
+    if game_session_id is not None:
+        pending = pending.where(LedgerEvent.game_session_id == game_session_id)
+    else:
+        pending = pending.where(
+            LedgerEvent.game_session_id.in_(select(GameSession.id).where(GameSession.owner_id == owner_id))
+        )
+    counter = select(SyncCounter.value).where(SyncCounter.owner_id == owner_id)
+    version, pending_events = db.execute(
+        select(counter.scalar_subquery(), pending.scalar_subquery())
+    ).one()
+    return f"{version or 0}.{pending_events}"
+
+
+def session_id_of(obj: Any) -> Optional[int]:
+    """
+    The game session whose payload embeds obj: the session itself, or the
+    session a player or settlement belongs to. None for unrelated models.
+    """
+    if getattr(obj, "__tablename__", None) == "game_sessions":
+        return obj.id
+    return getattr(obj, "game_session_id", None)
+
+
+cache = ResponseCache(BACKENDS[settings.RESPONSE_CACHE_BACKEND]())
+
+
+def set_backend(backend: CacheBackend) -> None:
+    """
+    Swap the cache store, e.g. for a shared backend across workers.
+    """
+    cache.backend = backend
+
+
+def invalidate(game_session_id: Optional[int]) -> None:
+    if game_session_id is not None:
+        cache.invalidate(game_session_id)
+
+
+def invalidate_object(obj: Any) -> None:
+    """
+    Invalidate the cached session payload that embeds obj, if any.
+    """
+    invalidate(session_id_of(obj))
@@ -0,0 +1,117 @@
+"""
+Ranked full-text search over a user's game sessions, on whichever index
+the database has: FTS5 with bm25 on SQLite, tsvector with ts_rank_cd on
+Postgres (see app.models.search). Every word of the query must match, as
+a prefix, in the title, description or a player's name.
+"""
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models.search import SEARCH_TABLE
+
+# Longer queries are cut; each word is another index lookup
+MAX_TERMS = 8
+
+_WORD = re.compile(r"\w+")
+
+
+def _terms(query: str) -> List[str]:
+    return [term.lower() for term in _WORD.findall(query)][:MAX_TERMS]
+
+
+# Both matchers return the owner's total number of matches in every row,
+# plus one row per session on the requested page. A page past the end still
+# gets one row, with a NULL id, so the total never needs a second query.
+_PAGE = """
+    page AS (
+        SELECT matched.id AS id, matched.score AS score, gs.game_date AS game_date
+        FROM matched
+        JOIN game_sessions gs ON gs.id = matched.id
+        ORDER BY matched.score DESC, gs.game_date DESC
+        LIMIT :limit OFFSET :skip
+    )
+    SELECT (SELECT count(*) FROM matched) AS total, page.id AS id, page.score AS score
+    FROM (SELECT 1) AS one
+    LEFT JOIN page ON 1 = 1
+    ORDER BY page.score DESC, page.game_date DESC
+"""
+
+
+def _sqlite_matches(db: Session, terms: List[str], params: dict) -> list:
+    # Terms are \w+ only, so quoting them cannot change the FTS5 query.
+    # bm25() only works in a plain query on the FTS table, hence the CTE;
+    # owner_id is an UNINDEXED column, weighted 0.
+    params["match"] = " ".join(f'"{term}"*' for term in terms)
+    return db.execute(
+        text(
+            f"""
+            WITH matched AS MATERIALIZED (
+                SELECT rowid AS id, -bm25({SEARCH_TABLE}, 10.0, 4.0, 2.0, 0.0) AS score
+                FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE} MATCH :match AND owner_id = :owner_id
+            ),
+            {_PAGE}
+            """
+        ),
+        params,
+    ).all()
+
+
+def _postgres_matches(db: Session, terms: List[str], params: dict) -> list:
+    # Each term matches stemmed title/description words or names as written;
+    # the (owner_id, document) GIN index serves both conditions
+    clauses = []
+    for i, term in enumerate(terms):
+        params[f"term_{i}"] = f"{term}:*"
+        clauses.append(
+            f"(to_tsquery('english', :term_{i}) || to_tsquery('simple', :term_{i}))"
+        )
+    return db.execute(
+        text(
+            f"""
+            WITH matched AS MATERIALIZED (
+                SELECT s.game_session_id AS id, ts_rank_cd(s.document, q.query) AS score
+                FROM {SEARCH_TABLE} s
+                CROSS JOIN (SELECT {" && ".join(clauses)} AS query) q
+                WHERE s.owner_id = :owner_id AND s.document @@ q.query
+            ),
+            {_PAGE}
+            """
+        ),
+        params,
+    ).all()
+
+
+_MATCHERS = {"sqlite": _sqlite_matches, "postgresql": _postgres_matches}
+
+
+def search_game_sessions(
+    db: Session, *, owner_id: int, query: str, skip: int = 0, limit: int = 20
+) -> Tuple[int, List[Tuple[models.GameSession, float]]]:
+    """
+    The total number of the owner's sessions matching query, and one page
+    of them with their scores, best first (higher scores are better).
+    """
+    terms = _terms(query)
+    if not terms:
+        return 0, []
+    dialect = db.get_bind().dialect.name
+    if dialect not in _MATCHERS:
+        raise NotImplementedError(f"Full-text search is not available on {dialect}")
+    rows = _MATCHERS[dialect](db, terms, {"owner_id": owner_id, "skip": skip, "limit": limit})
+    total = rows[0].total
+    rows = [row for row in rows if row.id is not None]
+    if not rows:
+        return total, []
+
+    sessions = {
+        game_session.id: game_session
+        for game_session in db.query(models.GameSession).filter(
+            models.GameSession.id.in_([row.id for row in rows])
+        )
+    }
+    return total, [(sessions[row.id], row.score) for row in rows]
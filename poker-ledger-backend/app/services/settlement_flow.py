@@ -0,0 +1,280 @@
+"""
+Constraint-aware settlement as a min-cost flow.
+
+Players who lost money are sources, players who won are sinks, and an edge
+from payer to payee exists for every transfer the group allows, with a
+cost per unit moved. Any flow that drains the sources is a valid set of
+transfers; the cheapest one avoids expensive pairs. Amounts are integer
+cents, so transfers add up exactly.
+
+The solver is primal-dual successive shortest paths: Dijkstra with node
+potentials finds the current shortest-path distances, and a blocking flow
+is pushed over all edges whose reduced cost is zero before the next
+Dijkstra. With uniform costs every direct transfer is equally cheap, so a
+whole table settles in one or two phases.
+
+A bank (the host, or a virtual party) can receive from and pay anyone,
+relays between players who cannot pay each other, and absorbs whatever
+does not balance: an entry error, or the cents lost to rounding.
+
+Transfer-count caps are not a linear constraint. A player over its cap is
+restricted to its largest payees from the previous solution and the
+table is solved again. With a bank that always succeeds; without one it
+can report a table as infeasible that some other choice of payees would
+have settled.
+"""
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+Pair = Tuple[str, str]
+
+DEFAULT_EDGE_COST = 1.0
+
+
+class SettlementInfeasible(ValueError):
+    """
+    The constraints leave some debt with no allowed way to be paid.
+    """
+
+
+class _FlowGraph:
+    """
+    Residual graph in adjacency-array form: edge i and its reverse i ^ 1.
+    """
+
+    def __init__(self, nodes: int) -> None:
+        self.adjacency: List[List[int]] = [[] for _ in range(nodes)]
+        self.to: List[int] = []
+        self.capacity: List[int] = []
+        self.cost: List[float] = []
+
+    def add_edge(self, u: int, v: int, capacity: int, cost: float) -> int:
+        edge = len(self.to)
+        self.to += (v, u)
+        self.capacity += (capacity, 0)
+        self.cost += (cost, -cost)
+        self.adjacency[u].append(edge)
+        self.adjacency[v].append(edge + 1)
+        return edge
+
+    def flow(self, edge: int) -> int:
+        return self.capacity[edge ^ 1]
+
+    def min_cost_flow(self, source: int, sink: int) -> int:
+        """
+        Push as much flow as possible from source to sink at minimum cost
+        and return the amount. Edge costs must be non-negative.
+        """
+        nodes = len(self.adjacency)
+        potential = [0.0] * nodes
+        total = 0
+        while True:
+            distance = self._dijkstra(source, potential)
+            if distance[sink] is None:
+                return total
+            for node in range(nodes):
+                if distance[node] is not None:
+                    potential[node] += distance[node]
+            total += self._blocking_flow(source, sink, potential)
+
+    def _dijkstra(self, source: int, potential: List[float]) -> List[Optional[float]]:
+        distance: List[Optional[float]] = [None] * len(self.adjacency)
+        distance[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > distance[u]:
+                continue
+            base = d + potential[u]
+            for edge in self.adjacency[u]:
+                if self.capacity[edge] <= 0:
+                    continue
+                v = self.to[edge]
+                candidate = base + self.cost[edge] - potential[v]
+                if distance[v] is None or candidate < distance[v] - 1e-9:
+                    distance[v] = candidate
+                    heapq.heappush(heap, (candidate, v))
+        return distance
+
+    def _blocking_flow(self, source: int, sink: int, potential: List[float]) -> int:
+        """
+        Dinic-style blocking flow restricted to edges with zero reduced cost.
+        """
+
+        def admissible(edge: int, u: int) -> bool:
+            v = self.to[edge]
+            return (
+                self.capacity[edge] > 0
+                and abs(self.cost[edge] + potential[u] - potential[v]) <= 1e-9
+            )
+
+        pushed_total = 0
+        while True:
+            # BFS levels over admissible edges keep the DFS acyclic
+            level = [-1] * len(self.adjacency)
+            level[source] = 0
+            queue = [source]
+            for u in queue:
+                for edge in self.adjacency[u]:
+                    v = self.to[edge]
+                    if level[v] < 0 and admissible(edge, u):
+                        level[v] = level[u] + 1
+                        queue.append(v)
+            if level[sink] < 0:
+                return pushed_total
+
+            cursor = [0] * len(self.adjacency)
+            while True:
+                pushed = self._augment(source, sink, level, cursor, admissible)
+                if not pushed:
+                    break
+                pushed_total += pushed
+
+    def _augment(self, source, sink, level, cursor, admissible) -> int:
+        # Iterative DFS along level-increasing admissible edges
+        path: List[int] = []
+        u = source
+        while True:
+            if u == sink:
+                amount = min(self.capacity[edge] for edge in path)
+                for edge in path:
+                    self.capacity[edge] -= amount
+                    self.capacity[edge ^ 1] += amount
+                return amount
+            edges = self.adjacency[u]
+            while cursor[u] < len(edges):
+                edge = edges[cursor[u]]
+                v = self.to[edge]
+                if level[v] == level[u] + 1 and admissible(edge, u):
+                    break
+                cursor[u] += 1
+            else:
+                # Dead end: retreat and skip the edge that led here
+                if not path:
+                    return 0
+                level[u] = -1
+                edge = path.pop()
+                u = self.to[edge ^ 1]
+                cursor[u] += 1
+                continue
+            path.append(edge)
+            u = self.to[edge]
+
+
+def _to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def _solve(
+    balances: Dict[str, int],
+    *,
+    bank: Optional[str],
+    allowed: Optional[Set[Pair]],
+    forbidden: Set[Pair],
+    pinned: Dict[str, Set[str]],
+    costs: Dict[Pair, float],
+) -> Dict[Pair, int]:
+    payers = sorted((n for n, b in balances.items() if b < 0 or n == bank), key=lambda n: balances[n])
+    payees = sorted((n for n, b in balances.items() if b > 0 or n == bank), key=lambda n: -balances[n])
+    names = sorted(set(payers) | set(payees))
+    index = {name: i for i, name in enumerate(names)}
+    source, sink = len(names), len(names) + 1
+    graph = _FlowGraph(len(names) + 2)
+
+    required = 0
+    for name in payers:
+        if balances[name] < 0:
+            graph.add_edge(source, index[name], -balances[name], 0.0)
+            required += -balances[name]
+    available = 0
+    for name in payees:
+        if balances[name] > 0:
+            graph.add_edge(index[name], sink, balances[name], 0.0)
+            available += balances[name]
+
+    # Uncapped transfer edges; the source and sink edges bound the flow
+    unbounded = required + available
+    edges: Dict[Pair, int] = {}
+    for payer in payers:
+        for payee in payees:
+            pair = (payer, payee)
+            if payer == payee:
+                continue
+            if bank not in pair and (
+                pair in forbidden
+                or (allowed is not None and pair not in allowed)
+                or (payer in pinned and payee not in pinned[payer])
+            ):
+                continue
+            edges[pair] = graph.add_edge(
+                index[payer], index[payee], unbounded, costs.get(pair, DEFAULT_EDGE_COST)
+            )
+
+    moved = graph.min_cost_flow(source, sink)
+    if moved < min(required, available):
+        raise SettlementInfeasible(
+            f"{(min(required, available) - moved) / 100:.2f} cannot be settled with the allowed transfers"
+        )
+    return {pair: graph.flow(edge) for pair, edge in edges.items() if graph.flow(edge) > 0}
+
+
+def min_cost_settlements(
+    players_with_net: Iterable[dict],
+    *,
+    allowed_pairs: Optional[Iterable[Pair]] = None,
+    forbidden_pairs: Iterable[Pair] = (),
+    max_transfers: Optional[Dict[str, int]] = None,
+    edge_costs: Optional[Dict[Pair, float]] = None,
+    bank: Optional[str] = None,
+) -> List[dict]:
+    """
+    Transfers that settle the given {'name', 'net_result'} entries, in the
+    same shape as match_settlements().
+
+    Pairs are (payer, payee) names. allowed_pairs, if given, lists the only
+    transfers permitted; forbidden_pairs removes transfers. Transfers to and
+    from the bank are always permitted. max_transfers caps how many
+    payments a player makes; edge_costs sets a cost per unit moved for a
+    pair (default 1, must not be negative). Raises SettlementInfeasible if
+    the constraints cannot be met.
+    """
+    balances: Dict[str, int] = defaultdict(int)
+    for player in players_with_net:
+        balances[player["name"]] += _to_cents(player["net_result"])
+    if bank is not None:
+        # The bank takes the other side of whatever does not balance
+        balances[bank] -= sum(balances.values())
+
+    costs = dict(edge_costs or {})
+    if any(cost < 0 for cost in costs.values()):
+        raise ValueError("Edge costs must not be negative")
+    allowed = set(allowed_pairs) if allowed_pairs is not None else None
+    forbidden = set(forbidden_pairs)
+    caps = {name: cap for name, cap in (max_transfers or {}).items() if name != bank}
+
+    # A player over its cap is pinned to its largest payees (and the bank)
+    # and the table solved again; each round pins someone new, so this ends
+    pinned: Dict[str, Set[str]] = {}
+    while True:
+        flows = _solve(balances, bank=bank, allowed=allowed, forbidden=forbidden, pinned=pinned, costs=costs)
+        outgoing: Dict[str, List[Pair]] = defaultdict(list)
+        for pair in flows:
+            outgoing[pair[0]].append(pair)
+        over_cap = [
+            (name, pairs) for name, pairs in outgoing.items() if name in caps and len(pairs) > caps[name]
+        ]
+        if not over_cap:
+            break
+        for name, pairs in over_cap:
+            if caps[name] <= 0 or name in pinned:
+                raise SettlementInfeasible(f"{name} cannot pay within {caps[name]} transfers")
+            # One slot stays free for the bank, which can take the rest
+            keep = caps[name] - 1 if bank is not None else caps[name]
+            largest = sorted((pair for pair in pairs if bank not in pair), key=lambda pair: -flows[pair])
+            pinned[name] = {payee for _, payee in largest[:keep]}
+
+    return [
+        {"from_player": payer, "to_player": payee, "amount": cents / 100}
+        for (payer, payee), cents in sorted(flows.items(), key=lambda item: -item[1])
+    ]
@@ -1,35 +1,23 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
 
-from app import models
+from app import models, schemas
+from app.db import sync
+from app.db.locks import acquire_transaction_lock
+from app.services import analytics, ledger, response_cache
+from app.services.settlement_flow import min_cost_settlements
 
+# Distinct balance sets whose previews are kept
+PREVIEW_CACHE_SIZE = 4096
 
-def calculate_settlements_for_session(db: Session, game_session_id: int) -> models.GameSession:
+
+def match_settlements(players_with_net: List[dict]) -> List[dict]:
     """
-    Calculate settlements for a game session based on player buy-ins and cash-outs.
-    This mirrors the logic from the frontend settlementCalculator.ts
+    Greedy transfers that settle the given {'name', 'net_result'} entries:
+    the biggest losers pay the biggest winners first.
     """
-    # Get the game session with players
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.id == game_session_id
-    ).first()
-    
-    if not game_session:
-        raise ValueError("Game session not found")
-    
-    # Clear existing settlements
-    db.query(models.Settlement).filter(
-        models.Settlement.game_session_id == game_session_id
-    ).delete()
-    
-    # Calculate net results for each player
-    players_with_net = []
-    for player in game_session.players:
-        players_with_net.append({
-            'name': player.name,
-            'net_result': player.cash_out - player.buy_in
-        })
-    
     # Separate winners and losers
     winners = [p for p in players_with_net if p['net_result'] > 0]
     losers = [p for p in players_with_net if p['net_result'] < 0]
@@ -52,24 +40,140 @@ def calculate_settlements_for_session(db: Session, game_session_id: int) -> mode
             amount = min(loser['remaining'], winner['remaining'])
             
             # Create settlement record
-            settlement = models.Settlement(
-                from_player=loser['name'],
-                to_player=winner['name'],
-                amount=round(amount, 2),
-                game_session_id=game_session_id
-            )
-            settlements.append(settlement)
+            settlements.append({
+                'from_player': loser['name'],
+                'to_player': winner['name'],
+                'amount': round(amount, 2),
+            })
             
             loser['remaining'] -= amount
             winner['remaining'] -= amount
+
+    return settlements
+
+
+def settle(
+    players_with_net: List[dict], options: Optional[schemas.SettlementOptions] = None
+) -> List[dict]:
+    """
+    Transfers for the given {'name', 'net_result'} entries using the method
+    in options, greedy by default. Raises SettlementInfeasible if the
+    constraints cannot be met.
+    """
+    if options is None or options.method == schemas.SettlementMethod.GREEDY:
+        return match_settlements(players_with_net)
+    return min_cost_settlements(
+        players_with_net,
+        allowed_pairs=(
+            [(p.from_player, p.to_player) for p in options.allowed_pairs]
+            if options.allowed_pairs is not None
+            else None
+        ),
+        forbidden_pairs=[(p.from_player, p.to_player) for p in options.forbidden_pairs],
+        max_transfers=options.max_transfers,
+        edge_costs={(e.from_player, e.to_player): e.cost for e in options.edge_costs},
+        bank=options.bank,
+    )
+
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def _settle_balances(
+    balances: Tuple[Tuple[str, int], ...], options_json: Optional[str]
+) -> Tuple[Tuple[str, str, float], ...]:
+    options = schemas.SettlementOptions.model_validate_json(options_json) if options_json else None
+    players_with_net = [{'name': name, 'net_result': cents / 100} for name, cents in balances]
+    return tuple(
+        (t['from_player'], t['to_player'], t['amount']) for t in settle(players_with_net, options)
+    )
+
+
+def preview_settlements(
+    players_with_net: List[dict], options: Optional[schemas.SettlementOptions] = None
+) -> List[dict]:
+    """
+    settle(), memoized on the multiset of net balances in cents. Greedy
+    transfers do not depend on names, so for that method players are
+    replaced by their rank and any table with the same balances shares an
+    entry; constrained methods key on names as well.
+    """
+    ordered = sorted((int(round(p['net_result'] * 100)), p['name']) for p in players_with_net)
+    if options is None or options.method == schemas.SettlementMethod.GREEDY:
+        names = [name for _, name in ordered]
+        transfers = _settle_balances(tuple((str(rank), cents) for rank, (cents, _) in enumerate(ordered)), None)
+        return [
+            {'from_player': names[int(payer)], 'to_player': names[int(payee)], 'amount': amount}
+            for payer, payee, amount in transfers
+        ]
+    transfers = _settle_balances(tuple((name, cents) for cents, name in ordered), options.model_dump_json())
+    return [
+        {'from_player': payer, 'to_player': payee, 'amount': amount}
+        for payer, payee, amount in transfers
+    ]
+
+
+def calculate_settlements_for_session(
+    db: Session, game_session_id: int, options: Optional[schemas.SettlementOptions] = None
+) -> models.GameSession:
+    """
+    Calculate settlements for a game session based on player buy-ins and cash-outs.
+    This mirrors the logic from the frontend settlementCalculator.ts; options
+    select the constraint-aware min-cost-flow method instead.
+
+    Runs under a per-session database lock so recalculations from different
+    workers cannot interleave their delete and insert of settlement rows.
+    """
+    # Fold pending ledger events first; compaction commits, which would
+    # release the transaction lock below
+    ledger.compact(db, game_session_ids=[game_session_id])
+    acquire_transaction_lock(db, f"settle-game-session:{game_session_id}")
+
+    # Get the game session with players
+    game_session = db.query(models.GameSession).filter(
+        models.GameSession.id == game_session_id
+    ).first()
+    
+    if not game_session:
+        raise ValueError("Game session not found")
+    
+    # Calculate net results for each player; before any write, so an
+    # infeasible set of constraints leaves the old settlements in place
+    players_with_net = []
+    for player in game_session.players:
+        players_with_net.append({
+            'name': player.name,
+            'net_result': player.cash_out - player.buy_in
+        })
+    transfers = settle(players_with_net, options)
+
+    # Clear existing settlements, leaving tombstones for delta sync
+    owner_id = game_session.owner_id
+    version = sync.next_version(db, owner_id)
+    settlements_table = models.Settlement.__table__
+    stale_ids = db.execute(
+        delete(settlements_table)
+        .where(settlements_table.c.game_session_id == game_session_id)
+        .returning(settlements_table.c.id)
+    ).scalars().all()
+    sync.record_deletes(
+        db, table_name="settlements", row_ids=stale_ids, owner_id=owner_id, version=version
+    )
+    
+    settlements = [
+        {**settlement, 'game_session_id': game_session_id, 'change_version': version}
+        for settlement in transfers
+    ]
     
-    # Save all settlements
-    db.add_all(settlements)
+    # Save all settlements in one executemany; ORM add_all would insert row
+    # by row to fetch each generated id, which we never use here
+    if settlements:
+        db.execute(insert(models.Settlement), settlements)
     
     # Mark game session as settled
     game_session.is_settled = True
     
     db.commit()
+    response_cache.invalidate(game_session_id)
+    analytics.invalidate_owner(owner_id)
     db.refresh(game_session)
     
     return game_session 
\ No newline at end of file
@@ -0,0 +1,50 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs fn; callers that arrive while it is in
+    flight block until it finishes and receive the same result (or exception).
+    Once the call completes the key is forgotten, so later callers run fn again.
+    Results are shared between threads, so fn should return something that is
+    safe to hand out more than once (e.g. a Pydantic schema, not an ORM object
+    bound to the leader's session).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
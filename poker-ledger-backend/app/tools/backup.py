@@ -0,0 +1,446 @@
+"""
+Bulk backup and restore of users, game sessions, players, ledger events and
+settlements, for all users or one owner, between any databases the app runs
+on (SQLite locally, Postgres/Supabase in production).
+
+    python -m app.tools.backup export ledger.plbk [--owner-id 7]
+    python -m app.tools.backup verify ledger.plbk
+    python -m app.tools.backup restore ledger.plbk
+
+The database is the one DATABASE_URL points at. A restore runs in one
+transaction: rows go in with COPY on Postgres and batched executemany on
+SQLite, and any checksum mismatch, truncated file or conflicting row rolls
+the whole restore back. Restored rows keep their ids, so restore into a
+database that does not already hold them.
+
+File layout (integers little-endian):
+
+    MAGIC
+    u32 length, manifest JSON: tables in restore order with (column, kind),
+        u32 crc32 of the manifest
+    chunks: u16 table, u32 rows, u32 length, u32 crc32, zlib payload
+    u16 0xFFFF, u32 0, u32 length, u32 crc32, trailer JSON: rows per table
+        and the SHA-256 of every uncompressed payload in order
+
+A payload is columnar: for each column, one null flag byte per row, a u32
+body length and the body, either packed int64/float64/bool values or u32
+string lengths followed by the UTF-8 strings. Datetimes are ISO 8601
+strings, enums their names.
+"""
+import argparse
+import enum
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"PLBK\x00\x02"
+FORMAT_VERSION = 2
+
+# Rows per chunk; larger chunks compress better and cost more memory
+DEFAULT_CHUNK_ROWS = 50_000
+
+_CHUNK = struct.Struct("<HIII")
+_END = 0xFFFF
+
+_KINDS = {"int", "float", "bool", "datetime", "text"}
+
+# Parents before children, so foreign keys hold at every point of a restore
+TABLES = ["users", "game_sessions", "players", "ledger_events", "settlements"]
+
+
+class BackupError(Exception):
+    """
+    The file is not a valid backup, or does not match the database.
+    """
+
+
+def _column_kind(column: Any) -> str:
+    from sqlalchemy import Boolean, DateTime, Enum, Float, Integer
+
+    # Enum subclasses String, so it has to be checked before falling back
+    if isinstance(column.type, Enum):
+        return "text"
+    for type_, kind in ((Boolean, "bool"), (Integer, "int"), (Float, "float"), (DateTime, "datetime")):
+        if isinstance(column.type, type_):
+            return kind
+    return "text"
+
+
+def _encode_column(kind: str, values: Sequence[Any]) -> bytes:
+    nulls = bytes(value is None for value in values)
+    if kind == "int":
+        body = struct.pack(f"<{len(values)}q", *(value or 0 for value in values))
+    elif kind == "float":
+        body = struct.pack(f"<{len(values)}d", *(value or 0.0 for value in values))
+    elif kind == "bool":
+        body = bytes(bool(value) for value in values)
+    else:
+        strings = [
+            b"" if value is None
+            else (value.isoformat() if kind == "datetime" else
+                  value.name if isinstance(value, enum.Enum) else str(value)).encode()
+            for value in values
+        ]
+        body = struct.pack(f"<{len(strings)}I", *map(len, strings)) + b"".join(strings)
+    return nulls + struct.pack("<I", len(body)) + body
+
+
+def _decode_column(kind: str, rows: int, payload: memoryview, offset: int) -> Tuple[list, int]:
+    nulls = payload[offset:offset + rows]
+    (length,) = struct.unpack_from("<I", payload, offset + rows)
+    start = offset + rows + 4
+    body = payload[start:start + length]
+    if kind == "int":
+        values: list = list(struct.unpack(f"<{rows}q", body))
+    elif kind == "float":
+        values = list(struct.unpack(f"<{rows}d", body))
+    elif kind == "bool":
+        values = [bool(b) for b in body]
+    else:
+        lengths = struct.unpack_from(f"<{rows}I", body)
+        values, position = [], 4 * rows
+        for size in lengths:
+            values.append(bytes(body[position:position + size]).decode())
+            position += size
+    return [None if null else value for null, value in zip(nulls, values)], start + length
+
+
+class _Writer:
+    def __init__(self, out: BinaryIO, manifest: dict, level: int) -> None:
+        self.out = out
+        self.level = level
+        self.digest = hashlib.sha256()
+        self.rows: Dict[str, int] = {}
+        header = json.dumps(manifest).encode()
+        out.write(MAGIC + struct.pack("<I", len(header)) + header + struct.pack("<I", zlib.crc32(header)))
+
+    def chunk(self, table_index: int, table: str, kinds: List[str], rows: Sequence[Sequence[Any]]) -> None:
+        payload = b"".join(
+            _encode_column(kind, [row[i] for row in rows]) for i, kind in enumerate(kinds)
+        )
+        self.digest.update(payload)
+        compressed = zlib.compress(payload, self.level)
+        self.out.write(_CHUNK.pack(table_index, len(rows), len(compressed), zlib.crc32(payload)))
+        self.out.write(compressed)
+        self.rows[table] = self.rows.get(table, 0) + len(rows)
+
+    def close(self) -> None:
+        trailer = json.dumps({"rows": self.rows, "sha256": self.digest.hexdigest()}).encode()
+        self.out.write(_CHUNK.pack(_END, 0, len(trailer), zlib.crc32(trailer)) + trailer)
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise BackupError("Backup file is truncated")
+    return data
+
+
+def read_backup(stream: BinaryIO) -> Tuple[dict, Iterator[Tuple[str, List[Tuple[str, str]], List[list]]]]:
+    """
+    The manifest, and an iterator over (table, columns, column values) per
+    chunk. Each chunk's CRC is checked as it is read; the row counts and
+    SHA-256 in the trailer once the iterator is exhausted.
+    """
+    if _read_exact(stream, len(MAGIC)) != MAGIC:
+        raise BackupError("Not a backup file, or written by an incompatible version")
+    (length,) = struct.unpack("<I", _read_exact(stream, 4))
+    header = _read_exact(stream, length)
+    (crc,) = struct.unpack("<I", _read_exact(stream, 4))
+    if zlib.crc32(header) != crc:
+        raise BackupError("Backup header is corrupt")
+    try:
+        manifest = json.loads(header)
+        tables = manifest["tables"]
+        if any(kind not in _KINDS for table in tables for _, kind in table["columns"]):
+            raise ValueError("unknown column kind")
+    except (ValueError, KeyError, TypeError) as exc:
+        raise BackupError(f"Backup header is not valid: {exc}")
+
+    def chunks() -> Iterator[Tuple[str, List[Tuple[str, str]], List[list]]]:
+        digest = hashlib.sha256()
+        counts: Dict[str, int] = {}
+        while True:
+            table_index, rows, size, crc = _CHUNK.unpack(_read_exact(stream, _CHUNK.size))
+            data = _read_exact(stream, size)
+            if table_index == _END:
+                if zlib.crc32(data) != crc:
+                    raise BackupError("Backup trailer is corrupt")
+                try:
+                    trailer = json.loads(data)
+                except ValueError:
+                    raise BackupError("Backup trailer is corrupt")
+                if trailer.get("rows") != counts or trailer.get("sha256") != digest.hexdigest():
+                    raise BackupError("Backup contents do not match their checksum")
+                return
+            try:
+                payload = zlib.decompress(data)
+            except zlib.error:
+                payload = b""
+            if table_index >= len(tables) or zlib.crc32(payload) != crc:
+                raise BackupError("Backup file is corrupt")
+            digest.update(payload)
+            table = tables[table_index]
+            columns = [tuple(column) for column in table["columns"]]
+            view, offset, values = memoryview(payload), 0, []
+            try:
+                for _, kind in columns:
+                    column_values, offset = _decode_column(kind, rows, view, offset)
+                    values.append(column_values)
+            except (struct.error, UnicodeDecodeError) as exc:
+                # The CRC matched, so the chunk was written this way
+                raise BackupError(f"A {table['name']} chunk does not match the manifest: {exc}")
+            counts[table["name"]] = counts.get(table["name"], 0) + rows
+            yield table["name"], columns, values
+
+    return manifest, chunks()
+
+
+def _owner_filters(owner_id: Optional[int]) -> Dict[str, Any]:
+    from sqlalchemy import select
+
+    from app.db.base_class import Base
+
+    if owner_id is None:
+        return {}
+    t = Base.metadata.tables
+    sessions = select(t["game_sessions"].c.id).where(t["game_sessions"].c.owner_id == owner_id)
+    return {
+        "users": t["users"].c.id == owner_id,
+        "game_sessions": t["game_sessions"].c.owner_id == owner_id,
+        "players": t["players"].c.game_session_id.in_(sessions),
+        "ledger_events": t["ledger_events"].c.game_session_id.in_(sessions),
+        "settlements": t["settlements"].c.game_session_id.in_(sessions),
+    }
+
+
+class _Rate:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+
+    def report(self, label: str, rows: int) -> None:
+        elapsed = time.perf_counter() - self.started
+        rate = rows / elapsed if elapsed > 0 else float("inf")
+        print(f"{label:<16} {rows:>10} rows {elapsed:>8.2f}s {rate:>12,.0f} rows/s")
+
+
+def export(path: str, *, owner_id: Optional[int] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS, level: int = 6) -> Dict[str, int]:
+    from sqlalchemy import select
+
+    import app.models  # noqa: F401  (registers the tables)
+    from app.db.base_class import Base
+    from app.db.session import get_engine
+
+    engine = get_engine()
+    filters = _owner_filters(owner_id)
+    tables = [Base.metadata.tables[name] for name in TABLES]
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "dialect": engine.dialect.name,
+        "owner_id": owner_id,
+        "tables": [
+            {"name": table.name, "columns": [(c.name, _column_kind(c)) for c in table.columns]}
+            for table in tables
+        ],
+    }
+
+    # Written beside the target and renamed, so a failed export leaves no
+    # file that looks complete
+    partial = f"{path}.partial"
+    total = _Rate()
+    options = {"yield_per": chunk_rows}
+    if engine.dialect.name == "postgresql":
+        # One snapshot for every table, so children match their parents
+        options["isolation_level"] = "REPEATABLE READ"
+    try:
+        with engine.connect() as connection, open(partial, "wb") as out:
+            connection = connection.execution_options(**options)
+            writer = _Writer(out, manifest, level)
+            for index, table in enumerate(tables):
+                rate = _Rate()
+                kinds = [kind for _, kind in manifest["tables"][index]["columns"]]
+                query = select(table).order_by(table.c.id)
+                if table.name in filters:
+                    query = query.where(filters[table.name])
+                for rows in connection.execute(query).partitions():
+                    writer.chunk(index, table.name, kinds, rows)
+                rate.report(table.name, writer.rows.get(table.name, 0))
+            writer.close()
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
+    total.report("total", sum(writer.rows.values()))
+    return writer.rows
+
+
+def _copy_field(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _copy_rows(db: Any, table: str, names: List[str], values: List[list]) -> None:
+    buffer = io.StringIO()
+    for row in zip(*values):
+        buffer.write("\t".join(map(_copy_field, row)))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(names)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def _insert_rows(db: Any, table: Any, columns: List[Tuple[str, str]], values: List[list]) -> None:
+    for i, (_, kind) in enumerate(columns):
+        if kind == "datetime":
+            values[i] = [None if v is None else datetime.fromisoformat(v) for v in values[i]]
+    names = [name for name, _ in columns]
+    db.execute(table.insert(), [dict(zip(names, row)) for row in zip(*values)])
+
+
+def restore(path: str) -> Dict[str, int]:
+    from sqlalchemy import select, text
+
+    from app import models
+    from app.db import sync
+    from app.db.base_class import Base
+    from app.db.session import SessionLocal
+    from app.models import search
+
+    db = SessionLocal()
+    counts: Dict[str, int] = {}
+    total = _Rate()
+    try:
+        dialect = db.get_bind().dialect.name
+        postgres = dialect == "postgresql"
+        # Above every owner's counter, so restored rows are new to sync
+        # clients; the restored owners' counters are moved past it below
+        version = sync.highest_version(db) + 1
+        # The search triggers re-aggregate a session's player names on every
+        # player insert; index the restored sessions once at the end instead.
+        # Dropping them inside this transaction locks out other writers
+        # until the restore commits, so none of their changes are missed.
+        for statement in search.DROP_TRIGGERS.get(dialect, []):
+            db.execute(text(statement))
+        with open(path, "rb") as stream:
+            _, chunks = read_backup(stream)
+            current: Optional[Tuple[str, _Rate]] = None
+            for table_name, columns, values in chunks:
+                table = Base.metadata.tables.get(table_name)
+                missing = [name for name, _ in columns if table is None or name not in table.c]
+                if table is None or missing:
+                    raise BackupError(f"{table_name} does not match this database's schema: {missing}")
+                if current is None or current[0] != table_name:
+                    if current is not None:
+                        current[1].report(current[0], counts[current[0]])
+                    current = (table_name, _Rate())
+                rows = len(values[0]) if values else 0
+                if "change_version" in table.c:
+                    # Restored rows are new to this database's sync clients
+                    names = [name for name, _ in columns]
+                    if "change_version" in names:
+                        values[names.index("change_version")] = [version] * rows
+                    else:
+                        columns, values = columns + [("change_version", "int")], values + [[version] * rows]
+                if postgres:
+                    _copy_rows(db, table_name, [name for name, _ in columns], values)
+                else:
+                    _insert_rows(db, table, columns, values)
+                counts[table_name] = counts.get(table_name, 0) + rows
+            if current is not None:
+                current[1].report(current[0], counts[current[0]])
+        owners = db.execute(
+            select(models.GameSession.owner_id)
+            .where(models.GameSession.change_version == version)
+            .distinct()
+            .order_by(models.GameSession.owner_id)
+        ).scalars()
+        for owner_id in owners.all():
+            sync.next_version(db, owner_id, at_least=version)
+        for statement in search.TRIGGERS.get(dialect, []):
+            db.execute(text(statement))
+        if dialect in search.BACKFILL:
+            db.execute(text(search.BACKFILL[dialect]))
+        if postgres:
+            # Rows came in with their ids; move sequences past them
+            for table_name in counts:
+                db.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+                        f"coalesce(max(id), 0) + 1, false) FROM {table_name}"
+                    )
+                )
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    total.report("total", sum(counts.values()))
+    return counts
+
+
+def verify(path: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    total = _Rate()
+    with open(path, "rb") as stream:
+        manifest, chunks = read_backup(stream)
+        for table_name, _, values in chunks:
+            counts[table_name] = counts.get(table_name, 0) + (len(values[0]) if values else 0)
+    scope = f"owner {manifest['owner_id']}" if manifest["owner_id"] is not None else "all users"
+    print(f"Backup of {scope} from {manifest['dialect']}, written {manifest['created_at']}")
+    for table_name, rows in counts.items():
+        print(f"{table_name:<16} {rows:>10} rows")
+    total.report("verified", sum(counts.values()))
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Back up and restore the ledger database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write a backup of the database")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--owner-id", type=int, help="only this user and their sessions")
+    export_parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    export_parser.add_argument("--level", type=int, default=6, choices=range(10), help="zlib level")
+    commands.add_parser("verify", help="check a backup's checksums").add_argument("path")
+    commands.add_parser("restore", help="load a backup in one transaction").add_argument("path")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy.exc import IntegrityError
+
+    try:
+        if args.command == "export":
+            export(args.path, owner_id=args.owner_id, chunk_rows=args.chunk_rows, level=args.level)
+        elif args.command == "verify":
+            verify(args.path)
+        else:
+            restore(args.path)
+    except BackupError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    except IntegrityError as exc:
+        # Nothing was written; the restore is one transaction
+        print(f"error: rows conflict with the database, nothing restored: {exc.orig}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Import-time report for the serverless entry point.
+
+Runs a fresh interpreter with ``-X importtime``, then aggregates the
+per-module self time by package so the expensive dependencies stand out.
+
+    python -m app.tools.importtime                  # report for api.index
+    python -m app.tools.importtime --depth 2        # group by e.g. sqlalchemy.orm
+    python -m app.tools.importtime --budget-ms 1500 # exit 1 if over budget
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Import budget of the entry point that tests/test_cold_start.py enforces
+COLD_START_BUDGET_MS = 2000.0
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def measure(module: str = "api.index", runs: int = 1) -> List[List[ImportRecord]]:
+    """
+    Import module in fresh interpreters and return the parsed -X importtime
+    records of each run.
+    """
+    # Any value of PYTHONDONTWRITEBYTECODE, "0" included, stops .pyc files
+    # being written, and every run would then time compiling from source
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    results = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+        results.append(parse(proc.stderr))
+    return results
+
+
+def parse(output: str) -> List[ImportRecord]:
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us)))
+    return records
+
+
+def aggregate(records: List[ImportRecord], depth: int = 1) -> Dict[str, int]:
+    """
+    Sum self time per package, grouping module names by their first depth parts.
+    """
+    totals: Dict[str, int] = defaultdict(int)
+    for record in records:
+        group = ".".join(record.module.split(".")[:depth])
+        totals[group] += record.self_us
+    return dict(totals)
+
+
+def total_us(records: List[ImportRecord]) -> int:
+    return sum(record.self_us for record in records)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="api.index", help="module to import")
+    parser.add_argument("--depth", type=int, default=1, help="package grouping depth")
+    parser.add_argument("--top", type=int, default=25, help="rows to show")
+    parser.add_argument("--runs", type=int, default=3, help="runs; the fastest is reported")
+    parser.add_argument("--budget-ms", type=float, help="fail if total import time exceeds this")
+    args = parser.parse_args(argv)
+
+    # The fastest run is the least disturbed by disk and scheduler noise
+    records = min(measure(args.module, args.runs), key=total_us)
+    total = total_us(records)
+    groups = sorted(aggregate(records, args.depth).items(), key=lambda kv: kv[1], reverse=True)
+
+    print(f"{'package':<40} {'self ms':>10} {'share':>7}")
+    for name, us in groups[: args.top]:
+        print(f"{name:<40} {us / 1000:>10.1f} {us / total:>7.1%}")
+    print(f"{'total (' + str(len(records)) + ' modules)':<40} {total / 1000:>10.1f}")
+
+    if args.budget_ms is not None and total / 1000 > args.budget_ms:
+        print(f"Import time {total / 1000:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
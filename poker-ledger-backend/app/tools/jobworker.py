@@ -0,0 +1,39 @@
+"""
+Run background job workers in the foreground, for deployments where the web
+process cannot keep threads alive between requests (set JOBS_WORKERS=0 there).
+
+    python -m app.tools.jobworker --workers 4
+"""
+import argparse
+import logging
+import signal
+import sys
+import threading
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--workers", type=int, default=max(settings.JOBS_WORKERS, 1))
+    parser.add_argument("--poll-interval", type=float, default=settings.JOBS_POLL_INTERVAL_SECONDS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    from app.services.jobs import WorkerPool
+
+    pool = WorkerPool(args.workers, args.poll_interval)
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    pool.start()
+    logging.getLogger(__name__).info("Running %s job workers", args.workers)
+    stopped.wait()
+    pool.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Load-test harness: seeds a throwaway database and drives the real ASGI app
+with scripted game-host flows. Run with ``python -m app.tools.loadtest``.
+"""
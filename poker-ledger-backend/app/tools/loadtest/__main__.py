@@ -0,0 +1,110 @@
+"""
+Drive the API with synthetic game hosts and report per-endpoint latency.
+
+    # In-process against a throwaway SQLite database
+    python -m app.tools.loadtest --users 20 --iterations 5
+
+    # Against a local uvicorn sharing the seeded database
+    python -m app.tools.loadtest --database-url postgresql://localhost/poker_load \\
+        --base-url http://127.0.0.1:8000
+
+    # Compare with an earlier run
+    python -m app.tools.loadtest --compare loadtest-results/20250101-120000.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the Poker Ledger API")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual hosts")
+    parser.add_argument("--iterations", type=int, default=3, help="game nights per host")
+    parser.add_argument("--sessions-per-user", type=int, default=10)
+    parser.add_argument("--players-per-session", type=int, default=8)
+    parser.add_argument("--database-url", help="database to seed (default: a temporary SQLite file)")
+    parser.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--out", type=Path, default=Path("loadtest-results"), help="results directory")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace, usernames: List[str]):
+    import httpx
+
+    from app.tools.loadtest.scenarios import Recorder, host_game_night
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users)
+
+    def make_client() -> httpx.AsyncClient:
+        if args.base_url:
+            return httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60)
+        from app.main import app
+
+        return httpx.AsyncClient(app=app, base_url="http://loadtest", timeout=60)
+
+    async def virtual_user(index: int) -> None:
+        rng = random.Random(args.seed * 1000 + index)
+        username = usernames[index % len(usernames)]
+        async with make_client() as client:
+            for _ in range(args.iterations):
+                client.headers.pop("Authorization", None)
+                await host_game_night(client, recorder, username, rng)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(i) for i in range(args.users)))
+    return recorder.samples, time.perf_counter() - started
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    elif args.base_url:
+        print("--base-url needs --database-url pointing at the server's database")
+        return 2
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="poker-loadtest-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/loadtest.db"
+    # Keep the run representative of production request handling
+    os.environ.setdefault("PROFILING_ENABLED", "false")
+
+    # Settings are read at import time, so import the app only now
+    from app.tools.loadtest import report
+    from app.tools.loadtest.seed import seed
+
+    print(f"Seeding {args.users} hosts into {os.environ['DATABASE_URL']} ...")
+    usernames = seed(args.users, args.sessions_per_user, args.players_per_session)
+
+    print(f"Running {args.users} hosts x {args.iterations} game nights ...")
+    samples, wall_time = asyncio.run(run(args, usernames))
+
+    summary = report.summarize(samples, wall_time)
+    summary["config"] = {
+        "users": args.users,
+        "iterations": args.iterations,
+        "sessions_per_user": args.sessions_per_user,
+        "players_per_session": args.players_per_session,
+        "target": args.base_url or "in-process",
+        "database": "sqlite" if os.environ["DATABASE_URL"].startswith("sqlite") else "postgresql",
+    }
+    baseline = report.load(args.compare) if args.compare else None
+    print(report.render(summary, baseline))
+
+    out_path = args.out / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    report.save(summary, out_path)
+    print(f"Results saved to {out_path}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
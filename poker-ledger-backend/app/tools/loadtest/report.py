@@ -0,0 +1,78 @@
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.tools.loadtest.scenarios import Sample
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[Sample], wall_time: float) -> Dict[str, Any]:
+    by_endpoint: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+
+    endpoints = {}
+    for endpoint, endpoint_samples in sorted(by_endpoint.items()):
+        latencies = sorted(s.latency * 1000 for s in endpoint_samples)
+        errors = sum(1 for s in endpoint_samples if not 200 <= s.status_code < 400)
+        endpoints[endpoint] = {
+            "requests": len(endpoint_samples),
+            "errors": errors,
+            "rps": len(endpoint_samples) / wall_time if wall_time else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1],
+        }
+    return {
+        "wall_time_s": wall_time,
+        "requests": len(samples),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "rps": len(samples) / wall_time if wall_time else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def render(summary: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    header = f"{'endpoint':<48} {'reqs':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    lines = [header]
+    for endpoint, stats in summary["endpoints"].items():
+        line = (
+            f"{endpoint:<48} {stats['requests']:>6} {stats['errors']:>4} "
+            f"{stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+            f"{stats['p99_ms']:>8.1f}"
+        )
+        base = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if base and base["p95_ms"]:
+            change = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+            line += f" {change:>+12.1%}"
+        lines.append(line)
+    lines.append(
+        f"total: {summary['requests']} requests, {summary['errors']} errors, "
+        f"{summary['rps']:.1f} req/s over {summary['wall_time_s']:.1f}s"
+    )
+    if baseline:
+        lines.append(f"baseline: {baseline['rps']:.1f} req/s")
+    return "\n".join(lines)
+
+
+def save(summary: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2, sort_keys=True))
+
+
+def load(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text())
@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, NamedTuple
+
+import httpx
+
+from app.core.config import settings
+from app.tools.loadtest.seed import PASSWORD
+
+API = settings.API_V1_STR
+
+
+class Sample(NamedTuple):
+    endpoint: str
+    status_code: int
+    latency: float
+    started_at: float
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.samples: List[Sample] = []
+
+    async def call(
+        self, endpoint: str, request: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        started_at = time.perf_counter()
+        try:
+            response = await request()
+            status_code = response.status_code
+        except httpx.HTTPError:
+            response, status_code = None, 0
+        self.samples.append(
+            Sample(endpoint, status_code, time.perf_counter() - started_at, started_at)
+        )
+        return response
+
+
+def _ok(response: Any) -> bool:
+    return response is not None and response.status_code < 400
+
+
+async def host_game_night(
+    client: httpx.AsyncClient, recorder: Recorder, username: str, rng: random.Random
+) -> None:
+    """
+    One host running a game: log in, browse sessions, open one, create a new
+    game, seat players, edit cash-outs as the night goes on and settle.
+    """
+    response = await recorder.call(
+        "POST /auth/login",
+        lambda: client.post(
+            f"{API}/auth/login", data={"username": username, "password": PASSWORD}
+        ),
+    )
+    if not _ok(response):
+        return
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    response = await recorder.call(
+        "GET /game-sessions/", lambda: client.get(f"{API}/game-sessions/")
+    )
+    if _ok(response) and response.json():
+        existing = rng.choice(response.json())
+        await recorder.call(
+            "GET /game-sessions/{id}",
+            lambda: client.get(f"{API}/game-sessions/{existing['id']}"),
+        )
+    await recorder.call(
+        "GET /players/unique-names", lambda: client.get(f"{API}/players/unique-names")
+    )
+
+    response = await recorder.call(
+        "POST /game-sessions/",
+        lambda: client.post(
+            f"{API}/game-sessions/",
+            json={"title": "Load test game", "game_date": datetime.utcnow().isoformat()},
+        ),
+    )
+    if not _ok(response):
+        return
+    game_session_id = response.json()["id"]
+
+    player_ids = []
+    for seat in range(rng.randint(4, 9)):
+        response = await recorder.call(
+            "POST /game-sessions/{id}/players",
+            lambda: client.post(
+                f"{API}/game-sessions/{game_session_id}/players",
+                json={"name": f"player{seat}", "buy_in": 100.0},
+            ),
+        )
+        if _ok(response):
+            player_ids.append(response.json()["id"])
+
+    for player_id in player_ids:
+        cash_out = float(rng.randint(0, 200))
+        await recorder.call(
+            "PUT /players/players/{id}",
+            lambda: client.put(
+                f"{API}/players/players/{player_id}", json={"cash_out": cash_out}
+            ),
+        )
+
+    await recorder.call(
+        "POST /game-sessions/{id}/calculate-settlements",
+        lambda: client.post(f"{API}/game-sessions/{game_session_id}/calculate-settlements"),
+    )
+    await recorder.call(
+        "GET /game-sessions/{id}",
+        lambda: client.get(f"{API}/game-sessions/{game_session_id}"),
+    )
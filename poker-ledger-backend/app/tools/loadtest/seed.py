@@ -0,0 +1,55 @@
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+from app import models
+from app.core.security import get_password_hash
+from app.db.base_class import Base
+from app.db.session import SessionLocal, get_engine
+
+PASSWORD = "loadtest-password"
+
+
+def seed(users: int, sessions_per_user: int, players_per_session: int) -> List[str]:
+    """
+    Create the schema and fill it with synthetic hosts. Returns the usernames,
+    which all share PASSWORD.
+    """
+    Base.metadata.create_all(get_engine())
+    # bcrypt is deliberately slow; hash once and share it across all users
+    hashed_password = get_password_hash(PASSWORD)
+    rng = random.Random(42)
+    usernames = []
+    db = SessionLocal()
+    try:
+        for u in range(users):
+            username = f"host{u}"
+            user = models.User(
+                email=f"{username}@loadtest.local",
+                username=username,
+                hashed_password=hashed_password,
+            )
+            db.add(user)
+            db.flush()
+            for s in range(sessions_per_user):
+                game_session = models.GameSession(
+                    title=f"Home game {s}",
+                    game_date=datetime.utcnow() - timedelta(days=7 * s),
+                    owner_id=user.id,
+                )
+                db.add(game_session)
+                db.flush()
+                db.add_all(
+                    models.Player(
+                        name=f"player{p}",
+                        buy_in=100.0,
+                        cash_out=float(rng.randint(0, 200)),
+                        game_session_id=game_session.id,
+                    )
+                    for p in range(players_per_session)
+                )
+            usernames.append(username)
+        db.commit()
+    finally:
+        db.close()
+    return usernames
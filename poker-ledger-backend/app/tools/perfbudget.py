@@ -0,0 +1,341 @@
+"""
+Query-count and allocation budgets per endpoint.
+
+Seeds fixtures of increasing size into a throwaway SQLite database, calls every
+route the app serves once per fixture and checks that:
+
+- the number of SQL statements is the same for every fixture size (no lazy-load
+  storms), and equal to the budgeted count;
+- the peak Python allocation (tracemalloc) stays under the budget for that
+  fixture size.
+
+Budgets live in perf_budgets.json next to this file. A route that has
+neither a scenario nor a SKIPPED_ROUTES entry is a failure, so new endpoints
+cannot go unmeasured. tests/test_perfbudget.py runs the same checks under
+pytest.
+
+    python -m app.tools.perfbudget            # check, exit 1 on regressions
+    python -m app.tools.perfbudget --update   # rewrite budgets from this run
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+BUDGETS_PATH = Path(__file__).with_name("perf_budgets.json")
+
+# (sessions, players per session)
+FIXTURES: List[Tuple[int, int]] = [(1, 10), (10, 10), (100, 10), (10, 100), (10, 500)]
+
+# Headroom applied to measured peaks when budgets are rewritten with --update
+PEAK_HEADROOM = 1.5
+
+# Routes that are not request/response shaped and cannot be measured this way
+SKIPPED_ROUTES = {
+    "GET /game-sessions/{game_session_id}/events": "infinite SSE stream",
+    "WEBSOCKET /game-sessions/{game_session_id}/ws": "WebSocket",
+    "GET /admin/profiles/{profile_id}": "needs a captured profile",
+    "GET /admin/profiles/{profile_id}/collapsed": "needs a captured profile",
+    "GET /jobs/{job_id}": "job state depends on worker timing",
+    "GET /jobs/{job_id}/result": "job state depends on worker timing",
+    "POST /jobs/{job_id}/cancel": "job state depends on worker timing",
+}
+
+
+class Measurement(NamedTuple):
+    status_code: int
+    queries: int
+    peak_kib: int
+
+
+def app_routes() -> List[str]:
+    """
+    "METHOD /path" of every route the app serves, as used in scenarios:
+    paths under API_V1_STR without the prefix, others as they are. The
+    OpenAPI and docs pages FastAPI adds are left out.
+    """
+    from fastapi.routing import APIRoute, APIWebSocketRoute
+
+    from app.core.config import settings
+    from app.main import app
+
+    routes = []
+    for route in app.routes:
+        if isinstance(route, APIWebSocketRoute):
+            methods = ["WEBSOCKET"]
+        elif isinstance(route, APIRoute):
+            methods = sorted(route.methods)
+        else:
+            continue
+        path = route.path
+        if path.startswith(f"{settings.API_V1_STR}/"):
+            path = path[len(settings.API_V1_STR):]
+        routes.extend(f"{method} {path}" for method in methods)
+    return routes
+
+
+def scenario_routes() -> List[str]:
+    return [route for route, _ in _scenarios({"session_ids": [0], "player_ids": [0, 0]})]
+
+
+def uncovered_routes() -> List[str]:
+    """
+    Routes with neither a scenario nor a SKIPPED_ROUTES entry.
+    """
+    covered = set(scenario_routes()) | set(SKIPPED_ROUTES)
+    return [route for route in app_routes() if route not in covered]
+
+
+def fixture_label(fixture: Tuple[int, int]) -> str:
+    return f"{fixture[0]}x{fixture[1]}"
+
+
+def _seed(sessions: int, players: int) -> Dict[str, Any]:
+    from app import models
+    from app.core.security import get_password_hash
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user = models.User(
+            email="budget@example.com",
+            username="budget",
+            hashed_password=get_password_hash("budget"),
+            is_superuser=True,
+        )
+        db.add(user)
+        db.flush()
+        session_ids = []
+        for s in range(sessions):
+            game_session = models.GameSession(
+                title=f"Session {s}", game_date=datetime(2025, 1, 1), owner_id=user.id
+            )
+            db.add(game_session)
+            db.flush()
+            db.add_all(
+                models.Player(
+                    name=f"player{p}",
+                    buy_in=100.0,
+                    cash_out=float((p * 37) % 200),
+                    game_session_id=game_session.id,
+                )
+                for p in range(players)
+            )
+            session_ids.append(game_session.id)
+        db.commit()
+        player_ids = [
+            row[0]
+            for row in db.query(models.Player.id)
+            .filter(models.Player.game_session_id == session_ids[0])
+            .all()
+        ]
+        return {"session_ids": session_ids, "player_ids": player_ids}
+    finally:
+        db.close()
+
+
+def _scenarios(ids: Dict[str, Any]) -> List[Tuple[str, Callable[[Any, dict], Any]]]:
+    """
+    (route, call) pairs in execution order; reads first, destructive calls last.
+    """
+    from app.core.config import settings
+
+    api = settings.API_V1_STR
+    first_session = ids["session_ids"][0]
+    first_player, second_player = ids["player_ids"][0], ids["player_ids"][1]
+    new_session = {"title": "New", "game_date": "2025-01-01T00:00:00"}
+
+    return [
+        ("POST /auth/login", lambda c, h: c.post(
+            f"{api}/auth/login", data={"username": "budget", "password": "budget"})),
+        ("GET /auth/me", lambda c, h: c.get(f"{api}/auth/me", headers=h)),
+        ("POST /auth/register", lambda c, h: c.post(f"{api}/auth/register", json={
+            "email": "new@example.com", "username": "new", "password": "pw"})),
+        ("GET /", lambda c, h: c.get("/")),
+        ("GET /health", lambda c, h: c.get("/health")),
+        ("GET /metrics", lambda c, h: c.get("/metrics")),
+        ("GET /game-sessions/", lambda c, h: c.get(f"{api}/game-sessions/", headers=h)),
+        ("GET /game-sessions/{id}", lambda c, h: c.get(
+            f"{api}/game-sessions/{first_session}", headers=h)),
+        ("GET /players/players/{player_id}/events", lambda c, h: c.get(
+            f"{api}/players/players/{first_player}/events", headers=h)),
+        ("GET /players/unique-names", lambda c, h: c.get(
+            f"{api}/players/unique-names", headers=h)),
+        ("GET /analytics/head-to-head", lambda c, h: c.get(
+            f"{api}/analytics/head-to-head", headers=h)),
+        ("GET /analytics/pnl", lambda c, h: c.get(f"{api}/analytics/pnl", headers=h)),
+        ("GET /sync/", lambda c, h: c.get(f"{api}/sync/", headers=h)),
+        ("GET /search/game-sessions", lambda c, h: c.get(
+            f"{api}/search/game-sessions", params={"q": "session"}, headers=h)),
+        ("POST /game-sessions/{game_session_id}/settlements/preview", lambda c, h: c.post(
+            f"{api}/game-sessions/{first_session}/settlements/preview",
+            json={"players": [{"id": first_player, "cash_out": 1.0}]}, headers=h)),
+        ("GET /jobs/", lambda c, h: c.get(f"{api}/jobs/", headers=h)),
+        ("GET /admin/profiles/", lambda c, h: c.get(f"{api}/admin/profiles/", headers=h)),
+        ("POST /game-sessions/", lambda c, h: c.post(
+            f"{api}/game-sessions/", json=new_session, headers=h)),
+        ("POST /jobs/", lambda c, h: c.post(
+            f"{api}/jobs/", json={"kind": "export-sessions"}, headers=h)),
+        ("PUT /game-sessions/{id}", lambda c, h: c.put(
+            f"{api}/game-sessions/{first_session}", json={"title": "Renamed"}, headers=h)),
+        ("POST /game-sessions/{game_session_id}/players", lambda c, h: c.post(
+            f"{api}/game-sessions/{first_session}/players", json={"name": "late"}, headers=h)),
+        ("PUT /players/players/{player_id}", lambda c, h: c.put(
+            f"{api}/players/players/{first_player}", json={"cash_out": 5.0}, headers=h)),
+        ("POST /players/players/{player_id}/events", lambda c, h: c.post(
+            f"{api}/players/players/{first_player}/events",
+            json={"kind": "rebuy", "amount": 50.0}, headers=h)),
+        ("DELETE /players/players/{player_id}", lambda c, h: c.delete(
+            f"{api}/players/players/{second_player}", headers=h)),
+        ("POST /game-sessions/{game_session_id}/calculate-settlements", lambda c, h: c.post(
+            f"{api}/game-sessions/{first_session}/calculate-settlements", headers=h)),
+        # Delete the session settled above so every fixture cascades the same tables
+        ("DELETE /game-sessions/{id}", lambda c, h: c.delete(
+            f"{api}/game-sessions/{first_session}", headers=h)),
+    ]
+
+
+def measure_fixture(sessions: int, players: int) -> Dict[str, Measurement]:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.db.base_class import Base
+    from app.db.session import get_engine
+    from app.main import app
+
+    engine = get_engine()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    ids = _seed(sessions, players)
+
+    query_count = 0
+
+    def count_query(*args: Any) -> None:
+        nonlocal query_count
+        query_count += 1
+
+    client = TestClient(app)
+    token = client.post(
+        "/api/v1/auth/login", data={"username": "budget", "password": "budget"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    results = {}
+    event.listen(engine, "before_cursor_execute", count_query)
+    tracemalloc.start()
+    try:
+        for route, call in _scenarios(ids):
+            query_count = 0
+            # Collect garbage left by the previous call so it does not count here
+            gc.collect()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            response = call(client, headers)
+            _, peak = tracemalloc.get_traced_memory()
+            results[route] = Measurement(
+                response.status_code, query_count, max(peak - baseline, 0) // 1024
+            )
+    finally:
+        tracemalloc.stop()
+        event.remove(engine, "before_cursor_execute", count_query)
+    return results
+
+
+def check(
+    measurements: Dict[str, Dict[str, Measurement]], budgets: Dict[str, Any]
+) -> List[str]:
+    failures = []
+    routes = next(iter(measurements.values())).keys()
+    for route in routes:
+        per_fixture = {label: m[route] for label, m in measurements.items()}
+        budget = budgets.get(route)
+        if budget is None:
+            failures.append(f"{route}: no budget (run with --update)")
+            continue
+        for label, m in per_fixture.items():
+            if m.status_code >= 400:
+                failures.append(f"{route} [{label}]: HTTP {m.status_code}")
+        counts = {m.queries for m in per_fixture.values()}
+        if len(counts) > 1:
+            detail = ", ".join(f"{label}={m.queries}" for label, m in per_fixture.items())
+            failures.append(f"{route}: query count grows with data size ({detail})")
+        for label, m in per_fixture.items():
+            if m.queries > budget["queries"]:
+                failures.append(
+                    f"{route} [{label}]: {m.queries} queries > budget {budget['queries']}"
+                )
+            peak_budget = budget["peak_kib"].get(label)
+            if peak_budget is not None and m.peak_kib > peak_budget:
+                failures.append(
+                    f"{route} [{label}]: peak {m.peak_kib} KiB > budget {peak_budget} KiB"
+                )
+    return failures
+
+
+def load_budgets() -> Dict[str, Any]:
+    return json.loads(BUDGETS_PATH.read_text()) if BUDGETS_PATH.exists() else {}
+
+
+def build_budgets(measurements: Dict[str, Dict[str, Measurement]]) -> Dict[str, Any]:
+    routes = next(iter(measurements.values())).keys()
+    return {
+        route: {
+            "queries": max(m[route].queries for m in measurements.values()),
+            "peak_kib": {
+                label: int(m[route].peak_kib * PEAK_HEADROOM) + 16
+                for label, m in measurements.items()
+            },
+        }
+        for route in routes
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check per-endpoint query and allocation budgets")
+    parser.add_argument("--update", action="store_true", help="rewrite the budgets file")
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.mkdtemp(prefix="poker-perfbudget-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/perfbudget.db"
+    os.environ["PROFILING_ENABLED"] = "false"
+
+    measurements: Dict[str, Dict[str, Measurement]] = {}
+    for fixture in FIXTURES:
+        measurements[fixture_label(fixture)] = measure_fixture(*fixture)
+
+    labels = list(measurements)
+    print(f"{'route':<58} " + " ".join(f"{label:>14}" for label in labels))
+    for route in next(iter(measurements.values())):
+        cells = [
+            f"{measurements[label][route].queries:>3}q {measurements[label][route].peak_kib:>7}K"
+            for label in labels
+        ]
+        print(f"{route:<58} " + " ".join(f"{cell:>14}" for cell in cells))
+    for route, reason in SKIPPED_ROUTES.items():
+        print(f"{route:<58} skipped: {reason}")
+
+    if args.update:
+        BUDGETS_PATH.write_text(json.dumps(build_budgets(measurements), indent=2) + "\n")
+        print(f"Budgets written to {BUDGETS_PATH}")
+        return 0
+
+    failures = [
+        f"{route}: not measured; add a scenario or a SKIPPED_ROUTES entry"
+        for route in uncovered_routes()
+    ]
+    failures.extend(check(measurements, load_budgets()))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("All endpoints within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,412 @@
+"""
+Run the API on a self-hosted node: a master process binds the port and
+keeps SERVER_WORKERS uvicorn workers (one per core by default) serving it.
+
+    python -m app.tools.server --host 0.0.0.0 --port 8000
+
+- Workers use uvloop and httptools when installed, and open database
+  connections and load bcrypt and python-jose before they accept a request.
+- A worker exits after SERVER_MAX_REQUESTS requests (plus jitter) and is
+  replaced, which bounds slow memory growth.
+- `kill -HUP <master pid>` restarts the workers one at a time on freshly
+  imported code: each old worker is stopped only once its replacement is
+  serving, and finishes its in-flight requests first.
+- SIGTERM or SIGINT stops everything gracefully.
+- Every process writes its stats to SERVER_STATS_DIR, which /health
+  reports (see app.core.server_stats).
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+APP = "app.main:app"
+
+
+def default_workers() -> int:
+    # Respects CPU pinning (containers, taskset) where the platform has it
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _implementation(module: str, fallback: str) -> str:
+    return module if importlib.util.find_spec(module) is not None else fallback
+
+
+def prewarm() -> None:
+    """
+    Pay before the first request for what would otherwise slow it down:
+    database connections (SERVER_PREWARM_CONNECTIONS per database, left in
+    the pool), the bcrypt backend and python-jose.
+    """
+    from app.core import security
+    from app.core.config import settings
+    from app.db.session import get_engine
+
+    engines = [get_engine()]
+    if settings.SHARDS:
+        from app.db.sharding import get_shards
+
+        shards = get_shards()
+        engines += [shards.engine(shard) for shard in shards.urls]
+    for engine in engines:
+        connections = [engine.connect() for _ in range(max(settings.SERVER_PREWARM_CONNECTIONS, 1))]
+        for connection in connections:
+            connection.close()
+
+    security.get_password_hash("prewarm")
+    security.decode_access_token(security.create_access_token({"sub": "prewarm"}))
+
+
+def _worker_server(config: Any) -> Any:
+    import uvicorn
+
+    class WorkerServer(uvicorn.Server):
+        async def shutdown(self, sockets: Optional[List[socket.socket]] = None) -> None:
+            for server in self.servers:
+                server.close()
+            # A connection accepted just before the listener closed has not
+            # sent its request yet, and uvicorn would close it unanswered;
+            # give it a moment to arrive
+            deadline = time.monotonic() + 1.0
+            while time.monotonic() < deadline and any(
+                connection.cycle is None for connection in self.server_state.connections
+            ):
+                await asyncio.sleep(0.02)
+            await super().shutdown(sockets)
+
+    return WorkerServer(config)
+
+
+class _Reporter:
+    """
+    Writes a worker's stats file, and tells the master once it is serving.
+    """
+
+    def __init__(self, server: Any, ready: Any, generation: int, max_requests: Optional[int]) -> None:
+        from app.core import server_stats
+        from app.core.config import settings
+
+        self.server = server
+        self.ready = ready
+        self.generation = generation
+        self.max_requests = max_requests
+        self.directory = settings.SERVER_STATS_DIR
+        self.interval = settings.SERVER_STATS_INTERVAL_SECONDS
+        self.name = server_stats.worker_file(os.getpid())
+        self.started_at = time.time()
+
+    def write(self) -> None:
+        from app.core import server_stats
+
+        state = self.server.server_state
+        server_stats.write(
+            self.directory,
+            self.name,
+            {
+                "pid": os.getpid(),
+                "generation": self.generation,
+                "started_at": self.started_at,
+                "ready": self.server.started,
+                "draining": self.server.should_exit,
+                "requests": state.total_requests,
+                "connections": len(state.connections),
+                "max_requests": self.max_requests,
+                # Kilobytes on Linux
+                "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            },
+        )
+
+    def run(self) -> None:
+        while True:
+            if self.server.started and not self.ready.is_set():
+                self.ready.set()
+            self.write()
+            # Poll quickly until serving; a rolling restart waits on it
+            time.sleep(self.interval if self.ready.is_set() else 0.05)
+
+
+def serve(sockets: List[socket.socket], options: Dict[str, Any], ready: Any, generation: int) -> None:
+    """
+    A worker process: load and warm up the app, then serve the master's
+    sockets until told to stop or max requests is reached.
+    """
+    # Meant for the master; a terminal hangup reaches the whole group
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    import uvicorn
+
+    config = uvicorn.Config(APP, **options)
+    config.load()
+    prewarm()
+    server = _worker_server(config)
+    reporter = _Reporter(server, ready, generation, options["limit_max_requests"])
+    threading.Thread(target=reporter.run, name="server-stats", daemon=True).start()
+    server.run(sockets=sockets)
+    # The master adds this final count to the server's total
+    reporter.write()
+
+
+class _Worker:
+    def __init__(self, process: Any, ready: Any, generation: int) -> None:
+        self.process = process
+        self.ready = ready
+        self.generation = generation
+        # Stopped on purpose, so not replaced when it exits
+        self.retiring = False
+
+
+class Server:
+    """
+    The master process: starts, replaces and rolls workers; it never
+    imports the app itself.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        max_requests: int,
+        max_requests_jitter: int,
+        graceful_timeout: int,
+        boot_timeout: float,
+        stats_dir: str,
+    ) -> None:
+        import uvicorn
+
+        self.size = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.boot_timeout = boot_timeout
+        self.stats_dir = stats_dir
+        self.options = {
+            "host": host,
+            "port": port,
+            "loop": _implementation("uvloop", "asyncio"),
+            "http": _implementation("httptools", "h11"),
+            "timeout_graceful_shutdown": graceful_timeout,
+        }
+        # Bound once here and shared, so restarting workers never refuses
+        # connections; the kernel queues them for whichever worker accepts
+        self.sockets = [uvicorn.Config(APP, host=host, port=port).bind_socket()]
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: List[_Worker] = []
+        self.generation = 0
+        self.started_at = time.time()
+        self.reloads = 0
+        self.replaced = 0
+        self.exited_requests = 0
+        self.boot_failures = 0
+        self.stopping = False
+        self.reloading = False
+
+    def _spawn(self) -> _Worker:
+        options = dict(self.options)
+        options["limit_max_requests"] = (
+            self.max_requests + random.randint(0, self.max_requests_jitter) if self.max_requests > 0 else None
+        )
+        ready = self.context.Event()
+        process = self.context.Process(
+            target=serve,
+            args=(self.sockets, options, ready, self.generation),
+            name=f"api-worker-{self.generation}",
+        )
+        process.start()
+        worker = _Worker(process, ready, self.generation)
+        self.workers.append(worker)
+        return worker
+
+    def _retire(self, worker: _Worker) -> None:
+        worker.retiring = True
+        if worker.process.is_alive():
+            # uvicorn stops accepting and finishes in-flight requests
+            worker.process.terminate()
+
+    def _write_stats(self) -> None:
+        from app.core import server_stats
+
+        server_stats.write(
+            self.stats_dir,
+            server_stats.SERVER_FILE,
+            {
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "target_workers": self.size,
+                "generation": self.generation,
+                "reloads": self.reloads,
+                "replaced_workers": self.replaced,
+                "exited_requests": self.exited_requests,
+                "loop": self.options["loop"],
+                "http": self.options["http"],
+            },
+        )
+
+    def _pause(self, seconds: float) -> None:
+        deadline = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    def _reap(self) -> None:
+        from app.core import server_stats
+
+        for worker in [worker for worker in self.workers if not worker.process.is_alive()]:
+            worker.process.join()
+            self.workers.remove(worker)
+            name = server_stats.worker_file(worker.process.pid)
+            last = server_stats.load(os.path.join(self.stats_dir, name))
+            if last is not None:
+                self.exited_requests += last["requests"]
+            server_stats.remove(self.stats_dir, name)
+            if worker.retiring or self.stopping:
+                continue
+
+            self.replaced += 1
+            if worker.process.exitcode == 0:
+                # Usually max requests; uvicorn logs the reason
+                logger.info("Worker %s exited; starting a replacement", worker.process.pid)
+            else:
+                logger.warning(
+                    "Worker %s died with exit code %s; starting a replacement",
+                    worker.process.pid,
+                    worker.process.exitcode,
+                )
+            if worker.ready.is_set():
+                self.boot_failures = 0
+            else:
+                # Do not spin on an app that cannot start
+                self.boot_failures += 1
+                self._pause(min(2 ** self.boot_failures, 30))
+            self._spawn()
+        self._write_stats()
+
+    def _wait_ready(self, worker: _Worker) -> bool:
+        deadline = time.monotonic() + self.boot_timeout
+        while not self.stopping and time.monotonic() < deadline:
+            if worker.ready.wait(0.1):
+                return True
+            if not worker.process.is_alive():
+                return False
+        return False
+
+    def _rolling_restart(self) -> None:
+        self.generation += 1
+        old = [worker for worker in self.workers if worker.generation < self.generation]
+        logger.info("Rolling restart of %s workers (generation %s)", len(old), self.generation)
+        for worker in old:
+            if not worker.process.is_alive():
+                continue
+            replacement = self._spawn()
+            if not self._wait_ready(replacement):
+                if not self.stopping:
+                    logger.error("New worker did not start; keeping the remaining old workers")
+                self._retire(replacement)
+                return
+            self._retire(worker)
+        self.reloads += 1
+        logger.info("Rolling restart done")
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        if signum == signal.SIGHUP:
+            self.reloading = True
+        else:
+            self.stopping = True
+
+    def run(self) -> int:
+        for signum in (signal.SIGHUP, signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._on_signal)
+        host, port = self.options["host"], self.options["port"]
+        logger.info(
+            "Serving on http://%s:%s with %s workers (%s, %s), master pid %s",
+            host, port, self.size, self.options["loop"], self.options["http"], os.getpid(),
+        )
+        for _ in range(self.size):
+            self._spawn()
+        while not self.stopping:
+            if self.reloading:
+                self.reloading = False
+                self._rolling_restart()
+            self._reap()
+            time.sleep(0.2)
+        self._shutdown()
+        return 0
+
+    def _shutdown(self) -> None:
+        logger.info("Stopping %s workers", len(self.workers))
+        for worker in self.workers:
+            self._retire(worker)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        for worker in self.workers:
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                logger.warning("Worker %s did not stop in time; killing it", worker.process.pid)
+                worker.process.kill()
+                worker.process.join()
+        self._reap()
+        for sock in self.sockets:
+            sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Run the API with multiple uvicorn workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS or default_workers())
+    parser.add_argument("--max-requests", type=int, default=settings.SERVER_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.SERVER_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS)
+    parser.add_argument("--boot-timeout", type=float, default=settings.SERVER_BOOT_TIMEOUT_SECONDS)
+    parser.add_argument(
+        "--stats-dir",
+        default=settings.SERVER_STATS_DIR,
+        help="Directory for the processes' stats files (default: a temporary one)",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    stats_dir = args.stats_dir or tempfile.mkdtemp(prefix="poker-ledger-server-")
+    os.makedirs(stats_dir, exist_ok=True)
+    # Workers inherit the environment, so their settings find it
+    os.environ["SERVER_STATS_DIR"] = stats_dir
+
+    server = Server(
+        args.host,
+        args.port,
+        args.workers,
+        args.max_requests,
+        args.max_requests_jitter,
+        args.graceful_timeout,
+        args.boot_timeout,
+        stats_dir,
+    )
+    try:
+        return server.run()
+    finally:
+        from app.core import server_stats
+
+        server_stats.remove(stats_dir, server_stats.SERVER_FILE)
+        if not args.stats_dir:
+            shutil.rmtree(stats_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
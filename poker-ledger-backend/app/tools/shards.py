@@ -0,0 +1,444 @@
+"""
+Set up and rebalance owner-partitioned storage (see app.db.sharding).
+
+    python -m app.tools.shards init                    # schema and id range on every shard
+    python -m app.tools.shards status                  # owners per shard, pending moves
+    python -m app.tools.shards rebalance [--dry-run]   # move owners to the ring's shard
+    python -m app.tools.shards rebalance --drain 3     # empty shard 3 before removing it
+    python -m app.tools.shards move 42 2               # move owner 42 to shard 2 and pin it
+    python -m app.tools.shards release 42              # forget owner 42's routed sessions
+
+A move marks the owner as moving (their requests get a 503), waits until
+no session routed to the source is still open (see routed_sessions in
+shard_placements), copies the owner's rows to the target in one
+transaction, points the placement at the target and then deletes the
+rows from the source. An interrupted move is finished by the next
+rebalance; rows a crash left behind on a source are removed then too.
+
+An owner whose sessions are still open after --drain-seconds is not
+moved. A process killed mid-request never closes its sessions; once it is
+gone, `release` clears the owner's count so the move can go ahead.
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Rows per INSERT batch while copying an owner
+COPY_BATCH_ROWS = 5_000
+
+# Owners marked as moving together, sharing one wait for in-flight requests
+MOVE_BATCH_OWNERS = 100
+
+# How often a move checks whether in-flight sessions have closed
+DRAIN_POLL_SECONDS = 0.1
+
+
+class ShardError(Exception):
+    pass
+
+
+def init_shard(shard: str) -> None:
+    """
+    Create any missing tables on a shard and start its id sequences at the
+    shard's range.
+    """
+    from sqlalchemy import text
+
+    import app.models  # noqa: F401  (registers the tables)
+    from app.db.base_class import Base
+    from app.db.sharding import OWNER_TABLES, get_shards
+
+    shards = get_shards()
+    engine = shards.engine(shard)
+    Base.metadata.create_all(engine)
+    start = shards.id_range(shard).start
+    with engine.begin() as connection:
+        for table in OWNER_TABLES:
+            if engine.dialect.name == "sqlite":
+                # Only AUTOINCREMENT tables take their next id from sqlite_sequence
+                ddl = connection.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :table"),
+                    {"table": table},
+                ).scalar()
+                if "AUTOINCREMENT" not in ddl.upper():
+                    raise ShardError(
+                        f"{table} on shard {shard} was created without AUTOINCREMENT; "
+                        "create SQLite shards with this tool"
+                    )
+                connection.execute(
+                    text(
+                        "INSERT INTO sqlite_sequence (name, seq) SELECT :table, 0 "
+                        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :table)"
+                    ),
+                    {"table": table},
+                )
+                connection.execute(
+                    text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :table AND seq < :seq"),
+                    {"table": table, "seq": max(start - 1, 0)},
+                )
+            else:
+                connection.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                        f"greatest(:start, (SELECT coalesce(max(id), 0) + 1 FROM {table})), false)"
+                    ),
+                    {"start": max(start, 1)},
+                )
+
+
+def _delete_owner_rows(connection: Any, owner_id: int) -> None:
+    from sqlalchemy import delete
+
+    from app import models
+
+    # Players, ledger events and settlements go with their sessions
+    connection.execute(delete(models.GameSession.__table__).where(models.GameSession.owner_id == owner_id))
+    connection.execute(delete(models.Tombstone.__table__).where(models.Tombstone.owner_id == owner_id))
+    connection.execute(delete(models.SyncCounter.__table__).where(models.SyncCounter.owner_id == owner_id))
+
+
+def _copy_owner(owner_id: int, source: str, target: str) -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    from app import models
+    from app.db import sync
+    from app.db.base_class import Base
+    from app.db.session import get_engine
+    from app.db.sharding import OWNER_TABLES, add_user_stub, get_shards, owner_rows
+
+    shards = get_shards()
+    with get_engine().connect() as directory:
+        user = directory.execute(
+            select(models.User.__table__).where(models.User.id == owner_id)
+        ).mappings().one()
+
+    counts: Dict[str, int] = {}
+    with shards.engine(source).connect() as reader, shards.engine(target).begin() as writer:
+        # Rows left by an interrupted copy
+        _delete_owner_rows(writer, owner_id)
+        add_user_stub(writer, user)
+
+        # The owner's sync clients hold cursors from the source's counter;
+        # stamp the copies above anything they can have seen
+        counter = models.SyncCounter.__table__
+        seen = reader.execute(select(counter.c.value).where(counter.c.owner_id == owner_id)).scalar() or 0
+        version = sync.next_version(writer, owner_id, at_least=seen)
+
+        reader = reader.execution_options(yield_per=COPY_BATCH_ROWS)
+        for name in OWNER_TABLES:
+            table = Base.metadata.tables[name]
+            counts[name] = 0
+            query = select(table).where(owner_rows(table, owner_id)).order_by(table.c.id)
+            for rows in reader.execute(query).partitions():
+                batch = [dict(row._mapping) for row in rows]
+                if "change_version" in table.c:
+                    for row in batch:
+                        row["change_version"] = version
+                writer.execute(table.insert(), batch)
+                counts[name] += len(batch)
+            copied = writer.execute(
+                select(func.count()).select_from(table).where(owner_rows(table, owner_id))
+            ).scalar_one()
+            if copied != counts[name]:
+                raise ShardError(f"Copied {copied} of {counts[name]} {name} rows for owner {owner_id}")
+    return counts
+
+
+def _delete_owner(shard: str, owner_id: int) -> None:
+    from sqlalchemy import delete
+
+    from app import models
+    from app.db.sharding import get_shards
+
+    with get_shards().engine(shard).begin() as connection:
+        _delete_owner_rows(connection, owner_id)
+        connection.execute(delete(models.User.__table__).where(models.User.id == owner_id))
+
+
+def _begin_move(owner_id: int, target: str, pin: bool) -> Optional[Dict[str, Any]]:
+    """
+    Mark the owner as moving to target. Returns their placement as it was,
+    or None if there is nothing to copy.
+    """
+    from sqlalchemy import select, update
+
+    from app import models
+    from app.db.session import get_engine
+    from app.db.sharding import add_user_stub, get_shards
+
+    placements = models.ShardPlacement.__table__
+    shards = get_shards()
+    shards.engine(target)  # fail on an unknown shard before changing anything
+    with get_engine().begin() as connection:
+        placement = connection.execute(
+            select(placements).where(placements.c.owner_id == owner_id)
+        ).mappings().first()
+        if placement is None:
+            # Never routed, so there is nothing to copy
+            user = connection.execute(
+                select(models.User.__table__).where(models.User.id == owner_id)
+            ).mappings().one()
+            with shards.engine(target).begin() as shard:
+                add_user_stub(shard, user)
+            connection.execute(placements.insert().values(owner_id=owner_id, shard=target, pinned=pin))
+            return None
+        if placement["moving_to"] not in (None, target):
+            raise ShardError(f"Owner {owner_id} is already moving to shard {placement['moving_to']}")
+        pinned = pin or placement["pinned"]
+        if placement["shard"] == target:
+            connection.execute(
+                update(placements).where(placements.c.owner_id == owner_id).values(pinned=pinned)
+            )
+            return None
+        connection.execute(
+            update(placements)
+            .where(placements.c.owner_id == owner_id)
+            .values(moving_to=target, pinned=pinned)
+        )
+        return dict(placement)
+
+
+def _cancel_move(owner_id: int) -> None:
+    from sqlalchemy import update
+
+    from app import models
+    from app.db.session import get_engine
+
+    placements = models.ShardPlacement.__table__
+    with get_engine().begin() as connection:
+        connection.execute(update(placements).where(placements.c.owner_id == owner_id).values(moving_to=None))
+
+
+def _wait_for_routed_sessions(owner_ids: List[int], timeout: float) -> Dict[int, int]:
+    """
+    Wait up to timeout seconds for the owners' routed sessions to close and
+    return {owner_id: sessions still open} for those that did not.
+    """
+    from sqlalchemy import select
+
+    from app import models
+    from app.db.session import get_engine
+
+    placements = models.ShardPlacement.__table__
+    deadline = time.monotonic() + timeout
+    while True:
+        with get_engine().connect() as connection:
+            busy = dict(
+                connection.execute(
+                    select(placements.c.owner_id, placements.c.routed_sessions).where(
+                        placements.c.owner_id.in_(owner_ids), placements.c.routed_sessions > 0
+                    )
+                ).all()
+            )
+        if not busy or time.monotonic() >= deadline:
+            return busy
+        time.sleep(DRAIN_POLL_SECONDS)
+
+
+def release(owner_id: int) -> int:
+    """
+    Forget the owner's routed sessions, for when the processes that opened
+    them died without closing them. Returns how many there were.
+    """
+    from sqlalchemy import select, update
+
+    from app import models
+    from app.db.session import get_engine
+
+    placements = models.ShardPlacement.__table__
+    with get_engine().begin() as connection:
+        open_sessions = connection.execute(
+            select(placements.c.routed_sessions).where(placements.c.owner_id == owner_id)
+        ).scalar()
+        if open_sessions is None:
+            raise ShardError(f"Owner {owner_id} has no placement")
+        connection.execute(
+            update(placements).where(placements.c.owner_id == owner_id).values(routed_sessions=0)
+        )
+    return open_sessions
+
+
+def _finish_move(owner_id: int, source: str, target: str) -> Dict[str, int]:
+    from sqlalchemy import update
+
+    from app import models
+    from app.db.session import get_engine
+
+    counts = _copy_owner(owner_id, source, target)
+    placements = models.ShardPlacement.__table__
+    with get_engine().begin() as connection:
+        connection.execute(
+            update(placements).where(placements.c.owner_id == owner_id).values(shard=target, moving_to=None)
+        )
+    _delete_owner(source, owner_id)
+    return counts
+
+
+def move_owners(
+    moves: Iterable[tuple], *, drain_seconds: float = 5.0, pin: bool = False
+) -> Iterator[tuple]:
+    """
+    Move each (owner_id, target) as described in the module docstring,
+    yielding (owner_id, source, target, rows copied per table, seconds).
+    All owners are marked first so that one wait covers in-flight requests
+    for the whole batch; drain_seconds bounds that wait. Owners with
+    sessions still open after it are left where they are, and a ShardError
+    names them once the others have moved.
+    """
+    started = []
+    for owner_id, target in moves:
+        placement = _begin_move(owner_id, target, pin)
+        if placement is not None:
+            started.append((owner_id, placement, target))
+    # Sessions routed before the flag was set may still be writing to the
+    # source; copying before they close would lose their writes
+    busy = _wait_for_routed_sessions([owner_id for owner_id, _, _ in started], drain_seconds)
+    for owner_id in busy:
+        _cancel_move(owner_id)
+    for owner_id, placement, target in started:
+        if owner_id in busy:
+            continue
+        began = time.perf_counter()
+        counts = _finish_move(owner_id, placement["shard"], target)
+        yield owner_id, placement["shard"], target, counts, time.perf_counter() - began
+    if busy:
+        owners = ", ".join(f"{owner_id} ({sessions} open)" for owner_id, sessions in sorted(busy.items()))
+        raise ShardError(
+            f"Not moved, sessions still open after {drain_seconds:g}s: {owners}. "
+            "If the processes serving them have died, run `release` for each owner"
+        )
+
+
+def _placements() -> List[Any]:
+    from sqlalchemy import select
+
+    from app import models
+    from app.db.session import get_engine
+
+    with get_engine().connect() as connection:
+        return connection.execute(
+            select(models.ShardPlacement.__table__).order_by(models.ShardPlacement.owner_id)
+        ).mappings().all()
+
+
+def _ring(drain: Iterable[str]) -> Any:
+    from app.core.config import settings
+    from app.db.sharding import HashRing, get_shards
+
+    shards = [shard for shard in get_shards().urls if shard not in set(drain)]
+    return HashRing(shards, settings.SHARD_VNODES)
+
+
+def _planned_moves(drain: Iterable[str]) -> List[tuple]:
+    drain = set(drain)
+    ring = _ring(drain)
+    moves = []
+    for placement in _placements():
+        if placement["moving_to"] is not None:
+            moves.append((placement["owner_id"], placement["shard"], placement["moving_to"]))
+        elif placement["shard"] in drain or not placement["pinned"]:
+            target = ring.shard_for(placement["owner_id"])
+            if target != placement["shard"]:
+                moves.append((placement["owner_id"], placement["shard"], target))
+    return moves
+
+
+def purge_strays() -> int:
+    """
+    Delete owners' rows from shards their placement no longer points at,
+    left behind when a move stopped between switching and deleting.
+    """
+    from sqlalchemy import select
+
+    from app import models
+    from app.db.sharding import get_shards
+
+    homes = {p["owner_id"]: {p["shard"], p["moving_to"]} for p in _placements()}
+    purged = 0
+    for shard in get_shards().urls:
+        with get_shards().engine(shard).connect() as connection:
+            owners = connection.execute(select(models.GameSession.owner_id).distinct()).scalars().all()
+        for owner_id in owners:
+            if owner_id in homes and shard not in homes[owner_id]:
+                _delete_owner(shard, owner_id)
+                purged += 1
+    return purged
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage owner-partitioned storage")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init", help="create tables and id ranges on every shard")
+    commands.add_parser("status", help="owners per shard and pending moves")
+    rebalance = commands.add_parser("rebalance", help="move owners to the shard the ring picks")
+    rebalance.add_argument("--dry-run", action="store_true")
+    rebalance.add_argument("--limit", type=int, help="move at most this many owners")
+    rebalance.add_argument("--drain", action="append", default=[], metavar="SHARD",
+                           help="move everyone off this shard, pinned owners too")
+    rebalance.add_argument("--drain-seconds", type=float, default=5.0,
+                           help="wait at most this long for in-flight requests before copying an owner")
+    move = commands.add_parser("move", help="move one owner and pin them there")
+    move.add_argument("owner_id", type=int)
+    move.add_argument("shard")
+    move.add_argument("--drain-seconds", type=float, default=5.0)
+    release_parser = commands.add_parser("release", help="forget an owner's routed sessions after a crash")
+    release_parser.add_argument("owner_id", type=int)
+    args = parser.parse_args(argv)
+
+    from app.core.config import settings
+
+    if not settings.SHARDS:
+        print("error: SHARDS is not set", file=sys.stderr)
+        return 1
+    from app.db.sharding import get_shards
+
+    try:
+        if args.command == "init":
+            import app.models  # noqa: F401  (registers the tables)
+            from app.db.base_class import Base
+            from app.db.session import get_engine
+
+            Base.metadata.create_all(get_engine())
+            for shard in get_shards().urls:
+                init_shard(shard)
+                print(f"shard {shard}: ready, ids from {get_shards().id_range(shard).start}")
+        elif args.command == "status":
+            placements = _placements()
+            per_shard = Counter(p["shard"] for p in placements)
+            for shard in get_shards().urls:
+                print(f"shard {shard}: {per_shard.get(shard, 0)} owners")
+            moving = [p for p in placements if p["moving_to"] is not None]
+            print(f"{len(_planned_moves([]))} owners to move, {len(moving)} moves interrupted")
+            routed = sum(p["routed_sessions"] for p in placements)
+            print(f"{routed} routed sessions open")
+        elif args.command == "rebalance":
+            moves = _planned_moves(args.drain)[: args.limit]
+            if args.dry_run:
+                for owner_id, source, target in moves:
+                    print(f"owner {owner_id}: shard {source} -> {target}")
+            for start in range(0, 0 if args.dry_run else len(moves), MOVE_BATCH_OWNERS):
+                batch = [(owner_id, target) for owner_id, _, target in moves[start:start + MOVE_BATCH_OWNERS]]
+                for owner_id, source, target, counts, seconds in move_owners(
+                    batch, drain_seconds=args.drain_seconds
+                ):
+                    rows = sum(counts.values())
+                    print(f"owner {owner_id}: shard {source} -> {target}, {rows} rows in {seconds:.2f}s "
+                          f"({rows / seconds if seconds else 0:,.0f} rows/s)")
+            if not args.dry_run:
+                print(f"{len(moves)} owners moved, {purge_strays()} stray copies removed")
+        elif args.command == "release":
+            print(f"owner {args.owner_id}: {release(args.owner_id)} routed sessions released")
+        else:
+            moved = list(move_owners([(args.owner_id, args.shard)], drain_seconds=args.drain_seconds, pin=True))
+            rows = sum(sum(counts.values()) for _, _, _, counts, _ in moved)
+            print(f"owner {args.owner_id}: on shard {args.shard}, {rows} rows copied")
+    except ShardError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
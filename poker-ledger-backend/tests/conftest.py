@@ -0,0 +1,52 @@
+"""
+Shared fixtures. Tests run against a throwaway SQLite database whatever
+DATABASE_URL the environment or .env sets; every test gets empty tables.
+"""
+import os
+import tempfile
+from typing import Dict, Iterator
+
+_database_dir = tempfile.mkdtemp(prefix="poker-ledger-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ["SHARDS"] = ""
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import SessionLocal, get_engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+API = "/api/v1"
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client(db: Session) -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def user(db: Session) -> models.User:
+    return crud.user.create(
+        db, obj_in=schemas.UserCreate(email="alice@example.com", username="alice", password="secret")
+    )
+
+
+@pytest.fixture
+def auth_headers(client: TestClient, user: models.User) -> Dict[str, str]:
+    response = client.post(f"{API}/auth/login", data={"username": "alice", "password": "secret"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,135 @@
+import pytest
+
+from app.services import analytics
+from tests.conftest import API
+
+# (date, {player: (buy_in, cash_out)}); ann nets -20, +10, +5
+SESSIONS = [
+    ("2025-01-01T00:00:00", {"ann": (20, 0), "bob": (0, 20)}),
+    ("2025-01-08T00:00:00", {"ann": (0, 10), "bob": (10, 0)}),
+    ("2025-01-15T00:00:00", {"ann": (0, 5), "bob": (5, 0)}),
+]
+
+
+def settle(client, auth_headers, game_date, players):
+    game_session = client.post(
+        f"{API}/game-sessions/", json={"title": "Friday", "game_date": game_date}, headers=auth_headers
+    ).json()
+    ids = {}
+    for name, (buy_in, cash_out) in players.items():
+        ids[name] = client.post(
+            f"{API}/game-sessions/{game_session['id']}/players",
+            json={"name": name, "buy_in": buy_in, "cash_out": cash_out},
+            headers=auth_headers,
+        ).json()["id"]
+    client.post(f"{API}/game-sessions/{game_session['id']}/calculate-settlements", headers=auth_headers)
+    return game_session["id"], ids
+
+
+@pytest.fixture
+def settled(client, auth_headers):
+    return [settle(client, auth_headers, game_date, players) for game_date, players in SESSIONS]
+
+
+def pnl(client, auth_headers, **params):
+    response = client.get(f"{API}/analytics/pnl", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return {series["name"]: series for series in response.json()["players"]}
+
+
+def head_to_head(client, auth_headers, **params):
+    response = client.get(f"{API}/analytics/head-to-head", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return {(t["from_player"], t["to_player"]): (t["amount"], t["sessions"]) for t in response.json()["transfers"]}
+
+
+def column(series, key):
+    return [point[key] for point in series["points"]]
+
+
+def test_running_and_rolling_sums(client, auth_headers, settled):
+    ann = pnl(client, auth_headers, window=2)["ann"]
+
+    assert column(ann, "game_session_id") == [game_session_id for game_session_id, _ in settled]
+    assert column(ann, "net_result") == [-20, 10, 5]
+    assert column(ann, "cumulative") == [-20, -10, -5]
+    assert column(ann, "rolling") == [-20, -10, 15]
+    assert (ann["sessions"], ann["total"]) == (3, -5)
+
+    # A window of one is each session on its own
+    bob = pnl(client, auth_headers, window=1)["bob"]
+    assert column(bob, "rolling") == column(bob, "net_result") == [20, -10, -5]
+    assert client.get(f"{API}/analytics/pnl", params={"window": 0}, headers=auth_headers).status_code == 422
+
+
+def test_pnl_filters(client, auth_headers, settled):
+    # Totals start at `start`; `end` is exclusive
+    ann = pnl(client, auth_headers, start="2025-01-08T00:00:00", window=5)["ann"]
+    assert column(ann, "cumulative") == [10, 15]
+    ann = pnl(client, auth_headers, end="2025-01-15T00:00:00", window=5)["ann"]
+    assert column(ann, "net_result") == [-20, 10]
+
+    assert list(pnl(client, auth_headers, player="bob")) == ["bob"]
+    assert pnl(client, auth_headers, player="nobody") == {}
+
+
+def test_head_to_head_totals_and_filters(client, auth_headers, settled):
+    assert head_to_head(client, auth_headers) == {("ann", "bob"): (20, 1), ("bob", "ann"): (15, 2)}
+    assert head_to_head(client, auth_headers, start="2025-01-08T00:00:00") == {("bob", "ann"): (15, 2)}
+    assert head_to_head(client, auth_headers, end="2025-01-08T00:00:00") == {("ann", "bob"): (20, 1)}
+    assert head_to_head(client, auth_headers, player="ann") == head_to_head(client, auth_headers)
+    assert head_to_head(client, auth_headers, player="cat") == {}
+
+
+def test_unsettled_sessions_are_left_out(client, auth_headers, settled):
+    client.post(f"{API}/game-sessions/", json={"title": "Open", "game_date": "2025-01-22T00:00:00"}, headers=auth_headers)
+
+    assert pnl(client, auth_headers)["ann"]["sessions"] == 3
+
+
+def test_pending_ledger_events_are_included(client, auth_headers, settled):
+    _, ids = settled[-1]
+    response = client.post(
+        f"{API}/players/players/{ids['ann']}/events", json={"kind": "rebuy", "amount": 10}, headers=auth_headers
+    )
+    assert response.status_code == 201
+
+    ann = pnl(client, auth_headers, window=1)["ann"]
+    assert column(ann, "net_result") == [-20, 10, -5]
+    assert ann["total"] == -15
+
+
+def test_cached_answer_changes_after_a_settlement_write(client, auth_headers, settled, monkeypatch):
+    builds = []
+    original = analytics.head_to_head
+
+    def counted_head_to_head(*args, **kwargs):
+        builds.append(kwargs)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(analytics, "head_to_head", counted_head_to_head)
+    before = head_to_head(client, auth_headers)
+    assert head_to_head(client, auth_headers) == before
+    assert len(builds) == 1
+
+    first_session_id, _ = settled[0]
+    response = client.post(
+        f"{API}/game-sessions/{first_session_id}/calculate-settlements",
+        json={"method": "min-cost-flow", "bank": "host", "forbidden_pairs": [{"from_player": "ann", "to_player": "bob"}]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+    after = head_to_head(client, auth_headers)
+    assert len(builds) == 2
+    assert ("ann", "bob") not in after
+    assert after[("ann", "host")] == after[("host", "bob")] == (20, 1)
+
+
+def test_cached_series_picks_up_a_newly_settled_session(client, auth_headers, settled):
+    assert pnl(client, auth_headers)["ann"]["sessions"] == 3
+
+    settle(client, auth_headers, "2025-01-22T00:00:00", {"ann": (0, 30), "bob": (30, 0)})
+
+    ann = pnl(client, auth_headers)["ann"]
+    assert (ann["sessions"], ann["total"]) == (4, 25)
@@ -0,0 +1,90 @@
+import struct
+import zlib
+
+import pytest
+
+from app import models
+from app.db.base_class import Base
+from app.db.session import get_engine
+from app.tools import backup
+from tests.conftest import API
+
+
+@pytest.fixture
+def exported(client, db, auth_headers, tmp_path):
+    game_session = client.post(
+        f"{API}/game-sessions/",
+        json={"title": "Friday", "description": "Dana's place\\n", "game_date": "2025-01-01T00:00:00"},
+        headers=auth_headers,
+    ).json()
+    for name, buy_in, cash_out in [("Dana", 20, 0), ("Émile", 0, 20)]:
+        client.post(
+            f"{API}/game-sessions/{game_session['id']}/players",
+            json={"name": name, "buy_in": buy_in, "cash_out": cash_out},
+            headers=auth_headers,
+        )
+    client.post(f"{API}/game-sessions/{game_session['id']}/calculate-settlements", headers=auth_headers)
+    path = tmp_path / "ledger.plbk"
+    backup.export(str(path), chunk_rows=1)
+    return path, client.get(f"{API}/game-sessions/{game_session['id']}", headers=auth_headers).json()
+
+
+def test_export_verify_restore_round_trip(client, db, auth_headers, exported):
+    path, before = exported
+    counts = backup.verify(str(path))
+    assert counts == {"users": 1, "game_sessions": 1, "players": 2, "ledger_events": 2, "settlements": 1}
+
+    db.close()
+    engine = get_engine()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    assert backup.restore(str(path)) == counts
+
+    after = client.get(f"{API}/game-sessions/{before['id']}", headers=auth_headers).json()
+    assert {k: v for k, v in after.items() if k != "version"} == {k: v for k, v in before.items() if k != "version"}
+    assert db.query(models.LedgerEvent).count() == 2
+    found = client.get(f"{API}/search/game-sessions", params={"q": "emile"}, headers=auth_headers).json()
+    assert found["total"] == 1
+
+
+def corrupt(path, offset):
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 0x01
+    path.write_bytes(bytes(data))
+
+
+def header_end(path):
+    data = path.read_bytes()
+    (length,) = struct.unpack_from("<I", data, len(backup.MAGIC))
+    return len(backup.MAGIC) + 4 + length + 4
+
+
+def test_corrupt_chunk_is_rejected(exported):
+    path, _ = exported
+    # Inside the first chunk's compressed payload
+    corrupt(path, header_end(path) + struct.calcsize("<HIII") + 2)
+
+    with pytest.raises(backup.BackupError):
+        backup.verify(str(path))
+
+
+@pytest.mark.parametrize("position", [0, 10, -5])
+def test_corrupt_header_is_rejected(exported, position):
+    path, _ = exported
+    manifest_start = len(backup.MAGIC) + 4
+    corrupt(path, (manifest_start if position >= 0 else header_end(path)) + position)
+
+    with pytest.raises(backup.BackupError, match="header"):
+        backup.verify(str(path))
+
+
+def test_edited_header_fails_its_checksum(exported):
+    path, _ = exported
+    data = path.read_bytes()
+    start = len(backup.MAGIC) + 4
+    end = header_end(path) - 4
+    header = data[start:end].replace(b'"float"', b'"int"  ', 1)
+    path.write_bytes(data[:start] + header + struct.pack("<I", zlib.crc32(data[start:end])) + data[end + 4:])
+
+    with pytest.raises(backup.BackupError, match="header is corrupt"):
+        backup.verify(str(path))
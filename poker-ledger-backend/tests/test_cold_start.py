@@ -0,0 +1,59 @@
+"""
+Cold start of the serverless entry point: importing it stays within budget
+and leaves the database and auth setup to the first request that needs it.
+"""
+import subprocess
+import sys
+import threading
+import time
+
+from app.db import session
+from app.tools import importtime
+
+DEFERRED_MODULES = ("passlib", "jose", "bcrypt")
+
+
+def test_entry_point_import_within_budget():
+    records = min(importtime.measure("api.index", runs=3), key=importtime.total_us)
+    assert importtime.total_us(records) / 1000 <= importtime.COLD_START_BUDGET_MS
+
+
+def test_import_defers_engine_and_auth_setup():
+    probe = (
+        "import sys, api.index\n"
+        "from app.db import session\n"
+        f"print(session._engine is None, [m for m in {DEFERRED_MODULES!r} if m in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=importtime.BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == "True []"
+
+
+def test_concurrent_first_use_creates_one_engine(monkeypatch):
+    created = []
+    create = session.create_database_engine
+
+    def slow_create(url):
+        # Widen the window in which a second caller could start its own
+        time.sleep(0.05)
+        engine = create(url)
+        created.append(engine)
+        return engine
+
+    monkeypatch.setattr(session, "_engine", None)
+    monkeypatch.setattr(session, "create_database_engine", slow_create)
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(session.get_engine())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(engine is created[0] for engine in engines)
+    created[0].dispose()
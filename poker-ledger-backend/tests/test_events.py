@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.endpoints import events as events_endpoint
+from app.core.config import settings
+from app.services import events
+from tests.conftest import API
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = events.EventBroker(events.InMemoryBackend())
+    monkeypatch.setattr(events_endpoint, "broker", broker)
+    return broker
+
+
+async def drain(subscription):
+    messages = []
+    while (message := await subscription.get(timeout=0.05)) is not None:
+        messages.append(json.loads(message))
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_every_subscriber_of_the_session(broker):
+    first, second, elsewhere = broker.subscribe(1), broker.subscribe(1), broker.subscribe(2)
+    broker.publish(1, events.PLAYER_UPSERTED, {"id": 7})
+
+    for subscription in (first, second):
+        assert await drain(subscription) == [
+            {"type": events.PLAYER_UPSERTED, "game_session_id": 1, "data": {"id": 7}}
+        ]
+    assert await drain(elsewhere) == []
+
+    first.close()
+    broker.publish(1, events.SESSION_UPDATED)
+    assert await drain(first) == []
+    assert [message["type"] for message in await drain(second)] == [events.SESSION_UPDATED]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_that_falls_behind_is_told_to_resync(broker, monkeypatch):
+    monkeypatch.setattr(settings, "EVENTS_MAX_QUEUE", 2)
+    subscription = broker.subscribe(1)
+    for player_id in range(3):
+        broker.publish(1, events.PLAYER_UPSERTED, {"id": player_id})
+
+    assert await drain(subscription) == [{"type": events.RESYNC}]
+
+    broker.publish(1, events.PLAYER_DELETED, {"id": 9})
+    assert [message["type"] for message in await drain(subscription)] == [events.PLAYER_DELETED]
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_subscribes_only_while_it_runs(broker):
+    stream = events_endpoint._sse_stream(1)
+    assert broker.backend._channels == {}
+
+    assert await stream.__anext__() == ": connected\n\n"
+    broker.publish(1, events.SESSION_UPDATED)
+    assert json.loads((await stream.__anext__())[len("data: "):])["type"] == events.SESSION_UPDATED
+
+    await stream.aclose()
+    assert broker.backend._channels == {}
+
+
+@pytest.fixture
+def game_session_id(client, auth_headers):
+    return client.post(
+        f"{API}/game-sessions/", json={"title": "Friday", "game_date": "2025-01-01T00:00:00"}, headers=auth_headers
+    ).json()["id"]
+
+
+def test_websocket_checks_access_then_forwards_events(client, auth_headers, game_session_id):
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"{API}/game-sessions/{game_session_id}/ws?token={token}") as websocket:
+        client.post(f"{API}/game-sessions/{game_session_id}/players", json={"name": "Dana"}, headers=auth_headers)
+        assert json.loads(websocket.receive_text())["type"] == events.PLAYER_UPSERTED
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"{API}/game-sessions/{game_session_id}/ws?token=bad") as websocket:
+            websocket.receive_text()
+
+
+def test_sse_access_is_checked_before_streaming(client, auth_headers, game_session_id):
+    response = client.get(f"{API}/game-sessions/{game_session_id + 1}/events", headers=auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from app import crud, models, schemas
+from app.core import security
+from app.services import jobs
+from tests.conftest import API
+
+NEW_SESSION = {"title": "Friday", "game_date": "2025-01-01T00:00:00"}
+
+
+def token_headers(user: models.User, minutes: int) -> dict:
+    token = security.create_access_token({"sub": str(user.id)}, timedelta(minutes=minutes))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_retry_with_refreshed_token_is_replayed(client, db, user):
+    first = client.post(
+        f"{API}/game-sessions/", json=NEW_SESSION, headers={**token_headers(user, 10), "Idempotency-Key": "k1"}
+    )
+    retry = client.post(
+        f"{API}/game-sessions/", json=NEW_SESSION, headers={**token_headers(user, 20), "Idempotency-Key": "k1"}
+    )
+
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert db.query(models.GameSession).count() == 1
+
+
+def test_keys_do_not_collide_across_users(client, db, user):
+    other = crud.user.create(
+        db, obj_in=schemas.UserCreate(email="bob@example.com", username="bob", password="secret")
+    )
+    for owner in (user, other):
+        response = client.post(
+            f"{API}/game-sessions/", json=NEW_SESSION, headers={**token_headers(owner, 10), "Idempotency-Key": "k1"}
+        )
+        assert "idempotent-replayed" not in response.headers
+        assert response.json()["owner_id"] == owner.id
+
+
+def test_anonymous_keys_are_scoped_to_method_and_path(client, db):
+    headers = {"Authorization": "Bearer not-a-token", "Idempotency-Key": "k1"}
+    first = client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=headers)
+    retry = client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=headers)
+    other_path = client.put(f"{API}/game-sessions/1", json=NEW_SESSION, headers=headers)
+
+    assert first.status_code == 403
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in other_path.headers
+    scopes = {record.scope for record in db.query(models.IdempotencyKey)}
+    assert len(scopes) == 2
+    assert all(scope.startswith("anon:") for scope in scopes)
+
+
+def test_auth_responses_are_never_stored(client, db):
+    register = {"email": "carol@example.com", "username": "carol", "password": "secret"}
+    client.post(f"{API}/auth/register", json=register, headers={"Idempotency-Key": "k1"})
+    credentials = {"username": "carol", "password": "secret"}
+    logins = [
+        client.post(f"{API}/auth/login", data=credentials, headers={"Idempotency-Key": "k2"}) for _ in range(2)
+    ]
+
+    assert all(login.status_code == 200 for login in logins)
+    assert all("idempotent-replayed" not in login.headers for login in logins)
+    assert db.query(models.IdempotencyKey).count() == 0
+
+
+def test_expired_keys_are_purged_by_job_workers_not_requests(client, db, user):
+    db.add(
+        models.IdempotencyKey(
+            scope=f"user:{user.id}",
+            key="old",
+            method="POST",
+            path="/",
+            request_hash="x",
+            status_code=200,
+            expires_at=datetime.utcnow() - timedelta(seconds=1),
+        )
+    )
+    db.commit()
+    client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers={**token_headers(user, 10), "Idempotency-Key": "k1"})
+    assert db.query(models.IdempotencyKey).filter_by(key="old").count() == 1
+
+    assert jobs.WorkerPool(0, 1.0).purge_expired() == 1
+    assert db.query(models.IdempotencyKey).filter_by(key="old").count() == 0
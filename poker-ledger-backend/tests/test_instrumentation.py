@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.core import metrics
+from app.db.session import create_database_engine
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    engines = []
+
+    def make(name):
+        engine = create_database_engine(f"sqlite:///{tmp_path / name}.db", name=name)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+def test_failed_statement_does_not_leak_its_start_time(make_engine):
+    with make_engine("errors").connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM missing_table")
+        assert conn.info["query_start_time"] == []
+        conn.exec_driver_sql("SELECT 1")
+        assert conn.info["query_start_time"] == []
+
+
+def test_pool_gauges_are_labelled_per_engine(make_engine):
+    busy, idle = make_engine("busy"), make_engine("idle")
+    with busy.connect(), idle.connect():
+        pass
+    with busy.connect():
+        rendered = metrics.registry.render()
+
+    assert 'db_pool_checked_out{engine="busy"} 1' in rendered
+    assert 'db_pool_checked_out{engine="idle"} 0' in rendered
@@ -0,0 +1,143 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.config import settings
+from app.main import app
+from app.models.job import JobStatus
+from app.services import jobs
+
+
+def submit(db: Session, owner: models.User, kind: str = "compact-ledger", **changes) -> models.Job:
+    job = crud.job.create_for_owner(
+        db, kind=kind, payload={}, owner_id=owner.id, max_attempts=settings.JOBS_MAX_ATTEMPTS
+    )
+    for field, value in changes.items():
+        setattr(job, field, value)
+    db.commit()
+    return job
+
+
+@pytest.fixture
+def failing_kind(monkeypatch):
+    calls = []
+
+    def fail(ctx, db, payload):
+        calls.append(ctx.attempt)
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.HANDLERS, "always-fails", fail)
+    return calls
+
+
+def test_claim_takes_oldest_due_job(db, user):
+    later = submit(db, user, run_after=datetime.utcnow() + timedelta(hours=1))
+    first = submit(db, user, run_after=datetime.utcnow() - timedelta(minutes=2))
+    second = submit(db, user, run_after=datetime.utcnow() - timedelta(minutes=1))
+
+    claimed = crud.job.claim_next(db, worker_id="w1")
+    assert claimed.id == first.id
+    assert claimed.status == JobStatus.RUNNING.value
+    assert claimed.locked_by == "w1"
+    assert claimed.attempts == 1
+    assert crud.job.claim_next(db, worker_id="w2").id == second.id
+    # Not due yet
+    assert crud.job.claim_next(db, worker_id="w3") is None
+    db.refresh(later)
+    assert later.status == JobStatus.QUEUED.value
+
+
+def test_claim_is_exclusive(db, user):
+    job = submit(db, user)
+    assert crud.job.claim_next(db, worker_id="w1").id == job.id
+    assert crud.job.claim_next(db, worker_id="w2") is None
+    db.refresh(job)
+    assert job.locked_by == "w1"
+
+
+def test_failed_job_is_retried_with_backoff(db, user, failing_kind):
+    job = submit(db, user, kind="always-fails")
+    claimed = crud.job.claim_next(db, worker_id="w1")
+    before = datetime.utcnow()
+    jobs.run_job(claimed, db)
+
+    db.refresh(job)
+    assert job.status == JobStatus.QUEUED.value
+    assert job.locked_by is None
+    assert "boom" in job.error
+    assert job.run_after >= before + jobs.retry_delay(1)
+    # Backoff doubles with each attempt
+    assert jobs.retry_delay(2) == 2 * jobs.retry_delay(1)
+
+
+def test_job_fails_after_max_attempts(db, user, failing_kind):
+    job = submit(db, user, kind="always-fails")
+    for attempt in range(1, job.max_attempts + 1):
+        job.run_after = datetime.utcnow()
+        db.commit()
+        jobs.run_job(crud.job.claim_next(db, worker_id="w1"), db)
+
+    db.refresh(job)
+    assert failing_kind == list(range(1, job.max_attempts + 1))
+    assert job.status == JobStatus.FAILED.value
+    assert job.finished_at is not None
+    assert crud.job.claim_next(db, worker_id="w1") is None
+
+
+def test_requeue_stale_only_moves_quiet_jobs(db, user):
+    stale = submit(db, user)
+    fresh = submit(db, user)
+    crud.job.claim_next(db, worker_id="w1")
+    crud.job.claim_next(db, worker_id="w2")
+    stale.locked_at = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+
+    assert crud.job.requeue_stale(db, stale_after=timedelta(minutes=10)) == 1
+    db.refresh(stale)
+    db.refresh(fresh)
+    assert stale.status == JobStatus.QUEUED.value
+    assert stale.locked_by is None
+    assert fresh.status == JobStatus.RUNNING.value
+    # The requeued job keeps its attempt count and can be claimed again
+    assert crud.job.claim_next(db, worker_id="w3").attempts == 2
+
+
+def test_requeued_job_out_of_attempts_fails(db, user):
+    job = submit(db, user, status=JobStatus.RUNNING.value, attempts=settings.JOBS_MAX_ATTEMPTS)
+    job.locked_at = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+    crud.job.requeue_stale(db, stale_after=timedelta(minutes=10))
+
+    jobs.run_job(crud.job.claim_next(db, worker_id="w1"), db)
+    db.refresh(job)
+    assert job.status == JobStatus.FAILED.value
+
+
+def test_housekeeping_requeues_stale_jobs_while_running(db, user, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_PURGE_INTERVAL_SECONDS", 0.05)
+    pool = jobs.WorkerPool(workers=0, poll_interval=0.1)
+    pool.start()
+    try:
+        # The worker dies after the pool has started, not before
+        stale = submit(db, user, status=JobStatus.RUNNING.value, attempts=1, locked_by="dead")
+        stale.locked_at = datetime.utcnow() - timedelta(hours=1)
+        db.commit()
+        deadline = time.monotonic() + 5
+        while stale.status != JobStatus.QUEUED.value and time.monotonic() < deadline:
+            time.sleep(0.05)
+            db.refresh(stale)
+    finally:
+        pool.stop()
+    assert stale.status == JobStatus.QUEUED.value
+
+
+def test_app_startup_starts_no_job_threads_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_WORKERS", 0)
+    with TestClient(app):
+        names = [thread.name for thread in threading.enumerate()]
+    assert not [name for name in names if name.startswith("job-")]
@@ -0,0 +1,112 @@
+import pytest
+
+from app import models
+from app.core.config import settings
+from app.models.job import JobStatus
+from app.models.ledger_event import BUY_IN_KINDS
+from app.services import jobs, ledger
+from tests.conftest import API
+
+
+@pytest.fixture
+def game_session_id(client, auth_headers):
+    return client.post(
+        f"{API}/game-sessions/", json={"title": "Friday", "game_date": "2025-01-01T00:00:00"}, headers=auth_headers
+    ).json()["id"]
+
+
+@pytest.fixture
+def player_id(client, auth_headers, game_session_id):
+    return client.post(
+        f"{API}/game-sessions/{game_session_id}/players", json={"name": "Dana", "buy_in": 20}, headers=auth_headers
+    ).json()["id"]
+
+
+def append(client, auth_headers, player_id, kind, amount):
+    response = client.post(
+        f"{API}/players/players/{player_id}/events", json={"kind": kind, "amount": amount}, headers=auth_headers
+    )
+    assert response.status_code == 201
+
+
+def stored(db, player_id):
+    db.expire_all()
+    return db.get(models.Player, player_id)
+
+
+def pending_events(db, player_id):
+    return db.query(models.LedgerEvent).filter_by(player_id=player_id, compacted=False).count()
+
+
+def served_totals(client, auth_headers, game_session_id):
+    [player] = client.get(f"{API}/game-sessions/{game_session_id}", headers=auth_headers).json()["players"]
+    return player["buy_in"], player["cash_out"], player["net_result"]
+
+
+def test_reads_include_pending_events_without_writing(client, db, auth_headers, game_session_id, player_id):
+    before = stored(db, player_id)
+    snapshot = (before.buy_in, before.cash_out, before.version, before.change_version)
+    append(client, auth_headers, player_id, "rebuy", 10)
+    append(client, auth_headers, player_id, "cash-out", 5)
+
+    assert served_totals(client, auth_headers, game_session_id) == (30, 5, -25)
+    listed = client.get(f"{API}/game-sessions/", headers=auth_headers).json()[0]["players"][0]
+    assert (listed["buy_in"], listed["cash_out"]) == (30, 5)
+    assert ledger.pending_totals(db, game_session_ids=[game_session_id]) == {player_id: (10, 5)}
+
+    after = stored(db, player_id)
+    assert (after.buy_in, after.cash_out, after.version, after.change_version) == snapshot
+    assert pending_events(db, player_id) == 2
+
+
+def test_compaction_folds_events_in_once(client, db, auth_headers, game_session_id, player_id):
+    append(client, auth_headers, player_id, "rebuy", 10)
+    append(client, auth_headers, player_id, "add-on", 2.5)
+    before = stored(db, player_id)
+    version, change_version = before.version, before.change_version
+
+    assert ledger.compact(db, game_session_ids=[game_session_id]) == 2
+    assert ledger.compact(db, game_session_ids=[game_session_id]) == 0
+
+    after = stored(db, player_id)
+    assert (after.buy_in, after.cash_out) == (32.5, 0)
+    # A background fold is not an edit: sync clients see it, version checks do not
+    assert after.version == version
+    assert after.change_version > change_version
+    assert pending_events(db, player_id) == 0
+    assert served_totals(client, auth_headers, game_session_id) == (32.5, 0, -32.5)
+
+
+def test_put_records_the_difference_as_an_event(client, db, auth_headers, game_session_id, player_id):
+    append(client, auth_headers, player_id, "rebuy", 10)
+    response = client.put(
+        f"{API}/players/players/{player_id}", json={"buy_in": 50, "cash_out": 70}, headers=auth_headers
+    )
+    assert (response.json()["buy_in"], response.json()["cash_out"]) == (50, 70)
+
+    events = db.query(models.LedgerEvent).filter_by(player_id=player_id).order_by(models.LedgerEvent.id).all()
+    assert [(e.kind, e.amount, e.compacted) for e in events] == [
+        ("buy-in", 20, True),
+        ("rebuy", 10, True),
+        ("buy-in", 20, True),
+        ("cash-out", 70, True),
+    ]
+    # The history adds up to the snapshot
+    player = stored(db, player_id)
+    assert sum(e.amount for e in events if e.kind in BUY_IN_KINDS) == player.buy_in == 50
+    assert sum(e.amount for e in events if e.kind not in BUY_IN_KINDS) == player.cash_out == 70
+
+
+def test_appends_share_one_compaction_job(client, db, auth_headers, game_session_id, player_id, monkeypatch):
+    monkeypatch.setattr(settings, "LEDGER_COMPACT_DELAY_SECONDS", 0)
+    append(client, auth_headers, player_id, "rebuy", 10)
+    append(client, auth_headers, player_id, "cash-out", 5)
+
+    [job] = db.query(models.Job).filter_by(kind="compact-ledger").all()
+    assert jobs.pool.run_once("w1")
+
+    db.refresh(job)
+    assert job.status == JobStatus.SUCCEEDED.value
+    assert pending_events(db, player_id) == 0
+    player = stored(db, player_id)
+    assert (player.buy_in, player.cash_out) == (30, 5)
@@ -0,0 +1,29 @@
+"""
+The query-count and allocation budgets of app.tools.perfbudget, as tests.
+"""
+from app.core import metrics
+from app.tools import perfbudget
+
+
+def test_every_route_is_measured_or_skipped():
+    assert perfbudget.uncovered_routes() == []
+
+
+def test_skipped_routes_exist():
+    assert set(perfbudget.SKIPPED_ROUTES) <= set(perfbudget.app_routes())
+
+
+def test_scenarios_are_unique():
+    routes = perfbudget.scenario_routes()
+    assert len(routes) == len(set(routes))
+
+
+def test_endpoints_within_budget(db):
+    # GET /metrics grows with every series earlier tests recorded; budgets
+    # are for a fresh process, as `python -m app.tools.perfbudget` measures
+    metrics.registry.clear()
+    measurements = {
+        perfbudget.fixture_label(fixture): perfbudget.measure_fixture(*fixture)
+        for fixture in perfbudget.FIXTURES
+    }
+    assert perfbudget.check(measurements, perfbudget.load_budgets()) == []
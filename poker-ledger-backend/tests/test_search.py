@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from app import crud, models, schemas
+from app.services import search
+
+from tests.conftest import API
+
+
+def add_session(db, owner, title, players=()):
+    game_session = models.GameSession(title=title, game_date=datetime(2025, 1, 1), owner_id=owner.id)
+    game_session.players = [models.Player(name=name) for name in players]
+    db.add(game_session)
+    db.commit()
+    return game_session
+
+
+def test_matches_are_limited_to_the_owner(db, user):
+    other = crud.user.create(
+        db, obj_in=schemas.UserCreate(email="bob@example.com", username="bob", password="secret")
+    )
+    mine = add_session(db, user, "Friday poker", ["Dana"])
+    add_session(db, other, "Friday poker", ["Dana"])
+
+    total, hits = search.search_game_sessions(db, owner_id=user.id, query="fri dan")
+    assert total == 1
+    assert [game_session.id for game_session, _ in hits] == [mine.id]
+
+
+def test_index_follows_owner_changes(db, user):
+    other = crud.user.create(
+        db, obj_in=schemas.UserCreate(email="bob@example.com", username="bob", password="secret")
+    )
+    game_session = add_session(db, user, "Home game")
+    game_session.owner_id = other.id
+    db.commit()
+
+    assert search.search_game_sessions(db, owner_id=user.id, query="home")[0] == 0
+    assert search.search_game_sessions(db, owner_id=other.id, query="home")[0] == 1
+
+
+def test_page_past_the_end_keeps_the_total(db, user):
+    for night in range(3):
+        add_session(db, user, f"Friday {night}")
+
+    total, hits = search.search_game_sessions(db, owner_id=user.id, query="friday", skip=2, limit=2)
+    assert (total, len(hits)) == (3, 1)
+    assert search.search_game_sessions(db, owner_id=user.id, query="friday", skip=10) == (3, [])
+    assert search.search_game_sessions(db, owner_id=user.id, query="nothing") == (0, [])
+
+
+def test_search_endpoint(client, db, user, auth_headers):
+    add_session(db, user, "Friday poker", ["Dana"])
+    response = client.get(f"{API}/search/game-sessions", params={"q": "dana", "skip": 5}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
@@ -0,0 +1,156 @@
+from collections import Counter, defaultdict
+
+import pytest
+
+from app.services.settlement_flow import SettlementInfeasible, min_cost_settlements
+from tests.conftest import API
+
+
+def table(**nets):
+    return [{"name": name, "net_result": net} for name, net in nets.items()]
+
+
+def remaining(players, transfers):
+    # What each player is still owed (or owes) once the transfers are paid
+    balances = defaultdict(float)
+    for player in players:
+        balances[player["name"]] += player["net_result"]
+    for transfer in transfers:
+        balances[transfer["from_player"]] += transfer["amount"]
+        balances[transfer["to_player"]] -= transfer["amount"]
+    return {name: round(balance, 2) for name, balance in balances.items() if round(balance, 2)}
+
+
+def pairs(transfers):
+    return {(t["from_player"], t["to_player"]): t["amount"] for t in transfers}
+
+
+def test_transfers_cancel_every_balance():
+    players = table(ann=-30.25, bob=-19.75, cat=42.5, dan=7.5)
+    transfers = min_cost_settlements(players)
+
+    assert remaining(players, transfers) == {}
+    assert all(t["amount"] > 0 for t in transfers)
+
+
+def test_forbidden_pairs_are_avoided():
+    players = table(ann=-10, bob=-10, cat=10, dan=10)
+    transfers = min_cost_settlements(players, forbidden_pairs=[("ann", "cat"), ("bob", "dan")])
+
+    assert pairs(transfers) == {("ann", "dan"): 10, ("bob", "cat"): 10}
+
+
+def test_only_allowed_pairs_are_used():
+    players = table(ann=-10, bob=-10, cat=10, dan=10)
+    transfers = min_cost_settlements(players, allowed_pairs=[("ann", "cat"), ("bob", "dan")])
+
+    assert pairs(transfers) == {("ann", "cat"): 10, ("bob", "dan"): 10}
+
+
+def test_debt_with_no_allowed_payee_is_infeasible():
+    with pytest.raises(SettlementInfeasible):
+        min_cost_settlements(table(ann=-10, bob=10), forbidden_pairs=[("ann", "bob")])
+
+
+def test_max_transfers_caps_a_players_payments():
+    players = table(ann=-20, bob=-20, cat=10, dan=30)
+    transfers = min_cost_settlements(
+        players, max_transfers={"ann": 1}, edge_costs={("ann", "dan"): 2, ("bob", "cat"): 2}
+    )
+
+    assert Counter(t["from_player"] for t in transfers)["ann"] == 1
+    assert remaining(players, transfers) == {}
+
+
+def test_cap_that_cannot_be_met_is_infeasible():
+    with pytest.raises(SettlementInfeasible):
+        min_cost_settlements(table(ann=-20, bob=10, cat=10), max_transfers={"ann": 1})
+    with pytest.raises(SettlementInfeasible):
+        min_cost_settlements(table(ann=-20, bob=20), max_transfers={"ann": 0})
+
+
+def test_bank_relays_what_a_capped_player_cannot_pay_directly():
+    players = table(ann=-20, bob=10, cat=10)
+    transfers = min_cost_settlements(players, max_transfers={"ann": 1}, bank="host")
+
+    assert pairs(transfers) == {("ann", "host"): 20, ("host", "bob"): 10, ("host", "cat"): 10}
+
+
+def test_bank_relays_between_players_who_cannot_pay_each_other():
+    players = table(ann=-10, bob=10)
+    transfers = min_cost_settlements(players, forbidden_pairs=[("ann", "bob")], bank="host")
+
+    assert pairs(transfers) == {("ann", "host"): 10, ("host", "bob"): 10}
+
+
+def test_bank_absorbs_what_does_not_balance():
+    players = table(ann=-10, bob=12.01)
+    transfers = min_cost_settlements(players, bank="host")
+
+    # Everyone else is square; the host is out of pocket by the difference
+    assert remaining(players, transfers) == {"host": 2.01}
+    assert pairs(transfers)[("host", "bob")] == 2.01
+
+
+def test_edge_costs_steer_the_transfers():
+    players = table(ann=-10, bob=-10, cat=10, dan=10)
+
+    expensive_direct = min_cost_settlements(players, edge_costs={("ann", "cat"): 5, ("bob", "dan"): 5})
+    assert pairs(expensive_direct) == {("ann", "dan"): 10, ("bob", "cat"): 10}
+    expensive_crossed = min_cost_settlements(players, edge_costs={("ann", "dan"): 5, ("bob", "cat"): 5})
+    assert pairs(expensive_crossed) == {("ann", "cat"): 10, ("bob", "dan"): 10}
+
+
+def test_negative_edge_costs_are_rejected():
+    with pytest.raises(ValueError):
+        min_cost_settlements(table(ann=-10, bob=10), edge_costs={("ann", "bob"): -1})
+
+
+@pytest.fixture
+def game_session_id(client, auth_headers):
+    game_session = client.post(
+        f"{API}/game-sessions/", json={"title": "Friday", "game_date": "2025-01-01T00:00:00"}, headers=auth_headers
+    ).json()
+    for name, buy_in, cash_out in [("ann", 20, 0), ("bob", 0, 20)]:
+        client.post(
+            f"{API}/game-sessions/{game_session['id']}/players",
+            json={"name": name, "buy_in": buy_in, "cash_out": cash_out},
+            headers=auth_headers,
+        )
+    return game_session["id"]
+
+
+def test_api_settles_with_min_cost_flow(client, auth_headers, game_session_id):
+    response = client.post(
+        f"{API}/game-sessions/{game_session_id}/calculate-settlements",
+        json={"method": "min-cost-flow", "bank": "host", "forbidden_pairs": [{"from_player": "ann", "to_player": "bob"}]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert {(s["from_player"], s["to_player"], s["amount"]) for s in response.json()["settlements"]} == {
+        ("ann", "host", 20),
+        ("host", "bob", 20),
+    }
+
+
+def test_api_rejects_constraints_without_min_cost_flow(client, auth_headers, game_session_id):
+    response = client.post(
+        f"{API}/game-sessions/{game_session_id}/calculate-settlements",
+        json={"method": "greedy", "forbidden_pairs": [{"from_player": "ann", "to_player": "bob"}]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 422
+
+
+def test_api_rejects_infeasible_tables(client, auth_headers, game_session_id):
+    response = client.post(
+        f"{API}/game-sessions/{game_session_id}/calculate-settlements",
+        json={"method": "min-cost-flow", "forbidden_pairs": [{"from_player": "ann", "to_player": "bob"}]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 422
+    assert "cannot be settled" in response.json()["detail"]
+    assert client.get(f"{API}/game-sessions/{game_session_id}", headers=auth_headers).json()["settlements"] == []
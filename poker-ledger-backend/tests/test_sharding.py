@@ -0,0 +1,143 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.core.config import settings
+from app.db import session as db_session, sharding
+from app.db.session import SessionLocal
+from app.tools.shards import ShardError, init_shard, move_owners, release
+from tests.conftest import API
+
+NEW_SESSION = {"title": "Friday", "game_date": "2025-01-01T00:00:00"}
+
+
+@pytest.fixture
+def shards(db, monkeypatch, tmp_path):
+    urls = {name: f"sqlite:///{tmp_path / f'shard{name}.db'}" for name in ("1", "2")}
+    shard_set = sharding.ShardSet(urls, settings.SHARD_VNODES)
+    monkeypatch.setattr(settings, "SHARDS", ",".join(f"{name}={url}" for name, url in urls.items()))
+    monkeypatch.setattr(sharding, "_shards", shard_set)
+    # Sessions are RoutingSessions only when SHARDS is set
+    monkeypatch.setattr(db_session, "_session_factory", None)
+    for name in urls:
+        init_shard(name)
+    yield shard_set
+    for name in urls:
+        shard_set.engine(name).dispose()
+
+
+def placement(db, owner_id):
+    db.expire_all()
+    return db.query(models.ShardPlacement).filter(models.ShardPlacement.owner_id == owner_id).one()
+
+
+def session_count(shard_set, shard, owner_id):
+    with shard_set.engine(shard).connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(models.GameSession).where(models.GameSession.owner_id == owner_id)
+        ).scalar_one()
+
+
+def other_shard(shard):
+    return "2" if shard == "1" else "1"
+
+
+def test_new_owner_is_placed_and_routed(client, db, user, auth_headers, shards):
+    created = client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=auth_headers).json()
+
+    shard = placement(db, user.id).shard
+    assert shard == shards.ring.shard_for(user.id)
+    assert created["id"] in shards.id_range(shard)
+    assert session_count(shards, shard, user.id) == 1
+    assert session_count(shards, other_shard(shard), user.id) == 0
+    assert [s["id"] for s in client.get(f"{API}/game-sessions/", headers=auth_headers).json()] == [created["id"]]
+    # The request's session was closed, so nothing is left in flight
+    assert placement(db, user.id).routed_sessions == 0
+
+
+def test_unrouted_session_cannot_touch_game_tables(shards):
+    db = SessionLocal()
+    try:
+        with pytest.raises(sharding.UnroutedQuery):
+            db.query(models.GameSession).all()
+    finally:
+        db.close()
+
+
+def test_move_copies_switches_and_deletes_the_source(client, db, user, auth_headers, shards):
+    created = client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=auth_headers).json()
+    client.post(
+        f"{API}/game-sessions/{created['id']}/players", json={"name": "Dana", "buy_in": 20}, headers=auth_headers
+    )
+    source = placement(db, user.id).shard
+    target = other_shard(source)
+
+    [(owner_id, moved_from, moved_to, counts, _)] = move_owners([(user.id, target)], drain_seconds=1)
+
+    assert (owner_id, moved_from, moved_to) == (user.id, source, target)
+    assert counts["game_sessions"] == 1 and counts["players"] == 1
+    assert (placement(db, user.id).shard, placement(db, user.id).moving_to) == (target, None)
+    assert session_count(shards, source, user.id) == 0
+    assert session_count(shards, target, user.id) == 1
+    game_session = client.get(f"{API}/game-sessions/{created['id']}", headers=auth_headers).json()
+    assert [p["name"] for p in game_session["players"]] == ["Dana"]
+
+
+def test_owner_being_moved_gets_503(client, db, user, auth_headers, shards):
+    client.get(f"{API}/game-sessions/", headers=auth_headers)
+    row = placement(db, user.id)
+    row.moving_to = other_shard(row.shard)
+    db.commit()
+
+    response = client.get(f"{API}/game-sessions/", headers=auth_headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+
+def test_move_waits_for_sessions_routed_before_it(client, db, user, auth_headers, shards):
+    client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=auth_headers)
+    source = placement(db, user.id).shard
+    in_flight = SessionLocal()
+    sharding.route(in_flight, user.id)
+    in_flight.add(models.GameSession(title="Late write", game_date=datetime(2025, 1, 2), owner_id=user.id))
+    in_flight.flush()
+
+    def finish_request():
+        in_flight.commit()
+        in_flight.close()
+
+    closer = threading.Timer(0.3, finish_request)
+    closer.start()
+    moved = list(move_owners([(user.id, other_shard(source))], drain_seconds=5))
+    closer.join()
+
+    # The write committed while the move waited went along with the rest
+    assert moved[0][3]["game_sessions"] == 2
+    assert session_count(shards, other_shard(source), user.id) == 2
+
+
+def test_owner_with_sessions_still_open_is_not_moved(db, user, shards):
+    in_flight = SessionLocal()
+    sharding.route(in_flight, user.id)
+    source = placement(db, user.id).shard
+    try:
+        with pytest.raises(ShardError, match="still open"):
+            list(move_owners([(user.id, other_shard(source))], drain_seconds=0.2))
+        assert (placement(db, user.id).shard, placement(db, user.id).moving_to) == (source, None)
+    finally:
+        in_flight.close()
+    assert placement(db, user.id).routed_sessions == 0
+
+
+def test_release_forgets_sessions_of_a_dead_process(db, user, shards):
+    abandoned = SessionLocal()
+    sharding.route(abandoned, user.id)
+
+    assert release(user.id) == 1
+    assert placement(db, user.id).routed_sessions == 0
+    # Closing the session later does not take the count below zero
+    abandoned.close()
+    assert placement(db, user.id).routed_sessions == 0
@@ -0,0 +1,99 @@
+import pytest
+
+from app import crud, schemas
+from app.db import sync
+from tests.conftest import API
+
+NEW_SESSION = {"title": "Friday", "game_date": "2025-01-01T00:00:00"}
+
+
+def changes(client, headers, since=None):
+    params = {} if since is None else {"since": since}
+    response = client.get(f"{API}/sync/", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+@pytest.fixture
+def game_session(client, auth_headers):
+    game_session = client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=auth_headers).json()
+    for name, buy_in, cash_out in [("ann", 20, 0), ("bob", 0, 20)]:
+        client.post(
+            f"{API}/game-sessions/{game_session['id']}/players",
+            json={"name": name, "buy_in": buy_in, "cash_out": cash_out},
+            headers=auth_headers,
+        )
+    client.post(f"{API}/game-sessions/{game_session['id']}/calculate-settlements", headers=auth_headers)
+    return client.get(f"{API}/game-sessions/{game_session['id']}", headers=auth_headers).json()
+
+
+def test_first_sync_is_full(client, auth_headers, game_session):
+    full = changes(client, auth_headers)
+
+    assert full["full"] is True
+    assert ids(full["game_sessions"]) == [game_session["id"]]
+    assert ids(full["players"]) == ids(game_session["players"])
+    assert len(full["settlements"]) == 1
+    assert changes(client, auth_headers, since=full["cursor"])["full"] is False
+
+
+def test_delta_holds_only_changes_after_the_cursor(client, auth_headers, game_session):
+    cursor = changes(client, auth_headers)["cursor"]
+    assert changes(client, auth_headers, since=cursor)["players"] == []
+
+    ann = game_session["players"][0]
+    client.put(f"{API}/players/players/{ann['id']}", json={"name": "Ann"}, headers=auth_headers)
+    delta = changes(client, auth_headers, since=cursor)
+
+    assert delta["cursor"] > cursor
+    assert [player["name"] for player in delta["players"]] == ["Ann"]
+    assert delta["game_sessions"] == [] and delta["settlements"] == []
+    # The next delta starts where this one ended
+    assert changes(client, auth_headers, since=delta["cursor"])["players"] == []
+
+
+def test_cursor_bounds(client, db, user, auth_headers, game_session):
+    cursor = changes(client, auth_headers)["cursor"]
+    assert cursor == sync.current_version(db, user.id)
+
+    # Rows are only sent up to the cursor; one ahead of the client sends nothing
+    ahead = changes(client, auth_headers, since=cursor + 100)
+    assert (ahead["cursor"], ahead["game_sessions"], ahead["players"]) == (cursor, [], [])
+    # since=0 is a delta from the beginning, unlike a full sync
+    from_start = changes(client, auth_headers, since=0)
+    assert from_start["full"] is False
+    assert ids(from_start["players"]) == ids(game_session["players"])
+    assert client.get(f"{API}/sync/", params={"since": -1}, headers=auth_headers).status_code == 422
+
+
+def test_cascaded_deletes_leave_tombstones(client, auth_headers, game_session):
+    cursor = changes(client, auth_headers)["cursor"]
+    client.delete(f"{API}/game-sessions/{game_session['id']}", headers=auth_headers)
+
+    delta = changes(client, auth_headers, since=cursor)
+    assert delta["deleted"]["game_sessions"] == [game_session["id"]]
+    assert sorted(delta["deleted"]["players"]) == ids(game_session["players"])
+    assert delta["deleted"]["settlements"] == ids(game_session["settlements"])
+    # A full sync has nothing to delete
+    assert changes(client, auth_headers)["deleted"]["game_sessions"] == []
+
+
+def test_counters_are_per_owner(client, db, auth_headers, game_session):
+    crud.user.create(db, obj_in=schemas.UserCreate(email="bob@example.com", username="bob", password="secret"))
+    token = client.post(f"{API}/auth/login", data={"username": "bob", "password": "secret"}).json()["access_token"]
+    bob_headers = {"Authorization": f"Bearer {token}"}
+    alice_cursor = changes(client, auth_headers)["cursor"]
+    bob_cursor = changes(client, bob_headers)["cursor"]
+
+    client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=bob_headers)
+
+    assert changes(client, auth_headers)["cursor"] == alice_cursor
+    assert changes(client, auth_headers, since=alice_cursor)["game_sessions"] == []
+    bob_delta = changes(client, bob_headers, since=bob_cursor)
+    assert bob_delta["cursor"] > bob_cursor
+    assert len(bob_delta["game_sessions"]) == 1
+    assert ids(changes(client, bob_headers)["game_sessions"]) == ids(bob_delta["game_sessions"])
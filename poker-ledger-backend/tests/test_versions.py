@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import crud, models, schemas
+from app.db.session import SessionLocal
+from app.services import ledger
+from tests.conftest import API
+
+NEW_SESSION = {"title": "Friday", "game_date": "2025-01-01T00:00:00"}
+
+
+def bump_version(model, id):
+    # Another request's update, committed on its own connection
+    db = SessionLocal()
+    try:
+        db.execute(update(model).where(model.id == id).values(version=model.version + 1))
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def game_session(client, auth_headers):
+    return client.post(f"{API}/game-sessions/", json=NEW_SESSION, headers=auth_headers).json()
+
+
+@pytest.fixture
+def player(client, auth_headers, game_session):
+    return client.post(
+        f"{API}/game-sessions/{game_session['id']}/players", json={"name": "Dana", "buy_in": 20}, headers=auth_headers
+    ).json()
+
+
+def test_session_update_bumps_version_and_etag(client, auth_headers, game_session):
+    url = f"{API}/game-sessions/{game_session['id']}"
+    assert client.get(url, headers=auth_headers).headers["ETag"] == '"1"'
+
+    response = client.put(url, json={"title": "Saturday", "version": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] == '"2"'
+    assert client.get(url, headers=auth_headers).headers["ETag"] == '"2"'
+
+
+@pytest.mark.parametrize("send_as", ["body", "if-match"])
+def test_stale_session_update_gets_409_with_current(client, auth_headers, game_session, send_as):
+    url = f"{API}/game-sessions/{game_session['id']}"
+    client.put(url, json={"title": "Theirs"}, headers=auth_headers)
+
+    if send_as == "body":
+        response = client.put(url, json={"title": "Mine", "version": 1}, headers=auth_headers)
+    else:
+        response = client.put(url, json={"title": "Mine"}, headers={**auth_headers, "If-Match": '"1"'})
+    assert response.status_code == 409
+    current = response.json()["detail"]["current"]
+    assert (current["title"], current["version"]) == ("Theirs", 2)
+    assert client.get(url, headers=auth_headers).json()["title"] == "Theirs"
+
+
+def test_malformed_if_match_is_rejected(client, auth_headers, game_session):
+    response = client.put(
+        f"{API}/game-sessions/{game_session['id']}", json={"title": "Mine"}, headers={**auth_headers, "If-Match": "W/abc"}
+    )
+    assert response.status_code == 400
+
+
+def test_crud_update_of_a_stale_row_raises(db, user):
+    game_session = crud.game_session.create_with_owner(
+        db, obj_in=schemas.GameSessionCreate(**NEW_SESSION), owner_id=user.id
+    )
+    bump_version(models.GameSession, game_session.id)
+
+    with pytest.raises(StaleDataError):
+        crud.game_session.update(db, db_obj=game_session, obj_in={"title": "Mine"})
+
+
+def test_session_changed_after_the_check_gets_409(client, auth_headers, game_session, monkeypatch):
+    original = crud.game_session.update
+
+    def update_after_another_request(db, *, db_obj, obj_in):
+        bump_version(models.GameSession, db_obj.id)
+        return original(db, db_obj=db_obj, obj_in=obj_in)
+
+    monkeypatch.setattr(crud.game_session, "update", update_after_another_request)
+    response = client.put(
+        f"{API}/game-sessions/{game_session['id']}", json={"title": "Mine", "version": 1}, headers=auth_headers
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"]["current"]["version"] == 2
+
+
+def test_player_update_bumps_version_and_etag(client, auth_headers, player):
+    response = client.put(
+        f"{API}/players/players/{player['id']}", json={"name": "Dee", "version": player["version"]}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == player["version"] + 1
+    assert response.headers["ETag"] == f'"{player["version"] + 1}"'
+
+
+@pytest.mark.parametrize("send_as", ["body", "if-match"])
+def test_stale_player_update_gets_409_with_current(client, auth_headers, player, send_as):
+    url = f"{API}/players/players/{player['id']}"
+    client.put(url, json={"name": "Theirs"}, headers=auth_headers)
+
+    if send_as == "body":
+        response = client.put(url, json={"name": "Mine", "version": player["version"]}, headers=auth_headers)
+    else:
+        response = client.put(
+            url, json={"name": "Mine"}, headers={**auth_headers, "If-Match": f'"{player["version"]}"'}
+        )
+    assert response.status_code == 409
+    detail = response.json()["detail"]
+    assert detail["message"]
+    assert (detail["current"]["name"], detail["current"]["version"]) == ("Theirs", player["version"] + 1)
+
+
+def test_player_changed_after_the_check_gets_409(client, auth_headers, player, monkeypatch):
+    original = ledger.set_totals
+
+    def set_totals_after_another_request(db, *, player, **totals):
+        bump_version(models.Player, player.id)
+        return original(db, player=player, **totals)
+
+    monkeypatch.setattr(ledger, "set_totals", set_totals_after_another_request)
+    response = client.put(
+        f"{API}/players/players/{player['id']}", json={"name": "Mine", "version": player["version"]}, headers=auth_headers
+    )
+    assert response.status_code == 409
+    current = response.json()["detail"]["current"]
+    assert (current["name"], current["version"]) == ("Dana", player["version"] + 1)
@@ -51,6 +51,19 @@ function App() {
     }
   }, [currentSession]);
 
+  // Follow the cached copy of the open session as it is refreshed or edited
+  const currentSessionId = currentSession?.id;
+  useEffect(() => {
+    if (currentSessionId === undefined) return;
+    return api.subscribeToGameSession(currentSessionId, (session: any) => {
+      setCurrentSession({
+        ...session,
+        players: session.players || [],
+        settlements: session.settlements || []
+      });
+    });
+  }, [currentSessionId]);
+
   const handleSessionSelect = async (session: GameSession) => {
     try {
       // Fetch full session details with players
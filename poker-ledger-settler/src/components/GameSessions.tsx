@@ -30,6 +30,8 @@ const GameSessions: React.FC<GameSessionsProps> = ({ onSelectSession, currentSes
 
   useEffect(() => {
     loadSessions();
+    // Pick up background refreshes and changes made elsewhere in the app
+    return api.subscribeToGameSessions(data => setSessions(data as GameSession[]));
   }, []);
 
   const loadSessions = async () => {
@@ -39,6 +39,8 @@ const GameSessionsSidebar: React.FC<GameSessionsSidebarProps> = ({
 
   useEffect(() => {
     loadSessions();
+    // Pick up background refreshes and changes made elsewhere in the app
+    return api.subscribeToGameSessions(data => setSessions(data as GameSession[]));
   }, []);
 
   const loadSessions = async () => {
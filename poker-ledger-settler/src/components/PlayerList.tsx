@@ -192,13 +192,13 @@ const PlayerList: React.FC<PlayerListProps> = ({
         updateData = { cash_out: numValue };
       }
 
-      const backendPlayer = await api.updatePlayer(Number(id), updateData);
-      const updatedPlayer = transformPlayer(backendPlayer);
-      
-      const updatedPlayers = players.map(p => 
+      // Show the edit straight away; the backend's answer, or the rollback
+      // if it fails, arrives through the session cache
+      const updatedPlayer = transformPlayer({ ...player, ...updateData });
+      onPlayersUpdate(players.map(p => 
         p.id === id ? updatedPlayer : p
-      );
-      onPlayersUpdate(updatedPlayers);
+      ));
+      await api.updatePlayer(Number(id), updateData);
     } catch (error) {
       console.error('Failed to update player:', error);
     }
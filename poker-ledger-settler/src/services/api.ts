@@ -18,6 +18,36 @@ interface AuthResponse {
   token_type: string;
 }
 
+// Client-side cache: a GET response is served without asking the backend
+// for FRESH_MS, then shown for up to STALE_MS more while a background
+// request refreshes it (stale-while-revalidate)
+const FRESH_MS = 30 * 1000;
+const STALE_MS = 10 * 60 * 1000;
+
+const SESSIONS_KEY = '/game-sessions/';
+const PLAYER_NAMES_KEY = '/players/unique-names';
+const CURRENT_USER_KEY = '/auth/me';
+const sessionKey = (id: number) => `/game-sessions/${id}`;
+
+interface CacheEntry {
+  data: any;
+  fetchedAt: number;
+}
+
+type Listener = (data: any) => void;
+
+// A 409 from an update based on a stale version; current is the resource
+// as the backend has it now
+export class ConflictError extends Error {
+  current: any;
+
+  constructor(message: string, current: any) {
+    super(message);
+    this.name = 'ConflictError';
+    this.current = current;
+  }
+}
+
 // Token Management
 const TOKEN_KEY = 'poker_ledger_token';
 
@@ -30,6 +60,20 @@ export const tokenManager = {
 class API {
   private baseURL: string;
   private token: string | null = null;
+  private cache = new Map<string, CacheEntry>();
+  // One request per endpoint at a time; concurrent callers share it
+  private inFlight = new Map<string, Promise<any>>();
+  private listeners = new Map<string, Set<Listener>>();
+  // Bumped on every cache write, so a GET that started before a mutation
+  // does not put older data back
+  private generations = new Map<string, number>();
+  // Bumped by clearCache, so nothing requested before a logout is cached
+  // after it
+  private epoch = 0;
+  // Latest edit per player; only its response or failure touches the cache
+  private playerEdits = new Map<number, number>();
+  // Each player's last save; the next one waits for it to learn the version
+  private playerSaves = new Map<number, Promise<unknown>>();
 
   constructor() {
     this.baseURL = config.API_URL + '/api/v1';
@@ -56,18 +100,154 @@ class API {
     if (response.status === 401) {
       // Token expired or invalid
       tokenManager.removeToken();
+      this.clearCache();
       window.location.href = '/login';
       throw new Error('Authentication required');
     }
 
     if (!response.ok) {
       const error = await response.json().catch(() => ({}));
+      if (response.status === 409 && error.detail?.current) {
+        throw new ConflictError(error.detail.message, error.detail.current);
+      }
       throw new Error(error.detail || 'Something went wrong');
     }
 
     return response.json();
   }
 
+  private fetchShared<T>(endpoint: string, onStore?: (data: T, fetchedAt: number) => void): Promise<T> {
+    const pending = this.inFlight.get(endpoint);
+    if (pending) return pending;
+
+    const generation = this.generations.get(endpoint) || 0;
+    const epoch = this.epoch;
+    const promise = this.request<T>(endpoint)
+      .then(data => {
+        // A mutation since this request started has the newer data
+        if (this.epoch === epoch && (this.generations.get(endpoint) || 0) === generation) {
+          const fetchedAt = Date.now();
+          this.store(endpoint, data, fetchedAt);
+          onStore?.(data, fetchedAt);
+        }
+        return data;
+      })
+      .finally(() => {
+        if (this.inFlight.get(endpoint) === promise) {
+          this.inFlight.delete(endpoint);
+        }
+      });
+    this.inFlight.set(endpoint, promise);
+    return promise;
+  }
+
+  private cachedGet<T>(endpoint: string, onStore?: (data: T, fetchedAt: number) => void): Promise<T> {
+    const entry = this.cache.get(endpoint);
+    const age = entry ? Date.now() - entry.fetchedAt : Infinity;
+    if (entry && age < FRESH_MS) {
+      return Promise.resolve(entry.data);
+    }
+    if (entry && age < FRESH_MS + STALE_MS) {
+      // Answer now; subscribers get the refreshed data when it arrives
+      this.fetchShared<T>(endpoint, onStore).catch(error =>
+        console.error(`Failed to refresh ${endpoint}:`, error)
+      );
+      return Promise.resolve(entry.data);
+    }
+    return this.fetchShared<T>(endpoint, onStore);
+  }
+
+  private store(endpoint: string, data: any, fetchedAt = Date.now()) {
+    this.cache.set(endpoint, { data, fetchedAt });
+    this.generations.set(endpoint, (this.generations.get(endpoint) || 0) + 1);
+    this.listeners.get(endpoint)?.forEach(listener => listener(data));
+  }
+
+  // Apply a mutation's result to a cached response, keeping its age
+  private patch<T>(endpoint: string, update: (data: T) => T) {
+    const entry = this.cache.get(endpoint);
+    if (entry) {
+      this.store(endpoint, update(entry.data), entry.fetchedAt);
+    }
+  }
+
+  private invalidate(endpoint: string) {
+    this.cache.delete(endpoint);
+    this.inFlight.delete(endpoint);
+    this.generations.set(endpoint, (this.generations.get(endpoint) || 0) + 1);
+  }
+
+  // Update a session in both the list and its own entry
+  private patchSession(id: number, update: (session: any) => any) {
+    this.patch<any>(sessionKey(id), update);
+    this.patch<any[]>(SESSIONS_KEY, sessions =>
+      sessions.map(session => (session.id === id ? update(session) : session))
+    );
+  }
+
+  private storeSession(session: any) {
+    this.store(sessionKey(session.id), session);
+    this.patch<any[]>(SESSIONS_KEY, sessions =>
+      sessions.some(s => s.id === session.id)
+        ? sessions.map(s => (s.id === session.id ? session : s))
+        : [session, ...sessions]
+    );
+  }
+
+  // Changing players makes the session's settlements outdated, as the
+  // editor already shows until they are calculated again
+  private patchPlayers(gameSessionId: number, update: (players: any[]) => any[]) {
+    this.patchSession(gameSessionId, session => ({
+      ...session,
+      players: update(session.players || []),
+      is_settled: false,
+    }));
+  }
+
+  private findCachedPlayer(gameSessionId: number, playerId: number): any {
+    return this.cache.get(sessionKey(gameSessionId))?.data.players?.find((p: any) => p.id === playerId);
+  }
+
+  private findSessionIdOfPlayer(playerId: number): number | undefined {
+    for (const [endpoint, entry] of Array.from(this.cache.entries())) {
+      if (endpoint !== SESSIONS_KEY && endpoint.startsWith('/game-sessions/')
+          && entry.data.players?.some((p: any) => p.id === playerId)) {
+        return entry.data.id;
+      }
+    }
+    return undefined;
+  }
+
+  /**
+   * Call listener whenever the cached response for endpoint changes: after
+   * a background refresh or a mutation. Returns an unsubscribe function.
+   */
+  private subscribe(endpoint: string, listener: Listener): () => void {
+    if (!this.listeners.has(endpoint)) {
+      this.listeners.set(endpoint, new Set());
+    }
+    this.listeners.get(endpoint)!.add(listener);
+    return () => {
+      this.listeners.get(endpoint)?.delete(listener);
+    };
+  }
+
+  subscribeToGameSessions(listener: (sessions: any[]) => void): () => void {
+    return this.subscribe(SESSIONS_KEY, listener);
+  }
+
+  subscribeToGameSession(id: number, listener: (session: any) => void): () => void {
+    return this.subscribe(sessionKey(id), listener);
+  }
+
+  clearCache() {
+    this.cache.clear();
+    this.inFlight.clear();
+    this.playerEdits.clear();
+    this.playerSaves.clear();
+    this.epoch += 1;
+  }
+
   // Auth endpoints
   async login(credentials: LoginCredentials): Promise<AuthResponse> {
     const formData = new FormData();
@@ -86,6 +266,8 @@ class API {
 
     const data: AuthResponse = await response.json();
     tokenManager.setToken(data.access_token);
+    // Anything cached belongs to whoever was logged in before
+    this.clearCache();
     return data;
   }
 
@@ -97,72 +279,169 @@ class API {
   }
 
   async getCurrentUser() {
-    return this.request('/auth/me');
+    return this.cachedGet(CURRENT_USER_KEY);
   }
 
   logout() {
     tokenManager.removeToken();
+    this.clearCache();
   }
 
   // Game Session endpoints
   async getGameSessions() {
-    return this.request('/game-sessions/');
+    // The list carries full sessions; opening one needs no second request
+    return this.cachedGet<any[]>(SESSIONS_KEY, (sessions, fetchedAt) => {
+      sessions.forEach(session => {
+        const cached = this.cache.get(sessionKey(session.id));
+        if (!cached || cached.fetchedAt < fetchedAt) {
+          this.store(sessionKey(session.id), session, fetchedAt);
+        }
+      });
+    });
   }
 
   async getGameSession(id: number) {
-    return this.request(`/game-sessions/${id}`);
+    return this.cachedGet(sessionKey(id));
   }
 
   async createGameSession(data: any) {
-    return this.request('/game-sessions/', {
+    const session = await this.request<any>('/game-sessions/', {
       method: 'POST',
       body: JSON.stringify(data),
     });
+    this.storeSession(session);
+    return session;
   }
 
   async updateGameSession(id: number, data: any) {
-    return this.request(`/game-sessions/${id}`, {
+    const session = await this.request<any>(`/game-sessions/${id}`, {
       method: 'PUT',
       body: JSON.stringify(data),
     });
+    this.storeSession(session);
+    return session;
   }
 
   async deleteGameSession(id: number) {
-    return this.request(`/game-sessions/${id}`, {
+    const deleted = await this.request(`/game-sessions/${id}`, {
       method: 'DELETE',
     });
+    this.invalidate(sessionKey(id));
+    this.patch<any[]>(SESSIONS_KEY, sessions => sessions.filter(session => session.id !== id));
+    // Names only played in this session may be gone
+    this.invalidate(PLAYER_NAMES_KEY);
+    return deleted;
   }
 
   async calculateSettlements(gameSessionId: number) {
-    return this.request(`/game-sessions/${gameSessionId}/calculate-settlements`, {
+    const session = await this.request<any>(`/game-sessions/${gameSessionId}/calculate-settlements`, {
       method: 'POST',
     });
+    this.storeSession(session);
+    return session;
   }
 
   // Player endpoints
   async getUniquePlayerNames(): Promise<string[]> {
-    const response = await this.request('/players/unique-names');
-    return response as string[];
+    return this.cachedGet<string[]>(PLAYER_NAMES_KEY);
   }
 
   async addPlayer(gameSessionId: number, player: any): Promise<any> {
-    return this.request(`/game-sessions/${gameSessionId}/players`, {
+    const created = await this.request<any>(`/game-sessions/${gameSessionId}/players`, {
       method: 'POST',
       body: JSON.stringify(player),
     });
+    this.patchPlayers(gameSessionId, players => [...players, created]);
+    const names = this.cache.get(PLAYER_NAMES_KEY)?.data as string[] | undefined;
+    if (names && !names.includes(created.name)) {
+      this.invalidate(PLAYER_NAMES_KEY);
+    }
+    return created;
   }
 
+  /**
+   * Update a player, applying the change to cached sessions right away and
+   * rolling it back if the backend rejects it. The save carries the cached
+   * player's version, so the backend refuses it if someone else changed the
+   * player in the meantime.
+   */
   async updatePlayer(playerId: number, data: any) {
-    return this.request(`/players/${playerId}`, {
-      method: 'PUT',
-      body: JSON.stringify(data),
-    });
+    const epoch = this.epoch;
+    const gameSessionId = this.findSessionIdOfPlayer(playerId);
+    const previous = [SESSIONS_KEY, gameSessionId !== undefined ? sessionKey(gameSessionId) : '']
+      .map(endpoint => [endpoint, this.cache.get(endpoint)] as const);
+    const edit = (this.playerEdits.get(playerId) || 0) + 1;
+    this.playerEdits.set(playerId, edit);
+    const replacePlayer = (replace: (player: any) => any) => {
+      if (gameSessionId !== undefined) {
+        this.patchPlayers(gameSessionId, players =>
+          players.map(p => (p.id === playerId ? replace(p) : p))
+        );
+      }
+    };
+
+    replacePlayer(p => ({ ...p, ...data }));
+    // Edits sent while typing go one at a time; each is checked against the
+    // version the one before it produced
+    const save = (this.playerSaves.get(playerId) || Promise.resolve())
+      .catch(() => undefined)
+      .then(() => {
+        const version = gameSessionId !== undefined
+          ? this.findCachedPlayer(gameSessionId, playerId)?.version
+          : undefined;
+        return this.request<any>(`/players/players/${playerId}`, {
+          method: 'PUT',
+          body: JSON.stringify({ ...data, version }),
+        });
+      });
+    this.playerSaves.set(playerId, save);
+    try {
+      const updated = await save;
+      if (this.epoch !== epoch) {
+        return updated;
+      }
+      if (this.playerEdits.get(playerId) === edit) {
+        replacePlayer(() => updated);
+      } else {
+        // A later edit is still shown; only the version moves on
+        replacePlayer(p => ({ ...p, version: updated.version }));
+      }
+      return updated;
+    } catch (error) {
+      if (this.epoch === epoch && this.playerEdits.get(playerId) === edit) {
+        previous.forEach(([endpoint, entry]) => {
+          if (entry) {
+            this.store(endpoint, entry.data, entry.fetchedAt);
+          }
+        });
+      }
+      // Someone else changed the player; keep what they saved, and its
+      // version for the next edit, rather than the copy this one was based on
+      if (this.epoch === epoch && error instanceof ConflictError) {
+        const current = error.current;
+        if (this.playerEdits.get(playerId) === edit) {
+          replacePlayer(() => current);
+        } else {
+          replacePlayer(p => ({ ...p, version: current.version }));
+        }
+      }
+      throw error;
+    } finally {
+      if (this.playerSaves.get(playerId) === save) {
+        this.playerSaves.delete(playerId);
+      }
+    }
   }
 
   async deletePlayer(playerId: number) {
-    return this.request(`/players/${playerId}`, {
+    const gameSessionId = this.findSessionIdOfPlayer(playerId);
+    const deleted = await this.request(`/players/players/${playerId}`, {
       method: 'DELETE',
     });
+    if (gameSessionId !== undefined) {
+      this.patchPlayers(gameSessionId, players => players.filter(p => p.id !== playerId));
+    }
+    return deleted;
   }
 }
 